@@ -1,8 +1,44 @@
-from flask import Flask, render_template, request
-from src.pipeline.prediction_pipeline import PredictionPipeline
-from src.utils.utils import get_data_as_dataframe
+import os
+import time
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from flask import Flask, Response, g, jsonify, render_template, request
+from src.pipeline.batching import MicroBatcher, MicroBatcherConfig
+from src.pipeline.serving import (
+    create_prediction_pipeline,
+    drift_report,
+    form_error_message,
+    format_predictions,
+    json_error_body,
+    parse_form,
+    parse_json_payload,
+    record_request
+)
+from src.utils.monitoring import CONTENT_TYPE, REGISTRY
 
 app = Flask(__name__)
+predict_pipe = create_prediction_pipeline()
+prediction_cache = predict_pipe.cache
+batcher = MicroBatcher(
+    predict_pipe.predict,
+    MicroBatcherConfig(
+        max_batch_size=int(os.environ.get('BATCH_MAX_SIZE', 256)),
+        max_wait_ms=float(os.environ.get('BATCH_MAX_WAIT_MS', 5.0))
+    )
+)
+# same budget as the ASGI app's inference pool
+predict_timeout = float(os.environ.get('INFERENCE_TIMEOUT', 10.0))
+
+@app.before_request
+def start_timer():
+    g.request_started = time.perf_counter()
+
+@app.after_request
+def record_metrics(response):
+    started = g.pop('request_started', None)
+    if started is not None:
+        # endpoint names keep the label set bounded, unlike raw paths
+        record_request(request.endpoint or 'not_found', response.status_code, time.perf_counter() - started)
+    return response
 
 @app.route('/')
 def home_page():
@@ -14,29 +50,51 @@ def predict_datapoint():
         return render_template('form.html')
     
     try:
-        data = get_data_as_dataframe(
-            carat=float(request.form.get('carat')),
-            depth=float(request.form.get('depth')),
-            table=float(request.form.get('table')),
-            x=float(request.form.get('x')),
-            y=float(request.form.get('y')),
-            z=float(request.form.get('z')),
-            cut=request.form.get('cut'),
-            color=request.form.get('color'),
-            clarity=request.form.get('clarity')
-        )
-
-        predict_pipe = PredictionPipeline()
-        preds = predict_pipe.predict(data)
+        data = parse_form(request.form)
+
+        preds = batcher.predict(data, timeout=predict_timeout)
         
         result = round(preds[0], 2)
         
         return render_template('result.html', final_result=result)
     
     except ValueError as e:
-        return render_template('form.html', error="Please enter valid numeric values for all fields.")
+        return render_template('form.html', error=form_error_message(e))
+    except FutureTimeoutError:
+        return render_template('form.html', error="The prediction timed out, please try again."), 504
     except Exception as e:
         return render_template('form.html', error=f"An error occurred: {str(e)}")
 
+@app.route('/api/v1/predict', methods=['POST'])
+def predict_batch():
+    try:
+        data = parse_json_payload(request.get_json(silent=True))
+    except (TypeError, ValueError) as e:
+        return jsonify(json_error_body(e)), 400
+
+    try:
+        preds = batcher.predict(data, timeout=predict_timeout)
+    except FutureTimeoutError:
+        return jsonify(error='Prediction timed out.'), 504
+    except Exception as e:
+        return jsonify(error=f"An error occurred: {str(e)}"), 500
+
+    return jsonify(predictions=format_predictions(preds))
+
+@app.route('/api/v1/cache/stats', methods=['GET'])
+def cache_stats():
+    if prediction_cache is None:
+        return jsonify(enabled=False)
+    return jsonify(enabled=True, **prediction_cache.stats())
+
+@app.route('/api/v1/drift', methods=['GET'])
+def drift():
+    reset = request.args.get('reset', '') not in ('', '0')
+    return jsonify(drift_report(predict_pipe.drift_monitor, reset=reset))
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    return Response(REGISTRY.render(), content_type=CONTENT_TYPE)
+
 if __name__ == "__main__":
     app.run(host="0.0.0.0", port=8000)
\ No newline at end of file
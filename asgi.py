@@ -0,0 +1,3 @@
+from src.pipeline.asgi_app import DiamondASGIApp
+
+app = DiamondASGIApp()
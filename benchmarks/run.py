@@ -0,0 +1,191 @@
+"""Latency/throughput benchmarks for the training and inference paths.
+
+    python -m benchmarks.run --rows 50000 --save-baseline benchmarks/baseline.json
+    python -m benchmarks.run --baseline benchmarks/baseline.json --threshold 0.2
+
+Everything runs in a throwaway workspace with synthetic data, so the real
+artifacts/ directory is never touched. With --baseline the exit code is 1
+when any case's median got slower than baseline * (1 + threshold).
+"""
+import argparse
+import contextlib
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+from benchmarks.synthetic import make_diamonds
+
+PREDICT_BATCH_SIZES = [1, 32, 1000, 100_000]
+
+
+def measure(fn, min_rounds=3, min_time=0.5, max_rounds=1000):
+  times = []
+  start = time.perf_counter()
+  while len(times) < min_rounds or (time.perf_counter() - start < min_time and len(times) < max_rounds):
+    t0 = time.perf_counter()
+    fn()
+    times.append(time.perf_counter() - t0)
+  times.sort()
+  return {
+    'rounds': len(times),
+    'median_s': statistics.median(times),
+    'min_s': times[0],
+    'p95_s': times[min(len(times) - 1, int(round(0.95 * (len(times) - 1))))]
+  }
+
+
+@contextlib.contextmanager
+def workspace(n_rows, seed=0):
+  """Temporary cwd holding artifacts/data.csv and params.yaml, like the repo root."""
+  params_path = os.path.abspath('params.yaml')
+  previous = os.getcwd()
+  tmpdir = tempfile.mkdtemp(prefix='diamond-bench-')
+  try:
+    os.makedirs(os.path.join(tmpdir, 'artifacts'))
+    make_diamonds(n_rows, seed).to_csv(os.path.join(tmpdir, 'artifacts', 'data.csv'), index=False)
+    if os.path.exists(params_path):
+      shutil.copy(params_path, os.path.join(tmpdir, 'params.yaml'))
+    os.chdir(tmpdir)
+    yield tmpdir
+  finally:
+    os.chdir(previous)
+    shutil.rmtree(tmpdir, ignore_errors=True)
+
+
+@contextlib.contextmanager
+def quiet():
+  with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+    yield
+
+
+def _ingestion_cases():
+  from src.components.data_ingestion import DataIngestion
+
+  def load(use_cache):
+    def run():
+      ingestion = DataIngestion()
+      ingestion.data_config.use_cache = use_cache
+      ingestion.load_data()
+    return run
+
+  load(True)()  # materialize the columnar cache
+  return {
+    'ingestion_load_csv': (load(False), {}),
+    'ingestion_load_cached': (load(True), {})
+  }
+
+
+def _training_cases():
+  from src.components.data_ingestion import DataIngestion
+  from src.components.data_transformation import DataTransform
+  from src.components.model_trainer import ModelTrainer
+
+  train, test = DataIngestion().initiate_data_ingestion()
+  transformed = DataTransform().initiate_data_transform(train, test)
+
+  def transform():
+    DataTransform().initiate_data_transform(train, test, test=True)
+
+  def trainer_fit():
+    ModelTrainer().initiate_model_trainer(*transformed, test=True)
+
+  # one real run so the prediction cases have artifacts to serve
+  ModelTrainer().initiate_model_trainer(*transformed)
+  return {
+    'transform_fit_transform': (transform, {}),
+    'trainer_fit': (trainer_fit, {'min_rounds': 1, 'min_time': 0})
+  }
+
+
+def _predict_cases():
+  from src.pipeline.prediction_pipeline import PredictionPipeline
+  from src.utils.utils import FEATURE_COLUMNS, get_data_as_dataframe, get_records_as_dataframe
+
+  pipeline = PredictionPipeline()
+  diamonds = make_diamonds(max(PREDICT_BATCH_SIZES), seed=1)[FEATURE_COLUMNS]
+  cases = {}
+  for batch_size in PREDICT_BATCH_SIZES:
+    records = diamonds.head(batch_size).to_dict('records')
+    if batch_size == 1:
+      def run(record=records[0]):
+        return pipeline.predict(get_data_as_dataframe(**record))
+    else:
+      def run(records=records):
+        return pipeline.predict(get_records_as_dataframe(records))
+    if run() is None:
+      raise RuntimeError("prediction benchmark could not load the trained artifacts")
+    cases[f'predict_batch_{batch_size}'] = (run, {'max_rounds': 200 if batch_size < 1000 else 20})
+  return cases
+
+
+def run_benchmarks(n_rows=50_000, only=None, min_time=0.5):
+  results = {}
+  with workspace(n_rows):
+    with quiet():
+      cases = {}
+      cases.update(_ingestion_cases())
+      cases.update(_training_cases())
+      cases.update(_predict_cases())
+    for name, (fn, options) in cases.items():
+      if only and name not in only:
+        continue
+      options = {'min_time': min_time, **options}
+      with quiet():
+        results[name] = measure(fn, **options)
+      print(f"{name:28s} median {results[name]['median_s'] * 1e3:10.3f} ms  ({results[name]['rounds']} rounds)")
+  return results
+
+
+def compare(results, baseline, threshold):
+  regressions = []
+  for name, result in results.items():
+    base = baseline.get('results', {}).get(name)
+    if base is None:
+      continue
+    ratio = result['median_s'] / base['median_s']
+    status = 'REGRESSION' if ratio > 1 + threshold else 'ok'
+    print(f"{name:28s} {ratio:6.2f}x baseline  {status}")
+    if status != 'ok':
+      regressions.append(name)
+  return regressions
+
+
+def main(argv=None):
+  parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+  parser.add_argument('--rows', type=int, default=50_000, help="synthetic training rows")
+  parser.add_argument('--cases', nargs='*', default=None, help="run only these cases")
+  parser.add_argument('--min-time', type=float, default=0.5, help="seconds to spend per case")
+  parser.add_argument('--output', default=None, help="write results JSON here")
+  parser.add_argument('--save-baseline', default=None, help="write results as a new baseline")
+  parser.add_argument('--baseline', default=None, help="compare against this baseline JSON")
+  parser.add_argument('--threshold', type=float, default=0.2, help="allowed slowdown before failing")
+  args = parser.parse_args(argv)
+
+  report = {
+    'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+    'python': platform.python_version(),
+    'machine': platform.platform(),
+    'rows': args.rows,
+    'results': run_benchmarks(args.rows, args.cases, args.min_time)
+  }
+  for path in (args.output, args.save_baseline):
+    if path:
+      with open(path, 'w') as f:
+        json.dump(report, f, indent=2)
+
+  if args.baseline:
+    with open(args.baseline) as f:
+      regressions = compare(report['results'], json.load(f), args.threshold)
+    if regressions:
+      print(f"Performance regressions: {', '.join(regressions)}")
+      return 1
+  return 0
+
+
+if __name__ == "__main__":
+  sys.exit(main())
@@ -0,0 +1,131 @@
+"""Cold-start benchmarks: import time of the entry modules and time to first prediction.
+
+    python -m benchmarks.startup --save-baseline benchmarks/startup_baseline.json
+    python -m benchmarks.startup --baseline benchmarks/startup_baseline.json --threshold 0.2
+
+Every round is a fresh interpreter. Import cases read the module's
+cumulative time from `python -X importtime` and list which heavy packages
+the import pulled in. first_prediction_* cases train on synthetic data in a
+throwaway workspace, then time importing serving, building the pipeline and
+scoring one row, with the booster loaded in the background or up front.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+from benchmarks.run import _training_cases, compare, quiet, workspace
+
+IMPORT_MODULES = [
+  'src.pipeline.prediction_pipeline',
+  'src.pipeline.serving',
+  'src.pipeline.asgi_app',
+  'src.pipeline.batch_scoring',
+  'src.components.model_trainer'
+]
+HEAVY_PACKAGES = ['sklearn', 'scipy', 'xgboost', 'mlflow', 'yaml']
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+FIRST_PREDICTION = """
+import time
+start = time.perf_counter()
+from src.pipeline.serving import create_prediction_pipeline
+from src.utils.utils import get_data_as_dataframe
+pipeline = create_prediction_pipeline()
+preds = pipeline.predict(get_data_as_dataframe(0.5, 61.0, 57.0, 5.1, 5.1, 3.1, 'Ideal', 'E', 'VS1'))
+print(time.perf_counter() - start)
+"""
+
+
+def _env(**extra):
+  env = dict(os.environ, **extra)
+  env['PYTHONPATH'] = os.pathsep.join(filter(None, [REPO_ROOT, env.get('PYTHONPATH')]))
+  return env
+
+
+def import_seconds(module):
+  """(cumulative import seconds, heavy packages loaded) in a fresh interpreter."""
+  code = f"import sys, {module}; print(','.join(p for p in {HEAVY_PACKAGES!r} if p in sys.modules))"
+  proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', code],
+                        capture_output=True, text=True, env=_env(), check=True)
+  cumulative = 0
+  for line in proc.stderr.splitlines():
+    parts = line.split('|')
+    if len(parts) == 3 and parts[2].strip() == module:
+      cumulative = max(cumulative, int(parts[1]))
+  return cumulative / 1e6, [p for p in proc.stdout.strip().split(',') if p]
+
+
+def first_prediction_seconds(defer_booster):
+  proc = subprocess.run([sys.executable, '-c', FIRST_PREDICTION], capture_output=True, text=True,
+                        env=_env(DEFER_BOOSTER_LOAD='1' if defer_booster else '0', DRIFT_MONITORING='0'),
+                        check=True)
+  return float(proc.stdout.strip().splitlines()[-1])
+
+
+def summarize(times):
+  times = sorted(times)
+  return {
+    'rounds': len(times),
+    'median_s': statistics.median(times),
+    'min_s': times[0],
+    'p95_s': times[min(len(times) - 1, int(round(0.95 * (len(times) - 1))))]
+  }
+
+
+def run_startup(rounds=5, rows=20_000, modules=None):
+  results = {}
+  for module in modules or IMPORT_MODULES:
+    samples = [import_seconds(module) for _ in range(rounds)]
+    results[f'import_{module}'] = {**summarize([s for s, _ in samples]), 'heavy_packages': samples[-1][1]}
+    result = results[f'import_{module}']
+    print(f"import {module:36s} median {result['median_s'] * 1e3:8.1f} ms  loads {result['heavy_packages']}")
+
+  with workspace(rows):
+    with quiet():
+      _training_cases()
+    for defer_booster in (True, False):
+      name = f"first_prediction_{'deferred' if defer_booster else 'eager'}"
+      results[name] = summarize([first_prediction_seconds(defer_booster) for _ in range(rounds)])
+      print(f"{name:43s} median {results[name]['median_s'] * 1e3:8.1f} ms")
+  return results
+
+
+def main(argv=None):
+  parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+  parser.add_argument('--rounds', type=int, default=5, help="fresh interpreters per case")
+  parser.add_argument('--rows', type=int, default=20_000, help="synthetic training rows")
+  parser.add_argument('--modules', nargs='*', default=None, help="time importing only these modules")
+  parser.add_argument('--output', default=None, help="write results JSON here")
+  parser.add_argument('--save-baseline', default=None, help="write results as a new baseline")
+  parser.add_argument('--baseline', default=None, help="compare against this baseline JSON")
+  parser.add_argument('--threshold', type=float, default=0.2, help="allowed slowdown before failing")
+  args = parser.parse_args(argv)
+
+  report = {
+    'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+    'python': platform.python_version(),
+    'machine': platform.platform(),
+    'rows': args.rows,
+    'results': run_startup(args.rounds, args.rows, args.modules)
+  }
+  for path in (args.output, args.save_baseline):
+    if path:
+      with open(path, 'w') as f:
+        json.dump(report, f, indent=2)
+
+  if args.baseline:
+    with open(args.baseline) as f:
+      regressions = compare(report['results'], json.load(f), args.threshold)
+    if regressions:
+      print(f"Startup regressions: {', '.join(regressions)}")
+      return 1
+  return 0
+
+
+if __name__ == "__main__":
+  sys.exit(main())
@@ -0,0 +1,33 @@
+import numpy as np
+import pandas as pd
+
+CUTS = ['Fair', 'Good', 'Very Good', 'Premium', 'Ideal']
+COLORS = ['D', 'E', 'F', 'G', 'H', 'I', 'J']
+CLARITIES = ['I1', 'SI2', 'SI1', 'VS2', 'VS1', 'VVS2', 'VVS1', 'IF']
+
+
+def make_diamonds(n_rows, seed=0):
+  """Synthetic diamonds with the same schema as artifacts/data.csv (id ... price)."""
+  rng = np.random.default_rng(seed)
+  carat = np.round(rng.gamma(2.5, 0.32, n_rows) + 0.2, 2)
+  x = np.round(carat ** (1 / 3) * 6.4 + rng.normal(0, 0.05, n_rows), 2)
+  y = np.round(x + rng.normal(0, 0.05, n_rows), 2)
+  z = np.round(x * 0.62, 2)
+  cut = rng.integers(0, len(CUTS), n_rows)
+  color = rng.integers(0, len(COLORS), n_rows)
+  clarity = rng.integers(0, len(CLARITIES), n_rows)
+  price = 3500 * carat ** 1.7 * (1 + 0.04 * cut) * (1 - 0.06 * color) * (1 + 0.08 * clarity)
+  price = np.clip(np.round(price + rng.normal(0, 150, n_rows)), 326, None).astype(int)
+  return pd.DataFrame({
+    'id': np.arange(n_rows),
+    'carat': carat,
+    'cut': np.array(CUTS)[cut],
+    'color': np.array(COLORS)[color],
+    'clarity': np.array(CLARITIES)[clarity],
+    'depth': np.round(rng.normal(61.8, 1.2, n_rows), 1),
+    'table': np.round(rng.normal(57.4, 2.0, n_rows)),
+    'x': x,
+    'y': y,
+    'z': z,
+    'price': price
+  })
@@ -0,0 +1,37 @@
+"""pytest-benchmark front end for the same cases as `python -m benchmarks.run`.
+
+    pytest benchmarks/ --benchmark-only --benchmark-autosave
+    pytest benchmarks/ --benchmark-only --benchmark-compare --benchmark-compare-fail=median:20%
+"""
+import pytest
+
+from benchmarks.run import (
+    PREDICT_BATCH_SIZES,
+    _ingestion_cases,
+    _predict_cases,
+    _training_cases,
+    quiet,
+    workspace
+)
+
+pytest.importorskip("pytest_benchmark")
+
+CASES = (
+    ['ingestion_load_csv', 'ingestion_load_cached', 'transform_fit_transform', 'trainer_fit']
+    + [f'predict_batch_{n}' for n in PREDICT_BATCH_SIZES]
+)
+
+
+@pytest.fixture(scope="module")
+def bench_cases():
+    with workspace(20_000):
+        with quiet():
+            cases = {**_ingestion_cases(), **_training_cases(), **_predict_cases()}
+        yield cases
+
+
+@pytest.mark.parametrize("case", CASES)
+def test_benchmark(benchmark, bench_cases, case):
+    fn, _ = bench_cases[case]
+    with quiet():
+        benchmark(fn)
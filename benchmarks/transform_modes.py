@@ -0,0 +1,87 @@
+"""A/B comparison of the scaled and tree-native transform modes.
+
+    python -m benchmarks.transform_modes --rows 50000 --output ab.json
+
+Both modes train the XGBRegressor from params.yaml on the same synthetic
+split; the report has test R2/RMSE, transform and fit time, and prediction
+latency through the sklearn preprocessor and through FastPreprocessor.
+"""
+import argparse
+import json
+import time
+
+import yaml
+
+from benchmarks.run import measure, quiet, workspace
+
+LATENCY_BATCH_SIZES = [1, 1000]
+
+
+def _run_mode(mode, min_time):
+  from src.components.data_ingestion import DataIngestion
+  from src.components.data_transformation import DataTransform
+  from src.components.fast_preprocessor import FastPreprocessor
+  from src.components.model_trainer import ModelTrainer
+  from src.utils.utils import FEATURE_COLUMNS, load_object, load_params
+
+  params = load_params()
+  params['transform'] = {'mode': mode}
+  params['evaluation'] = {**params.get('evaluation', {}), 'models': ['XGBRegressor'], 'n_jobs': 1}
+  with open('params.yaml', 'w') as f:
+    yaml.safe_dump(params, f)
+
+  with quiet():
+    train, test = DataIngestion().initiate_data_ingestion()
+    start = time.perf_counter()
+    X_train, X_test, y_train, y_test = DataTransform().initiate_data_transform(train, test)
+    transform_seconds = time.perf_counter() - start
+    ModelTrainer().initiate_model_trainer(X_train, X_test, y_train, y_test)
+
+  with open('artifacts/metrics.json') as f:
+    report = json.load(f)['models']['XGBRegressor']
+  model = load_object('artifacts/model.pkl')
+  preprocessor = load_object('artifacts/preprocessor.pkl')
+  fast = FastPreprocessor.from_column_transformer(preprocessor)
+
+  result = {
+    'r2': report['r2'],
+    'rmse': report['rmse'],
+    'transform_seconds': transform_seconds,
+    'fit_seconds': report['fit_seconds']
+  }
+  features = test[FEATURE_COLUMNS]
+  for batch_size in LATENCY_BATCH_SIZES:
+    batch = features.head(batch_size)
+    result[f'predict_{batch_size}_sklearn_ms'] = measure(
+      lambda: model.predict(preprocessor.transform(batch)), min_time=min_time)['median_s'] * 1e3
+    result[f'predict_{batch_size}_fast_ms'] = measure(
+      lambda: model.predict(fast.transform(batch)), min_time=min_time)['median_s'] * 1e3
+  return result
+
+
+def compare_modes(n_rows=50_000, min_time=0.5):
+  results = {}
+  with workspace(n_rows):
+    for mode in ('scaled', 'native'):
+      results[mode] = _run_mode(mode, min_time)
+  for key in results['scaled']:
+    print(f"{key:28s} scaled {results['scaled'][key]:12.4f}   native {results['native'][key]:12.4f}")
+  return results
+
+
+def main(argv=None):
+  parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+  parser.add_argument('--rows', type=int, default=50_000, help="synthetic training rows")
+  parser.add_argument('--min-time', type=float, default=0.5, help="seconds to spend per latency case")
+  parser.add_argument('--output', default=None, help="write results JSON here")
+  args = parser.parse_args(argv)
+
+  results = compare_modes(args.rows, args.min_time)
+  if args.output:
+    with open(args.output, 'w') as f:
+      json.dump(results, f, indent=2)
+  return 0
+
+
+if __name__ == "__main__":
+  raise SystemExit(main())
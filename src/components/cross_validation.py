@@ -0,0 +1,201 @@
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+# KFold, clone and DataTransform (which needs sklearn) are imported inside
+# the methods that use them; model_trainer imports this module
+from src.utils.utils import FEATURE_COLUMNS, _fit_and_score
+
+TARGET_COLUMN = 'price'
+
+
+@dataclass
+class CrossValidationConfig:
+  enabled: bool = False
+  n_splits: int = 5
+  n_jobs: int = -1
+  shuffle: bool = True
+  random_state: int = 42
+  # also run the folds one after another to measure the parallel speedup
+  benchmark_serial: bool = False
+  # the transformed folds are written here and memory-mapped by the workers
+  scratch_dir: str = os.path.join('artifacts', 'cache', 'cv')
+
+  @classmethod
+  def from_params(cls, params, **overrides):
+    settings = params.get('cross_validation', {}) or {}
+    fields = cls.__dataclass_fields__
+    return cls(**{**{key: value for key, value in settings.items() if key in fields}, **overrides})
+
+
+def as_float32(X):
+  """(float32 matrix, XGBoost feature_types) for either transform mode's output.
+
+  Scaled output is already one float32 block. Native output has pandas
+  categoricals, which become float32 codes with unknowns as NaN.
+  """
+  if not isinstance(X, pd.DataFrame):
+    return np.asarray(X, dtype=np.float32), None
+  columns, types = [], []
+  for col in X.columns:
+    if isinstance(X[col].dtype, pd.CategoricalDtype):
+      codes = X[col].cat.codes.to_numpy().astype(np.float32)
+      codes[codes < 0] = np.nan
+      columns.append(codes)
+      types.append('c')
+    else:
+      columns.append(X[col].to_numpy(dtype=np.float32))
+      types.append('q')
+  return np.column_stack(columns), (types if 'c' in types else None)
+
+
+_worker_data = None
+
+
+def _init_worker(X_path, y_path, n_train):
+  global _worker_data
+  # read-only maps: every worker sees the same page-cache copy of the folds
+  _worker_data = (np.load(X_path, mmap_mode='r'), np.load(y_path, mmap_mode='r'), n_train)
+
+
+def _fit_fold(name, model, fold, n_threads):
+  X, y, n_train = _worker_data
+  cut = n_train[fold]
+  # each fold is stored train rows first, so both sides are plain views
+  result = _fit_and_score(model, X[fold, :cut], X[fold, cut:], y[fold, :cut], y[fold, cut:],
+                          cpu_budget=n_threads, track_memory=False)
+  return {'model': name, 'fold': fold, **result}
+
+
+class CrossValidator:
+  """K-fold cross-validation of the candidate models on the raw training rows.
+
+  A fresh DataTransform preprocessor is fitted on each fold's training rows
+  only. The transformed folds go into one .npy file of shape
+  (n_splits, rows, features), ordered so that a fold's training and
+  validation rows are contiguous. Worker processes memory-map it, so no
+  data is pickled to them, and every (model, fold) pair runs as one task.
+  """
+
+  def __init__(self, config=None) -> None:
+    self.config = config or CrossValidationConfig()
+
+  def _workers(self, n_tasks):
+    cpus = os.cpu_count() or 1
+    n_jobs = cpus if self.config.n_jobs is None or self.config.n_jobs < 1 else self.config.n_jobs
+    workers = max(1, min(n_jobs, n_tasks, cpus))
+    # split the cores between processes so XGBoost threads don't oversubscribe
+    return workers, max(1, cpus // workers)
+
+  def write_folds(self, train_data, mode, directory):
+    """Fit a preprocessor per fold and write the transformed folds to memmapped .npy files."""
+    from sklearn.model_selection import KFold
+    from src.components.data_transformation import DataTransform
+    splitter = KFold(self.config.n_splits, shuffle=self.config.shuffle,
+                     random_state=self.config.random_state if self.config.shuffle else None)
+    features = train_data[FEATURE_COLUMNS]
+    target = train_data[TARGET_COLUMN].to_numpy(dtype=np.float64)
+    X_path, y_path = os.path.join(directory, 'X.npy'), os.path.join(directory, 'y.npy')
+    X, y, n_train, feature_types = None, None, [], None
+    for fold, (train_idx, val_idx) in enumerate(splitter.split(features)):
+      prep = DataTransform().get_preprocessor(mode)
+      X_fit, feature_types = as_float32(prep.fit_transform(features.iloc[train_idx]))
+      X_val, _ = as_float32(prep.transform(features.iloc[val_idx]))
+      if X is None:
+        shape = (self.config.n_splits, len(features), X_fit.shape[1])
+        X = np.lib.format.open_memmap(X_path, mode='w+', dtype=np.float32, shape=shape)
+        y = np.lib.format.open_memmap(y_path, mode='w+', dtype=np.float64, shape=shape[:2])
+      cut = len(train_idx)
+      X[fold, :cut], X[fold, cut:] = X_fit, X_val
+      y[fold, :cut], y[fold, cut:] = target[train_idx], target[val_idx]
+      n_train.append(cut)
+    X.flush()
+    y.flush()
+    del X, y
+    return X_path, y_path, n_train, feature_types
+
+  def _tasks(self, models, feature_types):
+    from sklearn.base import clone
+    for name, model in models.items():
+      for fold in range(self.config.n_splits):
+        task = clone(model)
+        if feature_types is not None:
+          task.set_params(feature_types=feature_types)
+        yield name, task, fold
+
+  def _run_parallel(self, tasks, fold_paths, workers, n_threads):
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=fold_paths) as executor:
+      futures = [executor.submit(_fit_fold, name, model, fold, n_threads) for name, model, fold in tasks]
+      return [f.result() for f in futures]
+
+  def _run_serial(self, tasks, fold_paths):
+    global _worker_data
+    _init_worker(*fold_paths)
+    try:
+      return [_fit_fold(name, model, fold, None) for name, model, fold in tasks]
+    finally:
+      _worker_data = None
+
+  def run(self, train_data, models, mode='scaled'):
+    """Score every model on every fold; returns the report with mean/std metrics per model."""
+    if self.config.n_splits < 2:
+      raise ValueError("cross_validation.n_splits must be at least 2")
+    os.makedirs(self.config.scratch_dir, exist_ok=True)
+    directory = tempfile.mkdtemp(dir=self.config.scratch_dir)
+    try:
+      start = time.perf_counter()
+      X_path, y_path, n_train, feature_types = self.write_folds(train_data, mode, directory)
+      prepare_seconds = time.perf_counter() - start
+      fold_paths = (X_path, y_path, n_train)
+
+      tasks = list(self._tasks(models, feature_types))
+      workers, n_threads = self._workers(len(tasks))
+      start = time.perf_counter()
+      if workers > 1:
+        results = self._run_parallel(tasks, fold_paths, workers, n_threads)
+      else:
+        results = self._run_serial(tasks, fold_paths)
+      wall_seconds = time.perf_counter() - start
+
+      serial_seconds = None
+      if self.config.benchmark_serial:
+        start = time.perf_counter()
+        self._run_serial(list(self._tasks(models, feature_types)), fold_paths)
+        serial_seconds = time.perf_counter() - start
+    finally:
+      shutil.rmtree(directory, ignore_errors=True)
+
+    report = {}
+    for name in models:
+      folds = sorted((r for r in results if r['model'] == name), key=lambda r: r['fold'])
+      r2 = np.array([r['r2'] for r in folds])
+      rmse = np.array([r['rmse'] for r in folds])
+      report[name] = {
+        'r2_mean': float(r2.mean()),
+        'r2_std': float(r2.std()),
+        'rmse_mean': float(rmse.mean()),
+        'rmse_std': float(rmse.std()),
+        'folds': [{key: r[key] for key in ('fold', 'r2', 'rmse', 'fit_seconds', 'predict_seconds')} for r in folds]
+      }
+    best = max(report, key=lambda name: report[name]['r2_mean'])
+    # summed task times of thread-limited workers only approximate a serial run
+    fold_seconds = sum(r['fit_seconds'] + r['predict_seconds'] for r in results)
+    return {
+      'n_splits': self.config.n_splits,
+      'workers': workers,
+      'threads_per_worker': n_threads if workers > 1 else None,
+      'prepare_seconds': prepare_seconds,
+      'wall_seconds': wall_seconds,
+      'serial_seconds': serial_seconds,
+      # measured against the serial run, so only with benchmark_serial
+      'speedup': serial_seconds / wall_seconds if serial_seconds is not None and wall_seconds > 0 else None,
+      'estimated_speedup': fold_seconds / wall_seconds if wall_seconds > 0 else None,
+      'best_model': best,
+      'models': report
+    }
@@ -1,24 +1,92 @@
 import pandas as pd
+import numpy as np
+import hashlib
 import os
+import re
 from dataclasses import dataclass
 from sklearn.model_selection import train_test_split
 
+NUMERIC_COLUMNS = ['carat', 'depth', 'table', 'x', 'y', 'z', 'price']
+CATEGORICAL_COLUMNS = ['cut', 'color', 'clarity']
+
 @dataclass
 class DataIngestionConfig:
     data_path: str = "artifacts/data.csv"
+    dvc_path: str = "artifacts/data.csv.dvc"
+    cache_dir: str = os.path.join("artifacts", "cache")
+    use_cache: bool = True
 
 class DataIngestion:
     def __init__(self) -> None:
         self.data_config = DataIngestionConfig()
 
+    def _dvc_md5(self):
+        # trust the DVC md5 only while data.csv still has the size DVC recorded
+        try:
+            with open(self.data_config.dvc_path) as f:
+                dvc_file = f.read()
+        except OSError:
+            return None
+        md5 = re.search(r"md5:\s*([0-9a-f]{32})", dvc_file)
+        size = re.search(r"size:\s*(\d+)", dvc_file)
+        if md5 and size and int(size.group(1)) == os.path.getsize(self.data_config.data_path):
+            return md5.group(1)
+        return None
+
+    def data_fingerprint(self):
+        md5 = self._dvc_md5()
+        if md5 is not None:
+            return md5
+        digest = hashlib.md5()
+        with open(self.data_config.data_path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+        return digest.hexdigest()
+
+    def _csv_options(self):
+        return {
+            'usecols': lambda col: col != 'id',
+            'dtype': {
+                **{col: np.float32 for col in NUMERIC_COLUMNS},
+                **{col: 'category' for col in CATEGORICAL_COLUMNS}
+            }
+        }
+
+    def read_csv(self):
+        return pd.read_csv(self.data_config.data_path, **self._csv_options())
+
+    def iter_chunks(self, chunk_size):
+        """Yield data.csv as typed frames of at most chunk_size rows, for out-of-core training."""
+        with pd.read_csv(self.data_config.data_path, chunksize=chunk_size, **self._csv_options()) as reader:
+            yield from reader
+
+    def load_data(self):
+        if not self.data_config.use_cache:
+            return self.read_csv()
+        try:
+            import pyarrow.feather as feather
+        except ImportError:
+            return self.read_csv()
+
+        cache_path = os.path.join(self.data_config.cache_dir, f"data-{self.data_fingerprint()}.feather")
+        if os.path.exists(cache_path):
+            # uncompressed Arrow IPC, so the columns are memory-mapped, not parsed
+            return feather.read_table(cache_path, memory_map=True).to_pandas()
+
+        data = self.read_csv()
+        os.makedirs(self.data_config.cache_dir, exist_ok=True)
+        tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+        feather.write_feather(data, tmp_path, compression='uncompressed')
+        os.replace(tmp_path, cache_path)
+        return data
+
     def initiate_data_ingestion(self):
         try:
             print("Data Ingestion Started")
-            data = pd.read_csv(self.data_config.data_path)
-            data = data.drop(columns=['id'])
+            data = self.load_data()
             train, test = train_test_split(data, test_size=0.25, random_state=42)
-            
-            
+
+
             return train, test
         except Exception as e:
-            print(e)
\ No newline at end of file
+            print(e)
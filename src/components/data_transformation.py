@@ -1,17 +1,53 @@
 import os
+import numpy as np
 import pandas as pd
 from dataclasses import dataclass
+from sklearn.base import BaseEstimator, TransformerMixin
 from sklearn.preprocessing import OrdinalEncoder, StandardScaler
 from sklearn.compose import  make_column_transformer
 from sklearn.impute import SimpleImputer
 from sklearn.pipeline import make_pipeline
-from src.utils.utils import save_object
+from src.utils.drift import profile_from_frame, save_profile
+from src.utils.utils import CAT_COLS, CATEGORIES, FEATURE_COLUMNS, NUM_COLS, load_params, save_object
+
+TRANSFORM_MODES = ('scaled', 'native')
 
 
 @dataclass
 class DataTransformConfig:
   file_path: str = os.path.join('artifacts', 'preprocessor.pkl') 
+  params_path: str = 'params.yaml'
+  # training feature distribution that serving compares live traffic against
+  reference_profile_path: str = os.path.join('artifacts', 'reference_profile.json')
+
+
+class NativeCategoricalTransformer(TransformerMixin, BaseEstimator):
+  """Raw float32 numerics plus pandas categoricals, for XGBoost's enable_categorical.
+
+  Nothing is imputed or scaled: XGBoost routes NaNs itself, and values
+  outside `categories` become missing categories.
+  """
+
+  def __init__(self, num_cols=None, cat_cols=None, categories=None) -> None:
+    self.num_cols = num_cols
+    self.cat_cols = cat_cols
+    self.categories = categories
+
+  def fit(self, X, y=None):
+    self.feature_names_in_ = np.asarray(list(self.num_cols) + list(self.cat_cols), dtype=object)
+    self.n_features_in_ = len(self.feature_names_in_)
+    return self
 
+  def transform(self, X):
+    columns = {col: X[col].to_numpy(dtype=np.float32) for col in self.num_cols}
+    for col, categories in zip(self.cat_cols, self.categories):
+      # code -1 (unknown or missing) is a missing category
+      codes = pd.Index(categories).get_indexer(np.asarray(X[col], dtype=object))
+      columns[col] = pd.Categorical.from_codes(codes, categories=categories)
+    return pd.DataFrame(columns, index=X.index)
+
+  def get_feature_names_out(self, input_features=None):
+    return self.feature_names_in_.copy()
 
 
 class DataTransform:
@@ -19,27 +55,39 @@ class DataTransform:
   def __init__(self) -> None:
     self.DataConfig = DataTransformConfig()
 
+  def transform_mode(self):
+    try:
+      mode = (load_params(self.DataConfig.params_path).get('transform') or {}).get('mode', 'scaled')
+    except OSError:
+      mode = 'scaled'
+    if mode not in TRANSFORM_MODES:
+      raise ValueError(f"transform.mode must be one of {TRANSFORM_MODES}, got {mode!r}")
+    return mode
+
+  def get_preprocessor(self, mode='scaled'):
+    if mode == 'native':
+      return NativeCategoricalTransformer(NUM_COLS, CAT_COLS, CATEGORIES)
+    return self.get_column_transformer()
+
   def get_column_transformer(self):
-    cat_cols = ['cut', 'color', 'clarity']
-    num_cols = ['carat', 'depth', 'table', 'x', 'y', 'z']
+    cat_cols = CAT_COLS
+    num_cols = NUM_COLS
 
     cat_pipeline = make_pipeline(
       SimpleImputer(strategy='most_frequent'),
-      OrdinalEncoder(categories=[
-          ['Fair', 'Good', 'Very Good', 'Premium', 'Ideal'],  # cut
-          ['D', 'E', 'F', 'G', 'H', 'I', 'J'],               # color
-          ['I1','SI2','SI1','VS2','VS1','VVS2','VVS1','IF']  # clarity
-        ],
+      OrdinalEncoder(categories=CATEGORIES,
         handle_unknown='use_encoded_value',
-        unknown_value=-1
+        unknown_value=-1,
+        dtype=np.float32
       ),
-      StandardScaler()
+      # the step before always hands over a fresh array, so scale it in place
+      StandardScaler(copy=False)
     )
 
 
     num_pipeline = make_pipeline(
       SimpleImputer(strategy='median'),
-      StandardScaler()
+      StandardScaler(copy=False)
     )
 
     preprocessor = make_column_transformer(
@@ -51,37 +99,38 @@ class DataTransform:
 
 
   def initiate_data_transform(self, train_data, test_data, test=False):
+    """Fit on train_data and return (X_train, X_test, y_train, y_test); inputs are not modified."""
     try:
 
-      cols = ['cut', 'color', 'clarity', 'carat', 'depth', 'table', 'x', 'y', 'z']
-      print(train_data.columns)
-      for col in cols:
+      for col in FEATURE_COLUMNS:
         if col not in train_data.columns:
-          raise Exception
+          raise Exception(f"missing column {col}")
 
-      print("Data transform Started")
-      prep_obj = self.get_column_transformer()
+      mode = self.transform_mode()
+      print(f"Data transform Started ({mode})")
+      prep_obj = self.get_preprocessor(mode)
 
       target_col = 'price'
-      y_train = train_data.pop(target_col)
-      y_test = test_data.pop(target_col)
-
-
-      X_train = pd.DataFrame(prep_obj.fit_transform(train_data), columns=prep_obj.get_feature_names_out())
-      X_test = pd.DataFrame(prep_obj.transform(test_data), columns=prep_obj.get_feature_names_out())
-
-      # train_processed = pd.concat([X_train.reset_index(drop=True), y_train.reset_index(drop=True)], axis=1)
-      # test_processed = pd.concat([X_test, y_test], axis=1)
+      y_train = train_data[target_col]
+      y_test = test_data[target_col]
+
+      # float32 numerics and float32 ordinal codes come out as one float32
+      # block, which the frames below wrap without copying
+      X_train = prep_obj.fit_transform(train_data[FEATURE_COLUMNS])
+      X_test = prep_obj.transform(test_data[FEATURE_COLUMNS])
+      if not isinstance(X_train, pd.DataFrame):
+        columns = prep_obj.get_feature_names_out()
+        X_train = pd.DataFrame(X_train, columns=columns, index=train_data.index, copy=False)
+        X_test = pd.DataFrame(X_test, columns=columns, index=test_data.index, copy=False)
 
       print(X_train.shape)
-      print(X_train.head(1))
-      print(X_test.head(1))
-      print(y_train.head(1))
-      print(y_test.head(1))
-      
 
       if not test:
         save_object(self.DataConfig.file_path, prep_obj)
+        save_profile(
+          profile_from_frame(train_data, NUM_COLS, CAT_COLS, CATEGORIES),
+          self.DataConfig.reference_profile_path
+        )
 
       return X_train, X_test, y_train, y_test
 
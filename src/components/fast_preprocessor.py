@@ -0,0 +1,211 @@
+import json
+import os
+import numpy as np
+import pandas as pd
+
+
+class FastPreprocessor:
+  """Flat NumPy version of the fitted DataTransform ColumnTransformer.
+
+  Holds the imputation fill values, the category -> code lookups and the
+  scaler mean/scale vectors, and applies them directly to a dict, a list of
+  dicts, a DataFrame or a 2-D array (columns in `input_columns` order).
+  Output matches ColumnTransformer.transform exactly, dtype included.
+  """
+
+  def __init__(self, num_cols, num_fill, num_mean, num_scale,
+               cat_cols, cat_fill, cat_lookup, cat_unknown, cat_mean, cat_scale, cat_dtype):
+    self.num_cols = list(num_cols)
+    self.num_fill = np.asarray([np.nan if v is None else v for v in num_fill], dtype=np.float64)
+    self.num_mean = np.asarray(num_mean, dtype=np.float64)
+    self.num_scale = np.asarray(num_scale, dtype=np.float64)
+    self.cat_cols = list(cat_cols)
+    self.cat_fill = list(cat_fill)
+    self.cat_lookup = [dict(lookup) for lookup in cat_lookup]
+    self.cat_unknown = float(cat_unknown)
+    self.cat_mean = np.asarray(cat_mean, dtype=np.float64)
+    self.cat_scale = np.asarray(cat_scale, dtype=np.float64)
+    self.cat_dtype = np.dtype(cat_dtype)
+    self.input_columns = self.num_cols + self.cat_cols
+
+  @classmethod
+  def from_native_transformer(cls, preprocessor):
+    """Raw numerics and category codes, unknown and missing values left as NaN."""
+    fast = cls(
+      num_cols=preprocessor.num_cols,
+      num_fill=[None] * len(preprocessor.num_cols),
+      num_mean=np.zeros(len(preprocessor.num_cols)),
+      num_scale=np.ones(len(preprocessor.num_cols)),
+      cat_cols=preprocessor.cat_cols,
+      cat_fill=[None] * len(preprocessor.cat_cols),
+      cat_lookup=[{category: code for code, category in enumerate(categories)}
+                  for categories in preprocessor.categories],
+      cat_unknown=np.nan,
+      cat_mean=np.zeros(len(preprocessor.cat_cols)),
+      cat_scale=np.ones(len(preprocessor.cat_cols)),
+      cat_dtype=np.float32
+    )
+    fast._check_against(preprocessor)
+    return fast
+
+  @classmethod
+  def from_column_transformer(cls, preprocessor):
+    # sklearn is only needed to compile, not to load or apply a saved spec
+    from src.components.data_transformation import NativeCategoricalTransformer
+    if isinstance(preprocessor, NativeCategoricalTransformer):
+      return cls.from_native_transformer(preprocessor)
+    num_spec, cat_spec = None, None
+    for name, transformer, cols in preprocessor.transformers_:
+      if name == 'remainder':
+        if transformer != 'drop':
+          raise TypeError("remainder must be 'drop' to compile the preprocessor")
+        continue
+      spec = _compile_pipeline(transformer, list(cols))
+      if spec['encoder'] is None and num_spec is None:
+        num_spec = spec
+      elif spec['encoder'] is not None and cat_spec is None and num_spec is not None:
+        cat_spec = spec
+      else:
+        raise TypeError("expected one numeric pipeline followed by one categorical pipeline")
+    if num_spec is None or cat_spec is None:
+      raise TypeError("expected one numeric pipeline followed by one categorical pipeline")
+
+    encoder = cat_spec['encoder']
+    fast = cls(
+      num_cols=num_spec['cols'],
+      num_fill=num_spec['fill'],
+      num_mean=num_spec['mean'],
+      num_scale=num_spec['scale'],
+      cat_cols=cat_spec['cols'],
+      cat_fill=cat_spec['fill'],
+      cat_lookup=[{category: code for code, category in enumerate(categories)}
+                  for categories in encoder.categories_],
+      cat_unknown=encoder.unknown_value if encoder.handle_unknown == 'use_encoded_value' else np.nan,
+      cat_mean=cat_spec['mean'],
+      cat_scale=cat_spec['scale'],
+      cat_dtype=encoder.dtype
+    )
+    fast._check_against(preprocessor)
+    return fast
+
+  def _check_against(self, preprocessor):
+    probe = {col: [value] for col, value in zip(self.num_cols, self.num_fill)}
+    for col, lookup, fill in zip(self.cat_cols, self.cat_lookup, self.cat_fill):
+      probe[col] = [next(iter(lookup)) if fill is None else fill]
+    probe = pd.DataFrame(probe)
+    expected = preprocessor.transform(probe)
+    actual = self.transform(probe)
+    if isinstance(expected, pd.DataFrame):
+      # categorical frame: XGBoost reads the same codes, missing categories as NaN
+      expected = np.column_stack([
+        np.where(expected[col].cat.codes < 0, np.nan, expected[col].cat.codes) if col in self.cat_cols
+        else expected[col].to_numpy(dtype=np.float64)
+        for col in self.input_columns
+      ]).astype(actual.dtype)
+    if expected.dtype != actual.dtype or not np.array_equal(expected, actual, equal_nan=True):
+      raise ValueError("compiled preprocessor does not reproduce the ColumnTransformer output")
+
+  def save(self, out_dir, suffix=''):
+    """Write the spec as a JSON file plus two .npy stat blocks; returns the file names."""
+    files = {
+      'spec': f'preprocessor{suffix}.json',
+      'num_stats': f'preprocessor_num{suffix}.npy',
+      'cat_stats': f'preprocessor_cat{suffix}.npy'
+    }
+    spec = {
+      'num_cols': self.num_cols,
+      'cat_cols': self.cat_cols,
+      'cat_fill': [None if fill is None else str(fill) for fill in self.cat_fill],
+      'cat_categories': [list(lookup) for lookup in self.cat_lookup],
+      'cat_unknown': self.cat_unknown,
+      'cat_dtype': self.cat_dtype.str
+    }
+    with open(os.path.join(out_dir, files['spec']), 'w') as f:
+      json.dump(spec, f, indent=2)
+    np.save(os.path.join(out_dir, files['num_stats']), np.vstack([self.num_fill, self.num_mean, self.num_scale]))
+    np.save(os.path.join(out_dir, files['cat_stats']), np.vstack([self.cat_mean, self.cat_scale]))
+    return files
+
+  @classmethod
+  def load(cls, out_dir, files, mmap=True):
+    with open(os.path.join(out_dir, files['spec'])) as f:
+      spec = json.load(f)
+    mmap_mode = 'r' if mmap else None
+    num_stats = np.load(os.path.join(out_dir, files['num_stats']), mmap_mode=mmap_mode)
+    cat_stats = np.load(os.path.join(out_dir, files['cat_stats']), mmap_mode=mmap_mode)
+    return cls(
+      num_cols=spec['num_cols'],
+      num_fill=num_stats[0],
+      num_mean=num_stats[1],
+      num_scale=num_stats[2],
+      cat_cols=spec['cat_cols'],
+      cat_fill=spec['cat_fill'],
+      cat_lookup=[{category: code for code, category in enumerate(categories)}
+                  for categories in spec['cat_categories']],
+      cat_unknown=spec['cat_unknown'],
+      cat_mean=cat_stats[0],
+      cat_scale=cat_stats[1],
+      cat_dtype=spec['cat_dtype']
+    )
+
+  def _columns(self, features):
+    if isinstance(features, dict):
+      if all(np.ndim(features[col]) == 1 for col in self.input_columns):
+        return [np.asarray(features[col]) for col in self.input_columns]
+      features = [features]
+    if isinstance(features, pd.DataFrame):
+      return [features[col].to_numpy() for col in self.input_columns]
+    if isinstance(features, (list, tuple)) and features and isinstance(features[0], dict):
+      return [np.array([record[col] for record in features], dtype=object) for col in self.input_columns]
+    array = np.asarray(features, dtype=object)
+    if array.ndim != 2 or array.shape[1] != len(self.input_columns):
+      raise ValueError(f"expected a 2-D array with columns {self.input_columns}")
+    return [array[:, i] for i in range(array.shape[1])]
+
+  def transform(self, features):
+    columns = self._columns(features)
+    n_num = len(self.num_cols)
+
+    # sklearn keeps all-float32 numeric input in float32, anything else is float64
+    num_dtype = np.float64
+    if all(np.asarray(col).dtype == np.float32 for col in columns[:n_num]):
+      num_dtype = np.float32
+    num = np.column_stack([np.asarray(col, dtype=num_dtype) for col in columns[:n_num]])
+    num = np.where(np.isnan(num), self.num_fill, num).astype(num_dtype, copy=False)
+    num = (num - self.num_mean).astype(num_dtype, copy=False)
+    num = (num / self.num_scale).astype(num_dtype, copy=False)
+
+    cat = np.empty((num.shape[0], len(self.cat_cols)), dtype=np.float64)
+    for j, (col, lookup, fill) in enumerate(zip(columns[n_num:], self.cat_lookup, self.cat_fill)):
+      cat[:, j] = [lookup.get(fill if value != value else value, self.cat_unknown) for value in col]
+    cat = cat.astype(self.cat_dtype, copy=False)
+    cat = (cat - self.cat_mean).astype(self.cat_dtype, copy=False)
+    cat = (cat / self.cat_scale).astype(self.cat_dtype, copy=False)
+
+    return np.hstack([num, cat])
+
+
+def _compile_pipeline(pipeline, cols):
+  from sklearn.impute import SimpleImputer
+  from sklearn.pipeline import Pipeline
+  from sklearn.preprocessing import OrdinalEncoder, StandardScaler
+  steps = [step for _, step in pipeline.steps] if isinstance(pipeline, Pipeline) else [pipeline]
+  spec = {'cols': cols, 'fill': [None] * len(cols), 'encoder': None,
+          'mean': np.zeros(len(cols)), 'scale': np.ones(len(cols))}
+  for step in steps:
+    if isinstance(step, SimpleImputer) and spec['encoder'] is None:
+      if step.strategy == 'constant' or step.add_indicator:
+        raise TypeError("only median/mean/most_frequent imputation without indicators can be compiled")
+      if not (isinstance(step.missing_values, float) and np.isnan(step.missing_values)):
+        raise TypeError("only NaN missing_values can be compiled")
+      spec['fill'] = list(step.statistics_)
+    elif isinstance(step, OrdinalEncoder) and spec['encoder'] is None:
+      spec['encoder'] = step
+    elif isinstance(step, StandardScaler):
+      if step.with_mean:
+        spec['mean'] = np.asarray(step.mean_, dtype=np.float64)
+      if step.with_std:
+        spec['scale'] = np.asarray(step.scale_, dtype=np.float64)
+    else:
+      raise TypeError(f"cannot compile {type(step).__name__} step")
+  return spec
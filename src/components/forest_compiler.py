@@ -0,0 +1,196 @@
+import json
+
+import numpy as np
+
+# objectives whose prediction is the raw margin
+IDENTITY_OBJECTIVES = ('reg:squarederror', 'reg:absoluteerror', 'reg:pseudohubererror')
+# a padded tree holds 2**depth leaves, so deeper forests stay on the booster
+MAX_DEPTH = 12
+
+
+class CompiledForest:
+  """XGBoost regression forest flattened into per-level NumPy arrays.
+
+  Every tree is padded to a complete binary tree of the forest's depth: a
+  leaf above the last level becomes a split that always goes left (a NaN
+  threshold with missing values going left, so even +inf stays left), and
+  its value moves to the leftmost leaf below it. Level `l` then holds
+  `n_trees * 2**l` nodes (feature, threshold, missing-goes-right flag,
+  categorical bitmask), and a batch walks all trees at once with
+  `index = 2 * index + went_right`. Categorical splits send the codes in
+  their bitmask right, as XGBoost does.
+  """
+
+  def __init__(self, features, thresholds, missing_right, category_masks, leaves,
+               base_score, n_features) -> None:
+    self.features = [np.asarray(a, dtype=np.intp) for a in features]
+    # forests exported with +inf padding thresholds sent x == +inf right; no real split uses +inf
+    self.thresholds = [np.where(np.isposinf(a), np.nan, a).astype(np.float32) for a in thresholds]
+    self.missing_right = [np.asarray(a, dtype=bool) for a in missing_right]
+    # 0 for numeric splits, otherwise the bitmask of category codes going right
+    self.category_masks = [np.asarray(a, dtype=np.uint64) for a in category_masks]
+    self.leaves = np.asarray(leaves, dtype=np.float32)
+    self.base_score = float(base_score)
+    self.n_features = int(n_features)
+    self.depth = len(self.features)
+    self.n_trees = len(self.leaves) >> self.depth
+    self.has_categorical = any(mask.any() for mask in self.category_masks)
+    self._level_offsets = [np.arange(self.n_trees, dtype=np.intp) << level for level in range(self.depth + 1)]
+
+  @classmethod
+  def from_booster(cls, booster):
+    model = json.loads(booster.save_raw('json'))
+    learner = model['learner']
+    objective = learner['objective']['name']
+    if objective not in IDENTITY_OBJECTIVES:
+      raise TypeError(f"cannot compile objective {objective}")
+    params = learner['learner_model_param']
+    if int(params.get('num_class', 0)) > 1 or int(params.get('num_target', 1)) > 1:
+      raise TypeError("only single-output regression forests can be compiled")
+    if learner['gradient_booster']['name'] != 'gbtree':
+      raise TypeError(f"cannot compile booster {learner['gradient_booster']['name']}")
+    trees = learner['gradient_booster']['model']['trees']
+    best_iteration = booster.attr('best_iteration')
+    if best_iteration is not None:
+      trees = trees[:int(best_iteration) + 1]
+
+    depth = max([_tree_depth(tree['left_children'], tree['right_children']) for tree in trees] or [0])
+    if depth > MAX_DEPTH:
+      raise TypeError(f"trees deeper than {MAX_DEPTH} levels are not compiled")
+    width = [1 << level for level in range(depth + 1)]
+    features = [np.zeros(len(trees) * width[l], dtype=np.intp) for l in range(depth)]
+    thresholds = [np.full(len(trees) * width[l], np.nan, dtype=np.float32) for l in range(depth)]
+    missing_right = [np.zeros(len(trees) * width[l], dtype=bool) for l in range(depth)]
+    category_masks = [np.zeros(len(trees) * width[l], dtype=np.uint64) for l in range(depth)]
+    leaves = np.zeros(len(trees) * width[depth], dtype=np.float32)
+
+    for t, tree in enumerate(trees):
+      left, right = tree['left_children'], tree['right_children']
+      masks = {}
+      for node, start, size in zip(tree['categories_nodes'], tree['categories_segments'], tree['categories_sizes']):
+        codes = tree['categories'][start:start + size]
+        if codes and max(codes) >= 64:
+          raise TypeError("categorical splits over more than 64 categories cannot be compiled")
+        masks[node] = sum(1 << code for code in codes)
+
+      stack = [(0, 0, 0)]  # (xgboost node id, level, index within the tree's level)
+      while stack:
+        node, level, index = stack.pop()
+        if left[node] == -1:
+          # a leaf's weight is stored in split_conditions; pad down the left edge
+          leaves[t * width[depth] + (index << (depth - level))] = tree['split_conditions'][node]
+          continue
+        slot = t * width[level] + index
+        features[level][slot] = tree['split_indices'][node]
+        missing_right[level][slot] = not tree['default_left'][node]
+        if tree['split_type'][node] == 1:
+          category_masks[level][slot] = masks.get(node, 0)
+          # category splits never use the threshold test
+          thresholds[level][slot] = np.nan
+        else:
+          thresholds[level][slot] = tree['split_conditions'][node]
+        stack.append((left[node], level + 1, 2 * index))
+        stack.append((right[node], level + 1, 2 * index + 1))
+
+    base_score = float(params['base_score'].strip('[]'))
+    return cls(features, thresholds, missing_right, category_masks, leaves, base_score, params['num_feature'])
+
+  def predict(self, X, block_size=1 << 18):
+    X = np.ascontiguousarray(X, dtype=np.float32)
+    if X.ndim != 2 or X.shape[1] != self.n_features:
+      raise ValueError(f"expected a 2-D array with {self.n_features} columns")
+    # bound the (rows, trees) index matrices to about block_size elements
+    rows_per_block = max(1, block_size // max(1, self.n_trees))
+    if len(X) <= rows_per_block:
+      return self._predict_block(X)
+    return np.concatenate([self._predict_block(X[i:i + rows_per_block])
+                           for i in range(0, len(X), rows_per_block)])
+
+  def _predict_block(self, X):
+    flat = X.ravel()
+    row_start = (np.arange(len(X), dtype=np.intp) * self.n_features)[:, None]
+    any_missing = bool(np.isnan(flat).any())
+    index = np.zeros((len(X), self.n_trees), dtype=np.intp)
+    for level in range(self.depth):
+      node = index + self._level_offsets[level]
+      x = flat[row_start + self.features[level][node]]
+      # padded leaves and category splits have a NaN threshold, so the test is False for any x
+      went_right = x >= self.thresholds[level][node]
+      if self.has_categorical:
+        mask = self.category_masks[level][node]
+        categorical = mask != 0
+        if categorical.any():
+          codes = np.where(categorical & (x >= 0) & (x < 64), x, 64).astype(np.uint64)
+          in_set = (codes < 64) & ((mask >> np.minimum(codes, np.uint64(63))) & np.uint64(1)).astype(bool)
+          went_right = np.where(categorical, in_set, went_right)
+      if any_missing:
+        missing = np.isnan(x)
+        went_right = np.where(missing, self.missing_right[level][node], went_right)
+      index = 2 * index + went_right
+    margin = self.leaves[index + self._level_offsets[self.depth]].sum(axis=1, dtype=np.float64)
+    return (margin + self.base_score).astype(np.float32)
+
+  def save(self, path):
+    arrays = {'leaves': self.leaves, 'meta': np.array([self.base_score, self.n_features], dtype=np.float64)}
+    for level in range(self.depth):
+      arrays[f'features_{level}'] = self.features[level]
+      arrays[f'thresholds_{level}'] = self.thresholds[level]
+      arrays[f'missing_right_{level}'] = self.missing_right[level]
+      arrays[f'category_masks_{level}'] = self.category_masks[level]
+    with open(path, 'wb') as f:
+      np.savez(f, **arrays)
+
+  @classmethod
+  def load(cls, path):
+    with np.load(path) as data:
+      depth = sum(1 for name in data.files if name.startswith('features_'))
+      base_score, n_features = data['meta']
+      return cls(
+        features=[data[f'features_{l}'] for l in range(depth)],
+        thresholds=[data[f'thresholds_{l}'] for l in range(depth)],
+        missing_right=[data[f'missing_right_{l}'] for l in range(depth)],
+        category_masks=[data[f'category_masks_{l}'] for l in range(depth)],
+        leaves=data['leaves'],
+        base_score=base_score,
+        n_features=int(n_features)
+      )
+
+  def probe(self, n_rows=512, seed=0):
+    """Rows built from the split thresholds (just below, at and just above) plus NaNs, to exercise both branches."""
+    rng = np.random.default_rng(seed)
+    X = np.zeros((n_rows, self.n_features), dtype=np.float32)
+    for feature in range(self.n_features):
+      numeric, codes = [], [0.0]
+      for level in range(self.depth):
+        used = self.features[level] == feature
+        numeric.append(self.thresholds[level][used & (self.category_masks[level] == 0)])
+        masks = self.category_masks[level][used & (self.category_masks[level] != 0)]
+        codes.extend(code for mask in masks for code in range(64) if int(mask) >> code & 1)
+      numeric = np.concatenate(numeric)
+      numeric = numeric[np.isfinite(numeric)]
+      candidates = np.concatenate([
+        numeric, np.nextafter(numeric, np.float32(-np.inf)), np.nextafter(numeric, np.float32(np.inf)),
+        np.asarray(codes, dtype=np.float32), np.asarray(codes, dtype=np.float32) + 1, [np.nan]
+      ])
+      X[:, feature] = rng.choice(candidates, size=n_rows)
+    return X
+
+  def verify(self, booster, X, rtol=1e-5, atol=1e-3):
+    """Raise ValueError unless predictions on X match booster.inplace_predict within tolerance."""
+    X = np.asarray(X, dtype=np.float32)
+    expected = booster.inplace_predict(X)
+    actual = self.predict(X)
+    if not np.allclose(actual, expected, rtol=rtol, atol=atol):
+      worst = float(np.max(np.abs(actual.astype(np.float64) - expected)))
+      raise ValueError(f"compiled forest differs from the booster by up to {worst}")
+    return True
+
+
+def _tree_depth(left, right):
+  depth, frontier = 0, [0]
+  while True:
+    children = [child for node in frontier for child in (left[node], right[node]) if child != -1]
+    if not children:
+      return depth
+    depth += 1
+    frontier = children
@@ -0,0 +1,138 @@
+import itertools
+import math
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+
+import numpy as np
+
+# sklearn and xgboost are imported where they are used, so importing the
+# trainer module stays cheap
+
+
+@dataclass
+class HyperparameterSearchConfig:
+  # parameter name -> list of candidate values, expanded as a grid
+  space: dict = field(default_factory=dict)
+  # fixed XGBRegressor params shared by every candidate
+  base_params: dict = field(default_factory=dict)
+  # sample this many grid points instead of trying them all (0 = full grid)
+  n_candidates: int = 0
+  # successive halving: first rung gets min_estimators trees, each rung
+  # multiplies the budget by eta and keeps the best 1/eta candidates
+  min_estimators: int = 50
+  max_estimators: int = 300
+  eta: int = 3
+  early_stopping_rounds: int = 20
+  validation_size: float = 0.2
+  n_jobs: int = -1
+  random_state: int = 42
+
+  @classmethod
+  def from_params(cls, params):
+    search = dict(params.get('search', {}))
+    model = dict(params.get('model', {}))
+    max_estimators = model.pop('n_estimators', cls.max_estimators)
+    search.pop('enabled', None)
+    return cls(base_params=model, max_estimators=max_estimators, **search)
+
+
+_worker_data = None
+
+
+def _init_worker(X_fit, y_fit, X_val, y_val):
+  global _worker_data
+  _worker_data = (X_fit, y_fit, X_val, y_val)
+
+
+def _fit_candidate(candidate_id, params, n_estimators, early_stopping_rounds, n_threads):
+  from sklearn.metrics import mean_squared_error, r2_score
+  from xgboost import XGBRegressor
+  X_fit, y_fit, X_val, y_val = _worker_data
+  model = XGBRegressor(
+    **params,
+    n_estimators=n_estimators,
+    early_stopping_rounds=early_stopping_rounds,
+    n_jobs=n_threads
+  )
+  start = time.perf_counter()
+  model.fit(X_fit, y_fit, eval_set=[(X_val, y_val)], verbose=False)
+  fit_seconds = time.perf_counter() - start
+  y_pred = model.predict(X_val)
+  return {
+    'candidate': candidate_id,
+    'params': params,
+    'n_estimators': n_estimators,
+    'best_iteration': int(model.best_iteration),
+    'val_r2': float(r2_score(y_val, y_pred)),
+    'val_rmse': float(np.sqrt(mean_squared_error(y_val, y_pred))),
+    'fit_seconds': fit_seconds
+  }
+
+
+class HyperparameterSearch:
+  def __init__(self, config) -> None:
+    self.config = config
+
+  def candidates(self):
+    names = sorted(self.config.space)
+    grid = [dict(zip(names, values)) for values in itertools.product(*(self.config.space[n] for n in names))]
+    if self.config.n_candidates and self.config.n_candidates < len(grid):
+      grid = random.Random(self.config.random_state).sample(grid, self.config.n_candidates)
+    return [{**self.config.base_params, **point} for point in grid]
+
+  def rungs(self, n_candidates):
+    config = self.config
+    n_rungs = 1
+    while n_candidates > 1 and config.min_estimators * config.eta ** n_rungs <= config.max_estimators:
+      n_candidates = math.ceil(n_candidates / config.eta)
+      n_rungs += 1
+    budgets = [config.min_estimators * config.eta ** k for k in range(n_rungs - 1)]
+    return budgets + [config.max_estimators]
+
+  def _workers(self, n_tasks):
+    cpus = os.cpu_count() or 1
+    n_jobs = cpus if self.config.n_jobs is None or self.config.n_jobs < 1 else self.config.n_jobs
+    workers = max(1, min(n_jobs, n_tasks, cpus))
+    # split the cores between processes so XGBoost threads don't oversubscribe
+    return workers, max(1, cpus // workers)
+
+  def run(self, X_train, y_train):
+    from sklearn.model_selection import train_test_split
+    config = self.config
+    X_fit, X_val, y_fit, y_val = train_test_split(
+      X_train, y_train, test_size=config.validation_size, random_state=config.random_state
+    )
+    alive = list(enumerate(self.candidates()))
+    if not alive:
+      raise ValueError("search space is empty")
+    workers, n_threads = self._workers(len(alive))
+
+    leaderboard = []
+    with ProcessPoolExecutor(
+      max_workers=workers,
+      initializer=_init_worker,
+      initargs=(X_fit, y_fit, X_val, y_val)
+    ) as executor:
+      for rung, budget in enumerate(self.rungs(len(alive))):
+        futures = [
+          executor.submit(_fit_candidate, cid, params, budget, config.early_stopping_rounds, n_threads)
+          for cid, params in alive
+        ]
+        results = sorted((f.result() for f in futures), key=lambda r: r['val_rmse'])
+        for result in results:
+          result['rung'] = rung
+        leaderboard.extend(results)
+        print(f"rung {rung}: {len(results)} candidates at {budget} trees, best val_rmse {results[0]['val_rmse']:.2f}")
+
+        keep = max(1, math.ceil(len(results) / config.eta))
+        survivors = {r['candidate'] for r in results[:keep]}
+        alive = [(cid, params) for cid, params in alive if cid in survivors]
+
+    final_rung = leaderboard[-len(results):]
+    best = final_rung[0]
+    best_params = {**best['params'], 'n_estimators': best['best_iteration'] + 1}
+    leaderboard.sort(key=lambda r: (-r['rung'], r['val_rmse']))
+    return best_params, leaderboard
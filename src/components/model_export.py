@@ -0,0 +1,197 @@
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass
+
+import numpy as np
+
+from src.components.fast_preprocessor import FastPreprocessor
+from src.components.forest_compiler import CompiledForest
+from src.utils.utils import file_digest
+
+MANIFEST_NAME = 'manifest.json'
+FORMAT_VERSION = 1
+
+
+@dataclass
+class ServingExportConfig:
+  serving_dir: str = os.path.join('artifacts', 'serving')
+
+
+class BoosterModel:
+  """Minimal predict() wrapper over a native XGBoost Booster.
+
+  `forest` is the CompiledForest exported next to the booster, if any;
+  callers pick it for small batches. A model made with deferred() reads
+  the booster, and imports xgboost, on a background thread; until then the
+  forest answers every batch, exactly but slower for large ones.
+  """
+
+  def __init__(self, booster, forest=None) -> None:
+    self._booster = booster
+    self.forest = forest
+    self._ready = threading.Event()
+    if booster is not None:
+      self._ready.set()
+
+  @classmethod
+  def deferred(cls, booster_path, forest):
+    model = cls(None, forest)
+    threading.Thread(target=model._load, args=(booster_path,), name='booster-load', daemon=True).start()
+    return model
+
+  def _load(self, booster_path):
+    try:
+      self._booster = read_booster(booster_path)
+    except Exception as e:
+      print(f"could not load booster {booster_path}: {e}")
+    finally:
+      self._ready.set()
+
+  @property
+  def booster(self):
+    self._ready.wait()
+    if self._booster is None:
+      raise RuntimeError("the booster failed to load")
+    return self._booster
+
+  def predict(self, X):
+    if self._booster is None and self.forest is not None:
+      return self.forest.predict(X)
+    # inplace_predict skips DMatrix construction
+    return self.booster.inplace_predict(np.asarray(X))
+
+
+def read_booster(path):
+  import xgboost as xgb
+  booster = xgb.Booster()
+  booster.load_model(path)
+  return booster
+
+
+def compile_forest(booster, sample=None):
+  """CompiledForest of the booster checked against it, or None when it can't be compiled exactly."""
+  try:
+    forest = CompiledForest.from_booster(booster)
+    forest.verify(booster, forest.probe())
+    if sample is not None:
+      forest.verify(booster, sample)
+    return forest
+  except (TypeError, ValueError) as e:
+    print(f"compiled forest unavailable: {e}")
+    return None
+
+
+def export_serving_artifacts(model, preprocessor, serving_dir, sample=None):
+  """Write the native booster, the compiled forest, the preprocessor sidecar and a manifest.
+
+  Payload files carry a content hash in their names, and the manifest is
+  swapped in last with os.replace, so a reader always sees a complete set.
+  `sample` (model-input rows) is checked on top of the forest's own probe.
+  """
+  import xgboost as xgb
+  booster = model.get_booster() if hasattr(model, 'get_booster') else model
+  if not isinstance(booster, xgb.Booster):
+    raise TypeError(f"serving format only supports XGBoost models, got {type(model).__name__}")
+  fast = FastPreprocessor.from_column_transformer(preprocessor)
+  forest = compile_forest(booster, None if sample is None else _model_matrix(sample))
+
+  os.makedirs(serving_dir, exist_ok=True)
+  tmp_model = os.path.join(serving_dir, f'model.{os.getpid()}.tmp.ubj')
+  booster.save_model(tmp_model)
+  model_hash = file_digest(tmp_model)
+  model_file = f'model-{model_hash[:12]}.ubj'
+  os.replace(tmp_model, os.path.join(serving_dir, model_file))
+
+  preprocessor_files = fast.save(serving_dir, suffix=f'.{os.getpid()}.tmp')
+  for key, tmp_name in list(preprocessor_files.items()):
+    digest = file_digest(os.path.join(serving_dir, tmp_name))
+    stem, ext = tmp_name.split('.', 1)[0], os.path.splitext(tmp_name)[1]
+    final_name = f'{stem}-{digest[:12]}{ext}'
+    os.replace(os.path.join(serving_dir, tmp_name), os.path.join(serving_dir, final_name))
+    preprocessor_files[key] = final_name
+
+  files = {'model': model_file, **{f'preprocessor_{k}': v for k, v in preprocessor_files.items()}}
+  if forest is not None:
+    tmp_forest = os.path.join(serving_dir, f'forest.{os.getpid()}.tmp.npz')
+    forest.save(tmp_forest)
+    files['forest'] = f'forest-{file_digest(tmp_forest)[:12]}.npz'
+    os.replace(tmp_forest, os.path.join(serving_dir, files['forest']))
+  manifest = {
+    'format_version': FORMAT_VERSION,
+    'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+    'xgboost_version': xgb.__version__,
+    'feature_order': fast.input_columns,
+    'model_features': booster.num_features(),
+    'files': files,
+    'sha256': {key: file_digest(os.path.join(serving_dir, name)) for key, name in files.items()}
+  }
+  tmp_manifest = os.path.join(serving_dir, f'{MANIFEST_NAME}.{os.getpid()}.tmp')
+  with open(tmp_manifest, 'w') as f:
+    json.dump(manifest, f, indent=2)
+  os.replace(tmp_manifest, os.path.join(serving_dir, MANIFEST_NAME))
+
+  _remove_unreferenced(serving_dir, set(files.values()) | {MANIFEST_NAME})
+  return manifest
+
+
+def _model_matrix(X):
+  # categorical columns become their codes, missing categories NaN, as XGBoost reads them
+  if hasattr(X, 'dtypes'):
+    return np.column_stack([
+      np.where(X[col].cat.codes < 0, np.nan, X[col].cat.codes) if hasattr(X[col], 'cat')
+      else X[col].to_numpy(dtype=np.float32)
+      for col in X.columns
+    ]).astype(np.float32)
+  return np.asarray(X, dtype=np.float32)
+
+
+def _remove_unreferenced(serving_dir, keep):
+  for name in os.listdir(serving_dir):
+    if name not in keep and '.tmp' not in name:
+      try:
+        os.remove(os.path.join(serving_dir, name))
+      except OSError:
+        # still memory-mapped by a running server (Windows); next export retries
+        pass
+
+
+def remove_serving_artifacts(serving_dir):
+  manifest_path = os.path.join(serving_dir, MANIFEST_NAME)
+  if os.path.exists(manifest_path):
+    os.remove(manifest_path)
+
+
+def read_manifest(serving_dir):
+  with open(os.path.join(serving_dir, MANIFEST_NAME)) as f:
+    return json.load(f)
+
+
+def load_serving_artifacts(serving_dir, manifest=None, verify=True, defer_booster=False):
+  """(BoosterModel, FastPreprocessor) from an exported serving directory.
+
+  With defer_booster and a compiled forest, the booster loads in the
+  background (see BoosterModel.deferred) and this returns without xgboost.
+  """
+  manifest = manifest or read_manifest(serving_dir)
+  if manifest.get('format_version') != FORMAT_VERSION:
+    raise ValueError(f"unsupported serving format version {manifest.get('format_version')}")
+  files = manifest['files']
+  if verify:
+    for key, name in files.items():
+      if file_digest(os.path.join(serving_dir, name)) != manifest['sha256'][key]:
+        raise ValueError(f"hash mismatch for {name}")
+
+  preprocessor = FastPreprocessor.load(serving_dir, {
+    'spec': files['preprocessor_spec'],
+    'num_stats': files['preprocessor_num_stats'],
+    'cat_stats': files['preprocessor_cat_stats']
+  })
+  if preprocessor.input_columns != manifest['feature_order']:
+    raise ValueError("preprocessor feature order does not match the manifest")
+  forest = CompiledForest.load(os.path.join(serving_dir, files['forest'])) if 'forest' in files else None
+  booster_path = os.path.join(serving_dir, files['model'])
+  if defer_booster and forest is not None:
+    return BoosterModel.deferred(booster_path, forest), preprocessor
+  return BoosterModel(read_booster(booster_path), forest), preprocessor
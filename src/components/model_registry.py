@@ -0,0 +1,258 @@
+import argparse
+import json
+import os
+import re
+import shutil
+import stat
+import tempfile
+import time
+from dataclasses import dataclass
+
+from src.components.model_export import MANIFEST_NAME, read_manifest
+from src.utils.utils import file_digest
+
+CURRENT_NAME = 'CURRENT'
+METADATA_NAME = 'metadata.json'
+# versions that deployments pin (MODEL_VERSION, SHADOW_MODEL_VERSION), one per line
+PINNED_NAME = 'PINNED'
+PROFILE_NAME = 'reference_profile.json'
+VERSION_PATTERN = re.compile(r'^(\d{4,})-[0-9a-f]{8}$')
+
+
+@dataclass
+class ModelRegistryConfig:
+  root: str = os.path.join('artifacts', 'registry')
+  # versions kept by prune(); the current and pinned ones are never removed
+  keep: int = 5
+
+
+class ModelRegistry:
+  """Local store of immutable model versions with an atomic CURRENT pointer.
+
+  Each version directory holds model.pkl, preprocessor.pkl, the serving
+  artifact, the drift reference profile and metadata.json (metrics,
+  params, data md5, file hashes). It
+  is written under a temporary name and renamed into versions/ complete,
+  then made read-only. CURRENT is a one-line file swapped with os.replace;
+  PINNED lists versions that prune() must keep because something serves them.
+  """
+
+  def __init__(self, config=None) -> None:
+    self.config = config or ModelRegistryConfig()
+    self.versions_dir = os.path.join(self.config.root, 'versions')
+
+  def versions(self):
+    if not os.path.isdir(self.versions_dir):
+      return []
+    names = [name for name in os.listdir(self.versions_dir) if VERSION_PATTERN.match(name)]
+    return sorted(names, key=lambda name: int(VERSION_PATTERN.match(name).group(1)))
+
+  def path(self, version):
+    return os.path.join(self.versions_dir, version)
+
+  def paths(self, version):
+    root = self.path(version)
+    return {
+      'model_path': os.path.join(root, 'model.pkl'),
+      'preprocessor_path': os.path.join(root, 'preprocessor.pkl'),
+      'serving_dir': os.path.join(root, 'serving'),
+      'reference_profile_path': os.path.join(root, PROFILE_NAME)
+    }
+
+  def metadata(self, version):
+    with open(os.path.join(self.path(version), METADATA_NAME)) as f:
+      return json.load(f)
+
+  def current(self):
+    try:
+      with open(os.path.join(self.config.root, CURRENT_NAME)) as f:
+        return f.read().strip() or None
+    except FileNotFoundError:
+      return None
+
+  def resolve(self, ref='current'):
+    """'current' follows the CURRENT pointer, 'latest' the newest version, anything else is a pinned version."""
+    if ref == 'current':
+      version = self.current()
+    elif ref == 'latest':
+      versions = self.versions()
+      version = versions[-1] if versions else None
+    else:
+      version = ref
+    if version is None or not os.path.isdir(self.path(version)):
+      raise LookupError(f"no model version for {ref!r} in {self.config.root}")
+    return version
+
+  def publish(self, model_path, preprocessor_path, serving_dir=None, metrics=None, params=None, data_md5=None,
+              reference_profile_path=None):
+    """Copy a training run's artifacts into a new immutable version and return its id; CURRENT is left alone.
+
+    When an existing version holds byte-identical artifacts (the serving manifest aside), that
+    version is returned instead.
+    """
+    os.makedirs(self.versions_dir, exist_ok=True)
+    staging = tempfile.mkdtemp(prefix='.staging-', dir=self.versions_dir)
+    try:
+      shutil.copy2(model_path, os.path.join(staging, 'model.pkl'))
+      shutil.copy2(preprocessor_path, os.path.join(staging, 'preprocessor.pkl'))
+      if reference_profile_path and os.path.exists(reference_profile_path):
+        shutil.copy2(reference_profile_path, os.path.join(staging, PROFILE_NAME))
+      if serving_dir and os.path.exists(os.path.join(serving_dir, MANIFEST_NAME)):
+        _copy_serving(serving_dir, os.path.join(staging, 'serving'))
+
+      files = {}
+      for dirpath, _, names in os.walk(staging):
+        for name in names:
+          path = os.path.join(dirpath, name)
+          files[os.path.relpath(path, staging).replace(os.sep, '/')] = file_digest(path)
+      content_hash = files['model.pkl'][:8]
+      existing = self._find_identical(content_hash, files)
+      if existing is not None:
+        shutil.rmtree(staging, ignore_errors=True)
+        return existing
+
+      # another publisher may take the number first, then the rename fails and we retry
+      for _ in range(100):
+        versions = self.versions()
+        number = int(VERSION_PATTERN.match(versions[-1]).group(1)) + 1 if versions else 1
+        version = f'{number:04d}-{content_hash}'
+        metadata = {
+          'version': version,
+          'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+          'metrics': metrics or {},
+          'params': params or {},
+          'data_md5': data_md5,
+          'files': files
+        }
+        with open(os.path.join(staging, METADATA_NAME), 'w') as f:
+          json.dump(metadata, f, indent=2)
+        try:
+          os.rename(staging, self.path(version))
+          break
+        except OSError:
+          if not os.path.exists(self.path(version)):
+            raise
+      else:
+        raise RuntimeError("could not allocate a model version number")
+    except BaseException:
+      shutil.rmtree(staging, ignore_errors=True)
+      raise
+
+    _make_read_only(self.path(version))
+    return version
+
+  def _write_pointer(self, name, lines):
+    os.makedirs(self.config.root, exist_ok=True)
+    tmp_path = os.path.join(self.config.root, f'{name}.{os.getpid()}.tmp')
+    with open(tmp_path, 'w') as f:
+      f.write(''.join(line + '\n' for line in lines))
+    os.replace(tmp_path, os.path.join(self.config.root, name))
+
+  def _find_identical(self, content_hash, files):
+    payload = _payload(files)
+    for version in reversed(self.versions()):
+      if version.endswith(f'-{content_hash}') and _payload(self.metadata(version).get('files') or {}) == payload:
+        return version
+    return None
+
+  def promote(self, version):
+    """Point CURRENT at an existing version atomically."""
+    self.resolve(version)
+    self._write_pointer(CURRENT_NAME, [version])
+
+  def pinned(self):
+    try:
+      with open(os.path.join(self.config.root, PINNED_NAME)) as f:
+        return sorted({line.strip() for line in f if line.strip()})
+    except FileNotFoundError:
+      return []
+
+  def pin(self, version):
+    """Protect a version from prune(), e.g. while MODEL_VERSION or SHADOW_MODEL_VERSION serves it."""
+    self.resolve(version)
+    self._write_pointer(PINNED_NAME, sorted(set(self.pinned()) | {version}))
+
+  def unpin(self, version):
+    self._write_pointer(PINNED_NAME, [pinned for pinned in self.pinned() if pinned != version])
+
+  def prune(self, keep=None):
+    """Delete all but the newest `keep` versions, never the current or a pinned one."""
+    keep = self.config.keep if keep is None else keep
+    versions = self.versions()
+    protected = {self.current(), *self.pinned()}
+    removed = []
+    for version in versions[:max(0, len(versions) - keep)]:
+      if version in protected:
+        continue
+      shutil.rmtree(self.path(version), onerror=_make_writable_and_retry)
+      removed.append(version)
+    return removed
+
+
+def _payload(files):
+  # the serving manifest records its export time, so only the files it points at are compared
+  return {name: digest for name, digest in files.items() if name != f'serving/{MANIFEST_NAME}'}
+
+
+def _copy_serving(source, target):
+  # only the files the manifest names, older exports may still sit next to them
+  manifest = read_manifest(source)
+  os.makedirs(target)
+  for name in list(manifest['files'].values()) + [MANIFEST_NAME]:
+    shutil.copy2(os.path.join(source, name), os.path.join(target, name))
+
+
+def _make_read_only(root):
+  for dirpath, _, names in os.walk(root):
+    for name in names:
+      path = os.path.join(dirpath, name)
+      os.chmod(path, os.stat(path).st_mode & ~(stat.S_IWUSR | stat.S_IWGRP | stat.S_IWOTH))
+
+
+def _make_writable_and_retry(func, path, _exc_info):
+  os.chmod(path, stat.S_IWUSR | stat.S_IRUSR)
+  func(path)
+
+
+def main(argv=None):
+  parser = argparse.ArgumentParser(description="Inspect and promote registered model versions.")
+  parser.add_argument('--root', default=ModelRegistryConfig.root)
+  commands = parser.add_subparsers(dest='command', required=True)
+  commands.add_parser('list', help="list versions, marking the current one")
+  show = commands.add_parser('show', help="print a version's metadata")
+  show.add_argument('version')
+  promote = commands.add_parser('promote', help="point CURRENT at a version")
+  promote.add_argument('version')
+  pin = commands.add_parser('pin', help="keep a version through prune")
+  pin.add_argument('version')
+  unpin = commands.add_parser('unpin', help="let prune delete a pinned version again")
+  unpin.add_argument('version')
+  prune = commands.add_parser('prune', help="delete old versions that are neither current nor pinned")
+  prune.add_argument('--keep', type=int, default=ModelRegistryConfig.keep)
+  args = parser.parse_args(argv)
+
+  registry = ModelRegistry(ModelRegistryConfig(root=args.root))
+  if args.command == 'list':
+    current, pinned = registry.current(), registry.pinned()
+    for version in registry.versions():
+      r2 = registry.metadata(version).get('metrics', {}).get('r2_score')
+      print(f"{'*' if version == current else ' '} {version}  r2={r2}{'  pinned' if version in pinned else ''}")
+  elif args.command == 'show':
+    print(json.dumps(registry.metadata(registry.resolve(args.version)), indent=2))
+  elif args.command == 'promote':
+    registry.promote(registry.resolve(args.version))
+    print(f"CURRENT -> {registry.current()}")
+  elif args.command == 'pin':
+    registry.pin(registry.resolve(args.version))
+    print(f"pinned {', '.join(registry.pinned())}")
+  elif args.command == 'unpin':
+    registry.unpin(args.version)
+    print(f"pinned {', '.join(registry.pinned()) or 'nothing'}")
+  elif args.command == 'prune':
+    for version in registry.prune(args.keep):
+      print(f"removed {version}")
+  return 0
+
+
+if __name__ == "__main__":
+  raise SystemExit(main())
@@ -3,38 +3,121 @@ import os
 import pandas as pd
 from dataclasses import dataclass
 
-from sklearn.pipeline import _name_estimators
-from src.utils.utils import evaluate_models
-from sklearn.tree import DecisionTreeRegressor
-from sklearn.linear_model import LinearRegression
-from xgboost import XGBRegressor
-from src.utils.utils import save_object
-import mlflow
+from src.utils.utils import evaluate_models_report
+from src.utils.utils import save_object, load_object, load_params
+from src.components.model_export import export_serving_artifacts, remove_serving_artifacts
+from src.components.hyperparameter_search import HyperparameterSearch, HyperparameterSearchConfig
+from src.components.cross_validation import CrossValidationConfig, CrossValidator
+from src.utils.tracking import create_tracker, flatten_params, log_eval_history, xgboost_callback
 
 
 @dataclass
 class ModelTrainerConfig:
   model_path: str = os.path.join('artifacts', 'model.pkl')
+  metrics_path: str = os.path.join('artifacts', 'metrics.json')
+  params_path: str = 'params.yaml'
+  preprocessor_path: str = os.path.join('artifacts', 'preprocessor.pkl')
+  serving_dir: str = os.path.join('artifacts', 'serving')
   # test_path: str = os.path.join('artifacts', 'test.csv')
 
+# XGBRegressor settings for DataTransform's tree-native (categorical) output
+NATIVE_CATEGORICAL_PARAMS = {'enable_categorical': True, 'tree_method': 'hist'}
+
+
+def _candidate_model(name, model_params):
+  # imported per candidate, so loading this module doesn't pull in every estimator
+  if name == 'LinearRegression':
+    from sklearn.linear_model import LinearRegression
+    return LinearRegression()
+  if name == 'DecisionTreeRegressor':
+    from sklearn.tree import DecisionTreeRegressor
+    return DecisionTreeRegressor()
+  if name == 'XGBRegressor':
+    from xgboost import XGBRegressor
+    return XGBRegressor(**model_params)
+  raise KeyError(name)
+
+
+def _has_categoricals(X):
+  return isinstance(X, pd.DataFrame) and any(isinstance(dtype, pd.CategoricalDtype) for dtype in X.dtypes)
+
+
 class ModelTrainer:
   def __init__(self) -> None:
     self.config = ModelTrainerConfig()
 
-  def initiate_model_trainer(self, X_train, X_test, y_train, y_test, test=False):
+  def initiate_model_trainer(self, X_train, X_test, y_train, y_test, test=False, train_data=None):
+    """Select, fit and save the best model.
+
+    With cross_validation.enabled and the raw `train_data` rows, the model
+    is picked on its k-fold mean R2 and only the winner is refit on X_train.
+    """
     print("Model Trainer Started")
+    tracker, status = None, 'FAILED'
     try:
-
-      models = {
-        # 'LinearRegression': LinearRegression(),
-        # 'DecisionTreeRegressor': DecisionTreeRegressor(),
-        'XGBRegressor': XGBRegressor(n_estimators= 300, 
-                                    learning_rate= 0.05, 
-                                    max_depth = 4)
-      }
-
-      model_report = evaluate_models(X_train, X_test, y_train, y_test,models)
-      print(model_report)
+      params = load_params(self.config.params_path)
+      model_params = params.get('model', {})
+      native = _has_categoricals(X_train)
+      if native:
+        model_params = {**model_params, **NATIVE_CATEGORICAL_PARAMS}
+        params = {**params, 'model': model_params}
+      if not test:
+        tracker = create_tracker(params, run_name='model_trainer',
+                                 tags={'transform_mode': 'native' if native else 'scaled'})
+
+      leaderboard = None
+      if params.get('search', {}).get('enabled', False):
+        search = HyperparameterSearch(HyperparameterSearchConfig.from_params(params))
+        model_params, leaderboard = search.run(X_train, y_train)
+        print(f"Best search params: {model_params}")
+
+      evaluation = params.get('evaluation', {})
+      names = evaluation.get('models', ['XGBRegressor'])
+      if native:
+        # the sklearn models need the scaled numeric encoding
+        skipped = [name for name in names if name != 'XGBRegressor']
+        if skipped:
+          print(f"Skipping {skipped} in native categorical mode")
+        names = ['XGBRegressor']
+      models = {name: _candidate_model(name, model_params) for name in names}
+
+      cv_report = None
+      cv_config = CrossValidationConfig.from_params(params)
+      if cv_config.enabled and train_data is not None:
+        cv_report = CrossValidator(cv_config).run(train_data, models, mode='native' if native else 'scaled')
+        best = cv_report['best_model']
+        speedup = f" ({cv_report['speedup']:.2f}x speedup)" if cv_report['speedup'] is not None else ''
+        print(f"Cross-validation best: {best}, R2 {cv_report['models'][best]['r2_mean']:.4f} "
+              f"+/- {cv_report['models'][best]['r2_std']:.4f}{speedup}")
+        models = {best: models[best]}
+        if tracker is not None:
+          for name, result in cv_report['models'].items():
+            tracker.log_metrics({f'{name}/cv_r2_mean': result['r2_mean'], f'{name}/cv_r2_std': result['r2_std']})
+
+      fit_params, callback_attached = {}, False
+      if tracker is not None:
+        tracker.log_params(flatten_params({'model': model_params, 'evaluation': evaluation}))
+        if 'XGBRegressor' in models:
+          fit_params['XGBRegressor'] = {'eval_set': [(X_test, y_test)], 'verbose': False}
+          # a callback can't cross into a worker process; those rounds are logged after the fit
+          if evaluation.get('executor', 'process') != 'process' or len(models) == 1 or evaluation.get('n_jobs', 1) == 1:
+            models['XGBRegressor'].set_params(callbacks=[xgboost_callback(tracker, prefix='XGBRegressor/')])
+            callback_attached = True
+
+      evaluation_report = evaluate_models_report(
+        X_train, X_test, y_train, y_test, models,
+        n_jobs=evaluation.get('n_jobs', 1),
+        executor=evaluation.get('executor', 'process'),
+        timeout=evaluation.get('timeout'),
+        fit_params=fit_params
+      )
+      if 'XGBRegressor' in fit_params and evaluation_report['XGBRegressor']['status'] == 'ok':
+        if not callback_attached:
+          log_eval_history(tracker, models['XGBRegressor'].evals_result(), prefix='XGBRegressor/')
+        # the callback holds the tracker, which must not be pickled with the model
+        models['XGBRegressor'].set_params(callbacks=None)
+      model_report = {name: r['r2'] for name, r in evaluation_report.items() if r['status'] == 'ok'}
+      print(evaluation_report)
 
       best_model_score = max(model_report.values())
       best_model_name = list(model_report.keys())[list(model_report.values()).index(best_model_score)]
@@ -42,30 +125,20 @@ class ModelTrainer:
       print(f'Best Model Found , Model Name : {best_model_name} , R2 Score : {best_model_score}')
 
       if not test:
-        # dagshub.init(repo_owner="AmrMohamed17", repo_name='gemflow-diamond-price-mlops', mlflow=True)
-        # mlflow.set_tracking_uri("https://dagshub.com/AmrMohamed17/gemflow-diamond-price-mlops.mlflow")
-        # mlflow.set_experiment("DiamondPricePred")
-        # with mlflow.start_run():
-        #   mlflow.log_params({
-        #     "n_estimators": 300,
-        #     "learning_rate": 0.05, 
-        #     "max_depth" : 4
-        #   })
-
-        #   # best_model = models[best_model_name]
-        #   # best_model.fit(X_train, y_train)
-
-        #   mlflow.log_metric("r2_score", best_model_score)
-
-        #   # mlflow.xgboost.log_model(models["XGBRegressor"], "model")
-
         metrics = {
             "r2_score": float(best_model_score),
-            "best_model": best_model_name
+            "best_model": best_model_name,
+            "transform_mode": "native" if native else "scaled"
         }
-
-        os.makedirs('artifacts', exist_ok=True)
-        with open('artifacts/metrics.json', 'w') as f:
+        metrics["models"] = evaluation_report
+        if leaderboard is not None:
+          metrics["best_params"] = model_params
+          metrics["leaderboard"] = leaderboard
+        if cv_report is not None:
+          metrics["cross_validation"] = cv_report
+
+        os.makedirs(os.path.dirname(self.config.metrics_path), exist_ok=True)
+        with open(self.config.metrics_path, 'w') as f:
             json.dump(metrics, f, indent=4)
 
         save_object(
@@ -73,5 +146,30 @@ class ModelTrainer:
           obj=models[best_model_name]
         )
 
+        try:
+          export_serving_artifacts(
+            models[best_model_name],
+            load_object(self.config.preprocessor_path),
+            self.config.serving_dir,
+            sample=X_test[:1000]
+          )
+        except Exception as e:
+          # never leave a stale serving artifact next to a newer pickle
+          remove_serving_artifacts(self.config.serving_dir)
+          print(f"Serving export skipped: {e}")
+
+        if tracker is not None:
+          tracker.set_tags({'best_model': best_model_name})
+          tracker.log_metric('r2_score', best_model_score)
+          for name, result in evaluation_report.items():
+            if result['status'] == 'ok':
+              tracker.log_metrics({f'{name}/{key}': result[key] for key in ('r2', 'rmse', 'fit_seconds')})
+          tracker.log_artifact(self.config.metrics_path)
+          tracker.log_artifact(self.config.model_path)
+      status = 'FINISHED'
+
     except Exception as e:
-      print(e)
\ No newline at end of file
+      print(e)
+    finally:
+      if tracker is not None:
+        tracker.close(status)
\ No newline at end of file
@@ -0,0 +1,272 @@
+import json
+import os
+from collections import Counter
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+from xgboost import XGBRegressor
+
+from src.components.data_ingestion import DataIngestion
+from src.components.data_transformation import CATEGORIES, DataTransform
+from src.components.fast_preprocessor import FastPreprocessor
+from src.components.model_export import export_serving_artifacts, remove_serving_artifacts
+from src.utils.drift import build_reference_profile, save_profile
+from src.utils.sketches import QuantileSketch, RunningMoments
+from src.utils.utils import FEATURE_COLUMNS, load_params, save_object
+
+TARGET_COLUMN = 'price'
+
+# XGBRegressor keyword -> native xgb.train parameter
+_NATIVE_PARAMS = {'n_jobs': 'nthread', 'random_state': 'seed'}
+
+
+@dataclass
+class StreamingTrainerConfig:
+  chunk_size: int = 100_000
+  test_fraction: float = 0.25
+  # exact medians up to this many rows per column, a uniform sample beyond
+  quantile_capacity: int = 100_000
+  max_bin: int = 256
+  # page the quantized training matrix to disk instead of holding it in RAM
+  external_memory: bool = False
+  cache_dir: str = os.path.join('artifacts', 'cache', 'xgb-external')
+  params_path: str = 'params.yaml'
+  model_path: str = os.path.join('artifacts', 'model.pkl')
+  preprocessor_path: str = os.path.join('artifacts', 'preprocessor.pkl')
+  metrics_path: str = os.path.join('artifacts', 'metrics.json')
+  serving_dir: str = os.path.join('artifacts', 'serving')
+  reference_profile_path: str = os.path.join('artifacts', 'reference_profile.json')
+
+  @classmethod
+  def from_params(cls, params, **overrides):
+    streaming = params.get('streaming', {}) or {}
+    fields = cls.__dataclass_fields__
+    return cls(**{key: value for key, value in streaming.items() if key in fields}, **overrides)
+
+
+def hash_split(frame, test_fraction):
+  """True for test rows, decided by a hash of the row content.
+
+  The assignment does not depend on chunking or row order, and duplicate
+  rows always land on the same side of the split.
+  """
+  hashes = pd.util.hash_pandas_object(frame[FEATURE_COLUMNS + [TARGET_COLUMN]], index=False).to_numpy()
+  return (hashes % np.uint64(1 << 32)) < np.uint64(int(test_fraction * (1 << 32)))
+
+
+class PreprocessorStats:
+  """One-pass statistics for DataTransform's ColumnTransformer.
+
+  Numeric columns keep running moments and a median sketch, categorical
+  columns keep exact value counts. Medians are only known at the end of the
+  pass, so the scaler statistics are derived afterwards by folding the
+  imputed values into the moments of the observed ones.
+  """
+
+  def __init__(self, num_cols, cat_cols, quantile_capacity=100_000) -> None:
+    self.num_cols = list(num_cols)
+    self.cat_cols = list(cat_cols)
+    self.rows = 0
+    self.moments = {col: RunningMoments() for col in self.num_cols}
+    self.sketches = {col: QuantileSketch(quantile_capacity, seed=i) for i, col in enumerate(self.num_cols)}
+    self.counts = {col: Counter() for col in self.cat_cols}
+
+  def update(self, frame):
+    self.rows += len(frame)
+    for col in self.num_cols:
+      values = frame[col].to_numpy(dtype=np.float64)
+      self.moments[col].update(values)
+      self.sketches[col].update(values)
+    for col in self.cat_cols:
+      self.counts[col].update(frame[col].value_counts(dropna=True).to_dict())
+
+  def _mode(self, col):
+    counts = self.counts[col]
+    top = max(counts.values())
+    # SimpleImputer(strategy='most_frequent') breaks ties with the smallest value
+    return min(value for value, count in counts.items() if count == top)
+
+  def reference_profile(self):
+    """Drift reference from the quantile sketches' samples and the exact category counts."""
+    numeric = {}
+    for col in self.num_cols:
+      sketch = self.sketches[col]
+      numeric[col] = (sketch.sample(), sketch.missing / max(1, sketch.count + sketch.missing))
+    categorical = {col: (vocabulary, self.counts[col]) for col, vocabulary in zip(self.cat_cols, CATEGORIES)}
+    return build_reference_profile(numeric, categorical, self.rows)
+
+  def build(self, sample):
+    """Fit DataTransform's ColumnTransformer on `sample`, then overwrite its stats with the stream's."""
+    preprocessor = DataTransform().get_column_transformer()
+    preprocessor.fit(sample)
+    for _, pipeline, cols in preprocessor.transformers_:
+      if pipeline == 'drop':
+        continue
+      imputer, scaler = pipeline.steps[0][1], pipeline.steps[-1][1]
+      if list(cols) == self.num_cols:
+        fills, moments = [], []
+        for col in self.num_cols:
+          median = self.sketches[col].median()
+          fills.append(median)
+          moments.append(self.moments[col].with_constant(median, self.sketches[col].missing))
+        imputer.statistics_ = np.asarray(fills, dtype=np.float64)
+      else:
+        encoder = pipeline.steps[1][1]
+        fills, moments = [], []
+        for col, categories in zip(cols, encoder.categories_):
+          mode = self._mode(col)
+          codes = {category: code for code, category in enumerate(categories)}
+          counts = Counter()
+          for value, count in self.counts[col].items():
+            counts[codes.get(value, encoder.unknown_value)] += count
+          counts[codes.get(mode, encoder.unknown_value)] += self.rows - sum(self.counts[col].values())
+          moment = RunningMoments()
+          for code, count in counts.items():
+            moment.merge(RunningMoments(count, float(code), 0.0))
+          fills.append(mode)
+          moments.append(moment)
+        imputer.statistics_ = np.asarray(fills, dtype=object)
+      _set_scaler(scaler, moments, self.rows)
+    return preprocessor
+
+
+def _set_scaler(scaler, moments, rows):
+  scaler.mean_ = np.array([m.mean for m in moments])
+  scaler.var_ = np.array([m.variance for m in moments])
+  # StandardScaler leaves constant columns unscaled
+  scaler.scale_ = np.where(scaler.var_ > 0, np.sqrt(scaler.var_), 1.0)
+  scaler.n_samples_seen_ = rows
+
+
+class _ChunkIter(xgb.DataIter):
+  """Feeds transformed chunks of one side of the split to XGBoost."""
+
+  def __init__(self, chunks, cache_prefix=None) -> None:
+    self._chunks = chunks
+    self._it = None
+    super().__init__(cache_prefix=cache_prefix)
+
+  def reset(self):
+    self._it = self._chunks()
+
+  def next(self, input_data):
+    if self._it is None:
+      self.reset()
+    chunk = next(self._it, None)
+    if chunk is None:
+      return False
+    X, y = chunk
+    input_data(data=X, label=y)
+    return True
+
+
+class StreamingTrainer:
+  """Train the XGBoost model from data.csv without loading it into memory.
+
+  Rows are assigned to train/test by hash, the preprocessor is fitted in a
+  single pass, and XGBoost builds its quantized matrix from chunked
+  iterators. The outputs are the same artifacts ModelTrainer writes.
+  """
+
+  def __init__(self, config=None, ingestion=None) -> None:
+    self.config = config or StreamingTrainerConfig()
+    self.ingestion = ingestion or DataIngestion()
+    self.reference_profile = None
+
+  def _split_chunks(self, test):
+    for chunk in self.ingestion.iter_chunks(self.config.chunk_size):
+      is_test = hash_split(chunk, self.config.test_fraction)
+      part = chunk[is_test if test else ~is_test]
+      if len(part):
+        yield part
+
+  def _transformed(self, fast, test):
+    def chunks():
+      for part in self._split_chunks(test):
+        yield fast.transform(part[fast.input_columns]), part[TARGET_COLUMN].to_numpy()
+    return chunks
+
+  def fit_preprocessor(self):
+    stats, sample = None, None
+    for part in self._split_chunks(test=False):
+      features = part[FEATURE_COLUMNS]
+      if stats is None:
+        preprocessor = DataTransform().get_column_transformer()
+        num_cols, cat_cols = [list(cols) for _, _, cols in preprocessor.transformers]
+        stats = PreprocessorStats(num_cols, cat_cols, self.config.quantile_capacity)
+        sample = features.head(1000)
+      stats.update(features)
+    if stats is None:
+      raise ValueError("no training rows after the hash split")
+    self.reference_profile = stats.reference_profile()
+    return stats.build(sample), stats.rows
+
+  def _training_matrix(self, fast):
+    if self.config.external_memory:
+      os.makedirs(self.config.cache_dir, exist_ok=True)
+      data_iter = _ChunkIter(self._transformed(fast, test=False), os.path.join(self.config.cache_dir, 'train'))
+      return xgb.ExtMemQuantileDMatrix(data_iter, max_bin=self.config.max_bin)
+    return xgb.QuantileDMatrix(_ChunkIter(self._transformed(fast, test=False)), max_bin=self.config.max_bin)
+
+  def evaluate(self, booster, fast):
+    n, sse, total, total_sq = 0, 0.0, 0.0, 0.0
+    for X, y in self._transformed(fast, test=True)():
+      y = y.astype(np.float64)
+      preds = booster.inplace_predict(X).astype(np.float64)
+      n += len(y)
+      sse += float(((y - preds) ** 2).sum())
+      total += float(y.sum())
+      total_sq += float((y ** 2).sum())
+    if n == 0:
+      raise ValueError("no test rows after the hash split")
+    sst = total_sq - total ** 2 / n
+    return {'r2': 1 - sse / sst, 'rmse': float(np.sqrt(sse / n)), 'rows': n}
+
+  def train(self):
+    print("Streaming training Started")
+    params = load_params(self.config.params_path)
+    model_params = dict(params.get('model', {}))
+
+    preprocessor, train_rows = self.fit_preprocessor()
+    fast = FastPreprocessor.from_column_transformer(preprocessor)
+
+    native = {_NATIVE_PARAMS.get(key, key): value for key, value in model_params.items() if key != 'n_estimators'}
+    native.setdefault('objective', 'reg:squarederror')
+    native['tree_method'] = 'hist'
+    native['max_bin'] = self.config.max_bin
+    booster = xgb.train(native, self._training_matrix(fast), num_boost_round=model_params.get('n_estimators', 100))
+
+    model = XGBRegressor(**model_params)
+    model.load_model(bytearray(booster.save_raw('ubj')))
+    report = self.evaluate(booster, fast)
+    print(f"Streaming model R2 Score : {report['r2']} ({train_rows} train / {report['rows']} test rows)")
+    return model, preprocessor, {**report, 'train_rows': train_rows}
+
+  def initiate_streaming_training(self):
+    try:
+      model, preprocessor, report = self.train()
+      save_object(self.config.preprocessor_path, preprocessor)
+      save_profile(self.reference_profile, self.config.reference_profile_path)
+      save_object(self.config.model_path, model)
+
+      metrics = {
+        "r2_score": float(report['r2']),
+        "best_model": "XGBRegressor",
+        "mode": "streaming",
+        "rmse": report['rmse'],
+        "rows": {"train": report['train_rows'], "test": report['rows']}
+      }
+      os.makedirs(os.path.dirname(self.config.metrics_path), exist_ok=True)
+      with open(self.config.metrics_path, 'w') as f:
+        json.dump(metrics, f, indent=4)
+
+      try:
+        export_serving_artifacts(model, preprocessor, self.config.serving_dir)
+      except Exception as e:
+        remove_serving_artifacts(self.config.serving_dir)
+        print(f"Serving export skipped: {e}")
+      return metrics
+    except Exception as e:
+      print(e)
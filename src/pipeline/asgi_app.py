@@ -0,0 +1,200 @@
+import asyncio
+import json
+import time
+from dataclasses import dataclass
+from urllib.parse import parse_qsl
+
+from jinja2 import Environment, FileSystemLoader, select_autoescape
+
+from src.pipeline.serving import (
+  InferencePool,
+  PoolOverloaded,
+  create_prediction_pipeline,
+  drift_report,
+  form_error_message,
+  format_predictions,
+  json_error_body,
+  parse_form,
+  parse_json_payload,
+  record_request
+)
+from src.utils.monitoring import CONTENT_TYPE, REGISTRY
+
+ROUTES = {'home_page': '/', 'predict_datapoint': '/predict'}
+# same route labels as the Flask endpoints in app.py
+ENDPOINTS = {
+  '/': 'home_page',
+  '/predict': 'predict_datapoint',
+  '/api/v1/predict': 'predict_batch',
+  '/api/v1/cache/stats': 'cache_stats',
+  '/api/v1/drift': 'drift',
+  '/metrics': 'metrics'
+}
+
+
+@dataclass
+class ASGIAppConfig:
+  templates_dir: str = 'templates'
+  # slow clients get 408 instead of holding a request open forever
+  body_timeout_seconds: float = 5.0
+  max_body_bytes: int = 10 * 2**20
+
+
+class DiamondASGIApp:
+  """Framework-free ASGI version of app.py (run with e.g. `uvicorn asgi:app`)."""
+
+  def __init__(self, pipeline=None, pool=None, config=None) -> None:
+    self.config = config or ASGIAppConfig()
+    self.pipeline = pipeline if pipeline is not None else create_prediction_pipeline()
+    self.pool = pool or InferencePool()
+    self.templates = Environment(
+      loader=FileSystemLoader(self.config.templates_dir),
+      autoescape=select_autoescape(['html'])
+    )
+    self.templates.globals['url_for'] = lambda endpoint, **_: ROUTES[endpoint]
+
+  async def __call__(self, scope, receive, send):
+    if scope['type'] == 'lifespan':
+      await self._lifespan(receive, send)
+      return
+    if scope['type'] != 'http':
+      return
+
+    started = time.perf_counter()
+    status = []
+
+    async def send_and_record(message):
+      if message['type'] == 'http.response.start':
+        status.append(message['status'])
+      await send(message)
+
+    try:
+      await self._dispatch(scope, receive, send_and_record)
+    finally:
+      endpoint = ENDPOINTS.get(scope['path'], 'not_found')
+      record_request(endpoint, status[0] if status else 500, time.perf_counter() - started)
+
+  async def _dispatch(self, scope, receive, send):
+    route = (scope['method'], scope['path'])
+    try:
+      if route == ('GET', '/'):
+        await self._html(send, 200, 'index.html')
+      elif route == ('GET', '/predict'):
+        await self._html(send, 200, 'form.html')
+      elif route == ('POST', '/predict'):
+        await self._predict_form(receive, send)
+      elif route == ('POST', '/api/v1/predict'):
+        await self._predict_json(receive, send)
+      elif route == ('GET', '/api/v1/cache/stats'):
+        cache = getattr(self.pipeline, 'cache', None)
+        stats = {'enabled': False} if cache is None else {'enabled': True, **cache.stats()}
+        await self._json(send, 200, stats)
+      elif route == ('GET', '/api/v1/drift'):
+        query = dict(parse_qsl(scope.get('query_string', b'').decode('latin-1')))
+        reset = query.get('reset', '') not in ('', '0')
+        monitor = getattr(self.pipeline, 'drift_monitor', None)
+        await self._json(send, 200, drift_report(monitor, reset=reset))
+      elif route == ('GET', '/metrics'):
+        await _respond(send, 200, REGISTRY.render().encode('utf-8'), CONTENT_TYPE.encode())
+      else:
+        await self._json(send, 404, {'error': 'Not found'})
+    except _BodyTimeout:
+      await self._json(send, 408, {'error': 'Timed out reading the request body.'})
+    except _BodyTooLarge:
+      await self._json(send, 413, {'error': 'Request body too large.'})
+
+  async def _lifespan(self, receive, send):
+    while True:
+      message = await receive()
+      if message['type'] == 'lifespan.startup':
+        await send({'type': 'lifespan.startup.complete'})
+      elif message['type'] == 'lifespan.shutdown':
+        self.pool.shutdown()
+        await send({'type': 'lifespan.shutdown.complete'})
+        return
+
+  async def _read_body(self, receive):
+    async def read():
+      chunks, size = [], 0
+      while True:
+        message = await receive()
+        chunk = message.get('body', b'')
+        size += len(chunk)
+        if size > self.config.max_body_bytes:
+          raise _BodyTooLarge()
+        chunks.append(chunk)
+        if not message.get('more_body', False):
+          return b''.join(chunks)
+    try:
+      return await asyncio.wait_for(read(), self.config.body_timeout_seconds)
+    except asyncio.TimeoutError:
+      raise _BodyTimeout()
+
+  async def _infer(self, data):
+    return await self.pool.run(self.pipeline.predict, data)
+
+  async def _predict_form(self, receive, send):
+    body = await self._read_body(receive)
+    form = dict(parse_qsl(body.decode('utf-8'), keep_blank_values=True))
+    try:
+      data = parse_form(form)
+    except (TypeError, ValueError) as e:
+      await self._html(send, 200, 'form.html', error=form_error_message(e))
+      return
+    try:
+      preds = await self._infer(data)
+    except PoolOverloaded:
+      await self._html(send, 503, 'form.html', error="The server is busy, please try again.",
+                       headers=[(b'retry-after', b'1')])
+      return
+    except asyncio.TimeoutError:
+      await self._html(send, 504, 'form.html', error="The prediction timed out, please try again.")
+      return
+    except Exception as e:
+      await self._html(send, 200, 'form.html', error=f"An error occurred: {str(e)}")
+      return
+    await self._html(send, 200, 'result.html', final_result=round(preds[0], 2))
+
+  async def _predict_json(self, receive, send):
+    body = await self._read_body(receive)
+    try:
+      data = parse_json_payload(json.loads(body or b'null'))
+    except (TypeError, ValueError) as e:
+      await self._json(send, 400, json_error_body(e))
+      return
+    try:
+      preds = await self._infer(data)
+    except PoolOverloaded:
+      await self._json(send, 503, {'error': 'Inference queue is full.'}, headers=[(b'retry-after', b'1')])
+      return
+    except asyncio.TimeoutError:
+      await self._json(send, 504, {'error': 'Prediction timed out.'})
+      return
+    except Exception as e:
+      await self._json(send, 500, {'error': f"An error occurred: {str(e)}"})
+      return
+    await self._json(send, 200, {'predictions': format_predictions(preds)})
+
+  async def _html(self, send, status, template, headers=(), **context):
+    body = self.templates.get_template(template).render(**context).encode('utf-8')
+    await _respond(send, status, body, b'text/html; charset=utf-8', headers)
+
+  async def _json(self, send, status, payload, headers=()):
+    await _respond(send, status, json.dumps(payload).encode('utf-8'), b'application/json', headers)
+
+
+class _BodyTimeout(Exception):
+  pass
+
+
+class _BodyTooLarge(Exception):
+  pass
+
+
+async def _respond(send, status, body, content_type, headers=()):
+  await send({
+    'type': 'http.response.start',
+    'status': status,
+    'headers': [(b'content-type', content_type), (b'content-length', str(len(body)).encode()), *headers]
+  })
+  await send({'type': 'http.response.body', 'body': body})
@@ -0,0 +1,201 @@
+import argparse
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.pipeline.prediction_pipeline import PredictionPipeline, PredictionPipelineConfig
+from src.pipeline.validation import DIAMOND_SCHEMA
+from src.utils.utils import CAT_COLS, NUM_COLS
+
+# read_csv infers dtypes per chunk, so an int column turns float in a chunk
+# with a missing value; pinning the model's inputs keeps every chunk alike
+CSV_DTYPES = {**{col: 'float64' for col in NUM_COLS}, **{col: object for col in CAT_COLS}}
+
+
+@dataclass
+class BatchScoringConfig:
+  chunk_size: int = 100_000
+  n_workers: int = 1
+  prediction_column: str = 'predicted_price'
+  # input columns copied next to the prediction; None keeps all of them
+  keep_columns: Optional[List[str]] = None
+  model_path: str = field(default_factory=lambda: PredictionPipelineConfig().model_path)
+  preprocessor_path: str = field(default_factory=lambda: PredictionPipelineConfig().preprocessor_path)
+  # None scores from the pickles only
+  serving_dir: Optional[str] = field(default_factory=lambda: PredictionPipelineConfig().serving_dir)
+  # rows failing the DiamondSchema checks get a NaN prediction instead of reaching the model
+  validate: bool = True
+
+
+def _file_format(path):
+  ext = os.path.splitext(path)[1].lower()
+  if ext in ('.parquet', '.pq'):
+    return 'parquet'
+  if ext == '.csv':
+    return 'csv'
+  raise ValueError(f"unsupported file type '{ext}', expected .csv or .parquet")
+
+
+def _import_parquet():
+  try:
+    import pyarrow
+    import pyarrow.parquet
+  except ImportError:
+    raise ImportError("Parquet support needs pyarrow: pip install -e '.[parquet]'")
+  return pyarrow, pyarrow.parquet
+
+
+def iter_chunks(path, chunk_size):
+  if _file_format(path) == 'csv':
+    yield from pd.read_csv(path, chunksize=chunk_size, dtype=CSV_DTYPES)
+  else:
+    _, pq = _import_parquet()
+    for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+      yield batch.to_pandas()
+
+
+class _ChunkWriter:
+  def __init__(self, path) -> None:
+    self.path = path
+    self.format = _file_format(path)
+    self._parquet_writer = None
+    self._schema = None
+    self._started = False
+
+  def write(self, frame):
+    if self.format == 'csv':
+      frame.to_csv(self.path, mode='a' if self._started else 'w', header=not self._started, index=False)
+    else:
+      pa, pq = _import_parquet()
+      table = pa.Table.from_pandas(frame, preserve_index=False)
+      if self._parquet_writer is None:
+        self._schema = table.schema
+        self._parquet_writer = pq.ParquetWriter(self.path, self._schema)
+      elif not table.schema.equals(self._schema):
+        # the first chunk fixed the file's schema, e.g. a later all-missing column arrives as null type
+        table = table.cast(self._schema)
+      self._parquet_writer.write_table(table)
+    self._started = True
+
+  def close(self):
+    if self._parquet_writer is not None:
+      self._parquet_writer.close()
+
+
+_worker_pipeline = None
+
+
+def _init_worker(model_path, preprocessor_path, serving_dir):
+  global _worker_pipeline
+  _worker_pipeline = PredictionPipeline(PredictionPipelineConfig(
+    model_path=model_path,
+    preprocessor_path=preprocessor_path,
+    serving_dir=serving_dir
+  ))
+
+
+def _score_chunk(chunk, prediction_column, keep_columns, validate=True):
+  features, valid = chunk, None
+  if validate:
+    result = DIAMOND_SCHEMA.validate(chunk)
+    features, valid = result.valid_frame, result.valid
+  preds = _worker_pipeline.predict(features) if len(features) else np.empty(0)
+  if valid is not None and not valid.all():
+    scored = np.full(len(chunk), np.nan)
+    scored[valid] = preds
+    preds = scored
+  out = chunk if keep_columns is None else chunk[keep_columns]
+  return out.assign(**{prediction_column: preds})
+
+
+class BatchScoring:
+  def __init__(self, config=None) -> None:
+    self.config = config or BatchScoringConfig()
+
+  def score(self, input_path, output_path):
+    config = self.config
+    writer = _ChunkWriter(output_path)
+    rows, chunks, invalid = 0, 0, 0
+    start = time.perf_counter()
+    try:
+      if config.n_workers <= 1:
+        _init_worker(config.model_path, config.preprocessor_path, config.serving_dir)
+        for chunk in iter_chunks(input_path, config.chunk_size):
+          scored = _score_chunk(chunk, config.prediction_column, config.keep_columns, config.validate)
+          writer.write(scored)
+          rows, chunks = rows + len(scored), chunks + 1
+          invalid += int(scored[config.prediction_column].isna().sum())
+      else:
+        # keep a bounded number of chunks in flight so memory stays flat
+        max_in_flight = 2 * config.n_workers
+        pending = deque()
+        with ProcessPoolExecutor(
+          max_workers=config.n_workers,
+          initializer=_init_worker,
+          initargs=(config.model_path, config.preprocessor_path, config.serving_dir)
+        ) as executor:
+          for chunk in iter_chunks(input_path, config.chunk_size):
+            pending.append(executor.submit(
+              _score_chunk, chunk, config.prediction_column, config.keep_columns, config.validate))
+            if len(pending) >= max_in_flight:
+              scored = pending.popleft().result()
+              writer.write(scored)
+              rows, chunks = rows + len(scored), chunks + 1
+              invalid += int(scored[config.prediction_column].isna().sum())
+          while pending:
+            scored = pending.popleft().result()
+            writer.write(scored)
+            rows, chunks = rows + len(scored), chunks + 1
+            invalid += int(scored[config.prediction_column].isna().sum())
+    finally:
+      writer.close()
+
+    elapsed = time.perf_counter() - start
+    return {'rows': rows, 'chunks': chunks, 'invalid_rows': invalid, 'seconds': elapsed}
+
+
+def main(argv=None):
+  parser = argparse.ArgumentParser(description="Offline diamond price scoring")
+  commands = parser.add_subparsers(dest='command', required=True)
+  score = commands.add_parser('score', help="stream a CSV/Parquet file through the model")
+  score.add_argument('input', help="input .csv or .parquet file")
+  score.add_argument('output', help="output .csv or .parquet file")
+  score.add_argument('--chunk-size', type=int, default=BatchScoringConfig.chunk_size)
+  score.add_argument('--workers', type=int, default=BatchScoringConfig.n_workers)
+  score.add_argument('--prediction-column', default=BatchScoringConfig.prediction_column)
+  score.add_argument('--keep-columns', nargs='*', default=None,
+                     help="input columns to copy to the output (default: all)")
+  score.add_argument('--model-path', default=PredictionPipelineConfig.model_path)
+  score.add_argument('--preprocessor-path', default=PredictionPipelineConfig.preprocessor_path)
+  score.add_argument('--serving-dir', default=PredictionPipelineConfig.serving_dir,
+                     help="serving-format artifacts, preferred over the pickles when present")
+  score.add_argument('--no-serving-format', action='store_true',
+                     help="always score from --model-path/--preprocessor-path")
+  score.add_argument('--no-validate', action='store_true',
+                     help="send every row to the model, even ones outside the input schema")
+  args = parser.parse_args(argv)
+
+  config = BatchScoringConfig(
+    chunk_size=args.chunk_size,
+    n_workers=args.workers,
+    prediction_column=args.prediction_column,
+    keep_columns=args.keep_columns,
+    model_path=args.model_path,
+    preprocessor_path=args.preprocessor_path,
+    serving_dir=None if args.no_serving_format else args.serving_dir,
+    validate=not args.no_validate
+  )
+  summary = BatchScoring(config).score(args.input, args.output)
+  print(f"Scored {summary['rows']} rows in {summary['chunks']} chunks "
+        f"({summary['seconds']:.2f}s, {summary['invalid_rows']} invalid) -> {args.output}")
+  return summary
+
+
+if __name__ == "__main__":
+  main()
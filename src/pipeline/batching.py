@@ -0,0 +1,109 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+
+@dataclass
+class MicroBatcherConfig:
+  # flush as soon as this many rows are queued ...
+  max_batch_size: int = 256
+  # ... or when the oldest queued request has waited this long
+  max_wait_ms: float = 5.0
+
+
+class MicroBatcher:
+  """Merges concurrent prediction requests into one vectorized call.
+
+  Each submit() enqueues a DataFrame and returns a Future. A single worker
+  thread drains the queue, concatenates everything that arrived within the
+  configured window, runs predict_fn once and hands each caller its slice.
+  If the merged call fails, each request is retried on its own, so one bad
+  request only fails its own caller.
+  """
+
+  def __init__(self, predict_fn, config=None) -> None:
+    self.predict_fn = predict_fn
+    self.config = config or MicroBatcherConfig()
+    self._queue = queue.Queue()
+    self._worker = None
+    self._start_lock = threading.Lock()
+    self._closed = False
+
+  def _ensure_worker(self):
+    if self._worker is not None:
+      return
+    with self._start_lock:
+      if self._worker is None:
+        self._worker = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+        self._worker.start()
+
+  def submit(self, features):
+    if self._closed:
+      raise RuntimeError("MicroBatcher is closed")
+    future = Future()
+    self._ensure_worker()
+    self._queue.put((features, future))
+    return future
+
+  def predict(self, features, timeout=None):
+    return self.submit(features).result(timeout=timeout)
+
+  def close(self):
+    self._closed = True
+    if self._worker is not None:
+      self._queue.put(None)
+      self._worker.join()
+
+  def _collect(self, first):
+    batch = [first]
+    rows = len(first[0])
+    deadline = time.monotonic() + self.config.max_wait_ms / 1000.0
+    while rows < self.config.max_batch_size:
+      remaining = deadline - time.monotonic()
+      if remaining <= 0:
+        break
+      try:
+        item = self._queue.get(timeout=remaining)
+      except queue.Empty:
+        break
+      if item is None:
+        self._queue.put(None)
+        break
+      batch.append(item)
+      rows += len(item[0])
+    return batch
+
+  def _predict_each(self, batch):
+    for features, future in batch:
+      try:
+        future.set_result(np.asarray(self.predict_fn(features)))
+      except Exception as e:
+        future.set_exception(e)
+
+  def _run(self):
+    while True:
+      item = self._queue.get()
+      if item is None:
+        return
+      batch = self._collect(item)
+      frames = [features for features, _ in batch]
+      futures = [future for _, future in batch]
+      try:
+        merged = frames[0] if len(frames) == 1 else pd.concat(frames, ignore_index=True)
+        preds = np.asarray(self.predict_fn(merged))
+      except Exception as e:
+        if len(batch) == 1:
+          futures[0].set_exception(e)
+        else:
+          self._predict_each(batch)
+        continue
+
+      offset = 0
+      for features, future in batch:
+        future.set_result(preds[offset:offset + len(features)])
+        offset += len(features)
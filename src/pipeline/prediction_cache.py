@@ -0,0 +1,173 @@
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from src.utils.utils import FEATURE_COLUMNS
+
+NUMERIC_FEATURES = FEATURE_COLUMNS[:6]
+
+
+@dataclass
+class PredictionCacheConfig:
+  max_entries: int = 100_000
+  # None keeps entries until they are evicted or the model changes
+  ttl_seconds: Optional[float] = 3600.0
+  # round numeric features before keying; None keys on the exact value
+  decimals: Optional[int] = None
+
+
+class CacheBackend(ABC):
+  """Interface of an optional shared second tier (e.g. a Redis client wrapper)."""
+
+  @abstractmethod
+  def get_many(self, keys):
+    """Values for `keys` in order, None for each key that is missing or expired."""
+
+  @abstractmethod
+  def set_many(self, items, ttl_seconds=None):
+    """Store (key, value) pairs, expiring after `ttl_seconds` unless it is None."""
+
+  @abstractmethod
+  def clear(self):
+    """Drop every entry."""
+
+
+class InMemorySharedBackend(CacheBackend):
+  """Local stand-in for a shared key/value store with per-key expiry."""
+
+  def __init__(self) -> None:
+    self._data = {}
+    self._lock = threading.Lock()
+
+  def get_many(self, keys):
+    now = time.monotonic()
+    with self._lock:
+      values = []
+      for key in keys:
+        item = self._data.get(key)
+        if item is not None and item[1] is not None and item[1] <= now:
+          del self._data[key]
+          item = None
+        values.append(None if item is None else item[0])
+      return values
+
+  def set_many(self, items, ttl_seconds=None):
+    expires = None if ttl_seconds is None else time.monotonic() + ttl_seconds
+    with self._lock:
+      for key, value in items:
+        self._data[key] = (value, expires)
+
+  def clear(self):
+    with self._lock:
+      self._data.clear()
+
+
+class PredictionCache:
+  """Bounded LRU/TTL cache of predictions keyed on (model version, features)."""
+
+  def __init__(self, config=None, backend=None) -> None:
+    self.config = config or PredictionCacheConfig()
+    self.backend = backend
+    self._entries = OrderedDict()
+    self._lock = threading.Lock()
+    self._version = None
+    self.hits = 0
+    self.shared_hits = 0
+    self.misses = 0
+    self.evictions = 0
+    self.expirations = 0
+
+  def keys_for(self, features, version):
+    # NaN != NaN would make a row with a missing value miss its own key, so missing values key as None
+    columns = []
+    for col in FEATURE_COLUMNS:
+      if col in NUMERIC_FEATURES:
+        values = features[col].to_numpy(dtype=np.float64, na_value=np.nan)
+        if self.config.decimals is not None:
+          values = values.round(self.config.decimals)
+        values = [None if v != v else v for v in values.tolist()]
+      else:
+        values = [v.strip() if isinstance(v, str) else (None if pd.isna(v) else v) for v in features[col].tolist()]
+      columns.append(values)
+    return [(version,) + row for row in zip(*columns)]
+
+  def _observe_version(self, version):
+    # a new model makes every old key unreachable; drop them to free memory
+    if version != self._version:
+      self._entries.clear()
+      self._version = version
+
+  def get_many(self, keys, version):
+    now = time.monotonic()
+    results = []
+    with self._lock:
+      self._observe_version(version)
+      for key in keys:
+        item = self._entries.get(key)
+        if item is not None and item[1] is not None and item[1] <= now:
+          del self._entries[key]
+          self.expirations += 1
+          item = None
+        if item is None:
+          results.append(None)
+        else:
+          self._entries.move_to_end(key)
+          self.hits += 1
+          results.append(item[0])
+
+    missing = [i for i, value in enumerate(results) if value is None]
+    if missing and self.backend is not None:
+      shared = self.backend.get_many([keys[i] for i in missing])
+      found = [(keys[i], value) for i, value in zip(missing, shared) if value is not None]
+      for i, value in zip(missing, shared):
+        if value is not None:
+          results[i] = value
+      if found:
+        self._set_local(found, version)
+        with self._lock:
+          self.shared_hits += len(found)
+    with self._lock:
+      self.misses += sum(value is None for value in results)
+    return results
+
+  def _set_local(self, items, version):
+    ttl = self.config.ttl_seconds
+    expires = None if ttl is None else time.monotonic() + ttl
+    with self._lock:
+      self._observe_version(version)
+      for key, value in items:
+        self._entries[key] = (value, expires)
+        self._entries.move_to_end(key)
+      while len(self._entries) > self.config.max_entries:
+        self._entries.popitem(last=False)
+        self.evictions += 1
+
+  def set_many(self, items, version):
+    self._set_local(items, version)
+    if self.backend is not None:
+      self.backend.set_many(items, self.config.ttl_seconds)
+
+  def clear(self):
+    with self._lock:
+      self._entries.clear()
+    if self.backend is not None:
+      self.backend.clear()
+
+  def stats(self):
+    with self._lock:
+      return {
+        'size': len(self._entries),
+        'max_entries': self.config.max_entries,
+        'hits': self.hits,
+        'shared_hits': self.shared_hits,
+        'misses': self.misses,
+        'evictions': self.evictions,
+        'expirations': self.expirations,
+        'model_version': self._version
+      }
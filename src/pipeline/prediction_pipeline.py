@@ -1,22 +1,412 @@
 import os
-from src.utils.utils import load_object
-from dataclasses import dataclass
+import hashlib
+import threading
+import time
+import numpy as np
+import pandas as pd
+from src.components.fast_preprocessor import FastPreprocessor
+from src.components.model_export import MANIFEST_NAME, compile_forest, load_serving_artifacts, read_manifest
+from src.components.model_registry import ModelRegistry, ModelRegistryConfig
+from src.utils.drift import load_profile
+from src.utils.monitoring import BATCH_SIZE, ERRORS, MODEL_INFO, MODEL_LOAD_SECONDS, timed
+from src.utils.utils import file_digest, load_object
+from dataclasses import dataclass, field, replace
+from typing import Optional
 
 @dataclass
 class PredictionPipelineConfig:
   model_path: str = os.path.join('artifacts', 'model.pkl')
   preprocessor_path: str = os.path.join('artifacts', 'preprocessor.pkl')
+  # native booster + NumPy sidecar written by ModelTrainer; preferred over the
+  # pickles when its manifest exists, None disables it
+  serving_dir: Optional[str] = os.path.join('artifacts', 'serving')
+  # seconds between stat() checks of the artifacts for hot-reload
+  reload_check_interval: float = 1.0
+  # serve through the compiled NumPy preprocessor when it can be built
+  use_fast_preprocessor: bool = True
+  # batches up to this many rows go through the compiled NumPy forest,
+  # which beats XGBoost's per-call overhead there; 0 disables it
+  forest_max_rows: int = 16
+  # read the booster (and import xgboost) in the background and answer from
+  # the compiled forest meanwhile, so a cold worker serves right away
+  defer_booster: bool = False
+  # serve from a ModelRegistry root instead of the paths above (MODEL_REGISTRY_DIR)
+  registry_dir: Optional[str] = field(default_factory=lambda: os.environ.get('MODEL_REGISTRY_DIR') or None)
+  # 'current' follows the CURRENT pointer, 'latest' the newest version,
+  # anything else pins that version (MODEL_VERSION)
+  model_version: str = field(default_factory=lambda: os.environ.get('MODEL_VERSION') or 'current')
+  # prepended to the stage metric labels; a shadow model uses 'shadow_' so
+  # its work is not counted as serving latency
+  stage_prefix: str = ''
+  # training reference profile loaded with the artifacts for drift monitoring;
+  # registry versions use their own copy unless DRIFT_PROFILE_PATH overrides it
+  reference_profile_path: Optional[str] = os.path.join('artifacts', 'reference_profile.json')
+  drift_profile_override: Optional[str] = field(default_factory=lambda: os.environ.get('DRIFT_PROFILE_PATH') or None)
+
+
+@dataclass(frozen=True)
+class LoadedArtifacts:
+  model: object
+  preprocessor: object
+  version: str
+  fast_preprocessor: object = None
+  forest: object = None
+  # drift reference profile of the training run, None when it has none
+  reference_profile: Optional[dict] = None
+  # Unix time the pair was loaded, for the model info gauge
+  loaded_at: float = 0.0
+
+
+class ArtifactStore:
+  """Process-wide holder of the loaded model/preprocessor pair.
+
+  The pair is loaded once and swapped atomically when the files on disk
+  change. Callers keep a reference to the LoadedArtifacts they got, so a
+  reload never disturbs predictions that are already in flight.
+  """
+
+  _stores = {}
+  _stores_lock = threading.Lock()
+
+  def __init__(self, model_path, preprocessor_path, reload_check_interval=1.0, serving_dir=None,
+               defer_booster=False, reference_profile_path=None) -> None:
+    self.model_path = model_path
+    self.preprocessor_path = preprocessor_path
+    self.serving_dir = serving_dir
+    self.reference_profile_path = reference_profile_path
+    self.defer_booster = defer_booster
+    self.reload_check_interval = reload_check_interval
+    self._current = None
+    self._signature = None
+    self._next_check = 0.0
+    self._reload_lock = threading.Lock()
+    # pipelines serving from this store; it leaves the registry when the last one releases it
+    self._holders = 0
+
+  @classmethod
+  def for_paths(cls, model_path, preprocessor_path, reload_check_interval=1.0, serving_dir=None,
+                defer_booster=False, reference_profile_path=None, hold=False):
+    key = (
+      os.path.abspath(model_path),
+      os.path.abspath(preprocessor_path),
+      serving_dir and os.path.abspath(serving_dir)
+    )
+    with cls._stores_lock:
+      store = cls._stores.get(key)
+      if store is None:
+        store = cls(model_path, preprocessor_path, reload_check_interval, serving_dir, defer_booster,
+                    reference_profile_path)
+        cls._stores[key] = store
+      if hold:
+        store._holders += 1
+      return store
+
+  @classmethod
+  def release(cls, store):
+    """Drop a hold taken with for_paths(hold=True).
+
+    After the last hold the store is forgotten, so its models can be freed
+    once in-flight requests finish; until then pipelines share it.
+    """
+    with cls._stores_lock:
+      store._holders -= 1
+      if store._holders > 0:
+        return
+      for key, value in list(cls._stores.items()):
+        if value is store:
+          del cls._stores[key]
+
+  @property
+  def loaded(self):
+    return self._current is not None
+
+  def _manifest_path(self):
+    if self.serving_dir is None:
+      return None
+    path = os.path.join(self.serving_dir, MANIFEST_NAME)
+    return path if os.path.exists(path) else None
+
+  def _stat_signature(self):
+    manifest_path = self._manifest_path()
+    paths = (manifest_path,) if manifest_path else (self.model_path, self.preprocessor_path)
+    signature = []
+    for path in paths:
+      stat = os.stat(path)
+      signature.append((path, stat.st_mtime_ns, stat.st_size))
+    return tuple(signature)
+
+  def _load(self, signature):
+    if self._manifest_path():
+      self._load_serving(signature)
+    else:
+      self._load_pickles(signature)
+
+  def _read_profile(self):
+    path = self.reference_profile_path
+    if path is None or not os.path.exists(path):
+      return None
+    try:
+      return load_profile(path)
+    except (OSError, ValueError) as e:
+      print(f"ignoring reference profile {path}: {e}")
+      return None
+
+  def _loaded(self, artifacts, source, started):
+    MODEL_LOAD_SECONDS.labels(source).observe(time.perf_counter() - started)
+    # stores are shared between roles, so each pipeline reports its own version (see predict)
+    self._current = replace(artifacts, loaded_at=time.time())
+
+  def _load_serving(self, signature):
+    manifest = read_manifest(self.serving_dir)
+    hashes = manifest['sha256']
+    version = hashlib.sha256(''.join(hashes[key] for key in sorted(hashes)).encode()).hexdigest()[:32]
+    if self._current is not None and self._current.version == version:
+      self._signature = signature
+      return
+    started = time.perf_counter()
+    model, preprocessor = load_serving_artifacts(self.serving_dir, manifest, defer_booster=self.defer_booster)
+    self._loaded(LoadedArtifacts(
+      model=model,
+      preprocessor=preprocessor,
+      version=version,
+      fast_preprocessor=preprocessor,
+      forest=model.forest,
+      reference_profile=self._read_profile()
+    ), 'serving', started)
+    self._signature = signature
+
+  def _load_pickles(self, signature):
+    version = file_digest(self.model_path)[:16] + file_digest(self.preprocessor_path)[:16]
+    if self._current is not None and self._current.version == version:
+      # touched but unchanged content, keep the warm objects
+      self._signature = signature
+      return
+    started = time.perf_counter()
+    model = load_object(self.model_path)
+    preprocessor = load_object(self.preprocessor_path)
+    if model is None or preprocessor is None:
+      raise RuntimeError(f"could not load artifacts {self.model_path}, {self.preprocessor_path}")
+    try:
+      fast_preprocessor = FastPreprocessor.from_column_transformer(preprocessor)
+    except (AttributeError, TypeError, ValueError) as e:
+      print(f"fast preprocessor unavailable: {e}")
+      fast_preprocessor = None
+    forest = compile_forest(model.get_booster()) if hasattr(model, 'get_booster') else None
+    self._loaded(LoadedArtifacts(
+      model=model,
+      preprocessor=preprocessor,
+      version=version,
+      fast_preprocessor=fast_preprocessor,
+      forest=forest,
+      reference_profile=self._read_profile()
+    ), 'pickle', started)
+    self._signature = signature
+
+  def get(self):
+    current = self._current
+    now = time.monotonic()
+    if current is not None and now < self._next_check:
+      return current
+
+    # only one thread reloads; everyone else keeps serving the current pair
+    if not self._reload_lock.acquire(blocking=current is None):
+      return current
+    try:
+      if self._current is not None and time.monotonic() < self._next_check:
+        return self._current
+      try:
+        signature = self._stat_signature()
+        if signature != self._signature:
+          self._load(signature)
+      except Exception as e:
+        ERRORS.labels('model_load').inc()
+        # a half-written artifact must not take down serving
+        if self._current is None:
+          raise
+        print(e)
+      self._next_check = time.monotonic() + self.reload_check_interval
+      return self._current
+    finally:
+      self._reload_lock.release()
+
 
 class PredictionPipeline:
-  def __init__(self) -> None:
-    self.config = PredictionPipelineConfig()
+  """Transform + predict over the artifacts of an ArtifactStore.
+
+  With `registry_dir` set, the store belongs to a registry version. A
+  pinned version never changes; 'current'/'latest' are re-resolved every
+  `reload_check_interval` and a new version is loaded in the background
+  while the old one keeps serving, so a promotion causes no cold requests.
+  Stores are shared per version, so pipelines pinned to different
+  versions (e.g. for a canary split) keep each model warm once.
+  """
+
+  def __init__(self, config=None, cache=None, drift_monitor=None) -> None:
+    self.config = config or PredictionPipelineConfig()
+    self.cache = cache
+    # DriftMonitor fed with every successfully scored DataFrame batch; it is
+    # switched to the reference profile of whichever model version serves
+    self.drift_monitor = drift_monitor
+    self._drift_version = None
+    self._drift_lock = threading.Lock()
+    self._info_version = None
+    self._info_lock = threading.Lock()
+    self.registry = None
+    self.model_version = None
+    self.store = None
+    self._next_resolve = 0.0
+    self._resolve_lock = threading.Lock()
+    self._warming = None
+    if self.config.registry_dir:
+      self.registry = ModelRegistry(ModelRegistryConfig(root=self.config.registry_dir))
+    else:
+      self.store = ArtifactStore.for_paths(
+        self.config.model_path,
+        self.config.preprocessor_path,
+        self.config.reload_check_interval,
+        self.config.serving_dir,
+        self.config.defer_booster,
+        self.config.drift_profile_override or self.config.reference_profile_path,
+        hold=True
+      )
+
+  def store_for_version(self, version, hold=False):
+    paths = self.registry.paths(version)
+    return ArtifactStore.for_paths(
+      paths['model_path'],
+      paths['preprocessor_path'],
+      self.config.reload_check_interval,
+      paths['serving_dir'],
+      self.config.defer_booster,
+      self.config.drift_profile_override or paths['reference_profile_path'],
+      hold=hold
+    )
+
+  def warm(self, *refs):
+    """Load registry versions ahead of traffic; returns the resolved version ids."""
+    versions = [self.registry.resolve(ref) for ref in refs]
+    for version in versions:
+      self.store_for_version(version).get()
+    return versions
+
+  @staticmethod
+  def _warm_in_background(store):
+    try:
+      store.get()
+    except Exception as e:
+      print(e)
+
+  def _current_store(self):
+    if self.registry is None:
+      return self.store
+    store = self.store
+    if store is not None and time.monotonic() < self._next_resolve:
+      return store
 
-  def predict(self, features):
+    if not self._resolve_lock.acquire(blocking=store is None):
+      return store
     try:
-      model = load_object(self.config.model_path)
-      preprocessor = load_object(self.config.preprocessor_path)
+      if self.store is not None and time.monotonic() < self._next_resolve:
+        return self.store
+      try:
+        version = self.registry.resolve(self.config.model_version)
+      except (LookupError, OSError) as e:
+        if self.store is None:
+          raise
+        print(e)
+        version = self.model_version
+      if version != self.model_version:
+        candidate = self.store_for_version(version)
+        if self.store is None or candidate.loaded:
+          candidate = self.store_for_version(version, hold=True)
+          try:
+            candidate.get()
+          except Exception:
+            ArtifactStore.release(candidate)
+            raise
+          previous, self.store, self.model_version = self.store, candidate, version
+          if previous is not None:
+            ArtifactStore.release(previous)
+          print(f"Serving model version {version}")
+        elif self._warming is None or not self._warming.is_alive():
+          # keep serving the old version until the new one is loaded
+          self._warming = threading.Thread(target=self._warm_in_background, args=(candidate,), daemon=True)
+          self._warming.start()
+      self._next_resolve = time.monotonic() + self.config.reload_check_interval
+      return self.store
+    finally:
+      self._resolve_lock.release()
+
+  def _predict_uncached(self, artifacts, features):
+    preprocessor = artifacts.preprocessor
+    if self.config.use_fast_preprocessor and artifacts.fast_preprocessor is not None:
+      preprocessor = artifacts.fast_preprocessor
+    with timed(self.config.stage_prefix + 'transform'):
       data = preprocessor.transform(features)
-      preds = model.predict(data)
+    model = artifacts.model
+    if artifacts.forest is not None and isinstance(data, np.ndarray) and len(data) <= self.config.forest_max_rows:
+      model = artifacts.forest
+    with timed(self.config.stage_prefix + 'model'):
+      return model.predict(data)
+
+  def _predict_cached(self, artifacts, features):
+    with timed(self.config.stage_prefix + 'cache_lookup'):
+      keys = self.cache.keys_for(features, artifacts.version)
+      cached = self.cache.get_many(keys, artifacts.version)
+    missing = [i for i, value in enumerate(cached) if value is None]
+    if not missing:
+      return np.asarray(cached)
+
+    fresh = self._predict_uncached(artifacts, features.iloc[missing])
+    # duplicate rows within one request are cached once, last one wins
+    self.cache.set_many([(keys[i], value) for i, value in zip(missing, fresh)], artifacts.version)
+    for i, value in zip(missing, fresh):
+      cached[i] = value
+    return np.asarray(cached)
+
+  def observe_drift(self, features, artifacts=None):
+    """Queue a DataFrame batch for the drift monitor, against the serving version's profile."""
+    if self.drift_monitor is None or not isinstance(features, pd.DataFrame):
+      return
+    if artifacts is None:
+      artifacts = self._current_store().get()
+    if artifacts.version != self._drift_version:
+      with self._drift_lock:
+        if artifacts.version != self._drift_version:
+          if artifacts.reference_profile is not None:
+            self.drift_monitor.set_profile(artifacts.reference_profile)
+          self._drift_version = artifacts.version
+    # a version trained without a profile is not compared to another version's
+    if artifacts.reference_profile is not None:
+      self.drift_monitor.submit(features)
+
+  def report_model_info(self, artifacts):
+    """Point this pipeline's role ('primary', or the stage prefix, e.g. 'shadow') at the served version."""
+    if artifacts.version == self._info_version:
+      return
+    role = self.config.stage_prefix.rstrip('_') or 'primary'
+    with self._info_lock:
+      if artifacts.version != self._info_version:
+        if self._info_version is not None:
+          MODEL_INFO.remove(role, self._info_version)
+        MODEL_INFO.labels(role, artifacts.version).set(artifacts.loaded_at)
+        self._info_version = artifacts.version
+
+  def predict(self, features, monitor_drift=True):
+    shape = getattr(features, 'shape', None)
+    if shape and not self.config.stage_prefix:
+      BATCH_SIZE.observe(shape[0])
+    try:
+      with timed(self.config.stage_prefix + 'load_artifacts'):
+        artifacts = self._current_store().get()
+      self.report_model_info(artifacts)
+      if self.cache is not None and isinstance(features, pd.DataFrame):
+        preds = self._predict_cached(artifacts, features)
+      else:
+        preds = self._predict_uncached(artifacts, features)
+      if monitor_drift:
+        self.observe_drift(features, artifacts)
       return preds
-    except Exception as e:
-      print(e)
\ No newline at end of file
+    except Exception:
+      ERRORS.labels(self.config.stage_prefix + 'predict').inc()
+      raise
@@ -0,0 +1,186 @@
+import asyncio
+import atexit
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+from src.pipeline.prediction_cache import PredictionCache, PredictionCacheConfig
+from src.pipeline.prediction_pipeline import PredictionPipeline, PredictionPipelineConfig
+from src.pipeline.shadow import ShadowConfig, ShadowPipeline
+from src.utils.drift import DriftMonitor, drift_collector
+from src.utils.monitoring import REGISTRY, REQUESTS, REQUEST_SECONDS, cache_collector, timed
+from src.pipeline.validation import DIAMOND_SCHEMA, ValidationError
+from src.utils.utils import FEATURE_COLUMNS
+
+
+def _env_int(name, default):
+  return int(os.environ.get(name, default))
+
+
+def _env_float(name, default):
+  return float(os.environ.get(name, default))
+
+
+def create_prediction_cache():
+  cache_size = _env_int('PREDICTION_CACHE_SIZE', 10000)
+  if cache_size <= 0:
+    return None
+  return PredictionCache(PredictionCacheConfig(
+    max_entries=cache_size,
+    ttl_seconds=_env_float('PREDICTION_CACHE_TTL', 3600)
+  ))
+
+
+@timed('parse')
+def parse_form(form):
+  """Build the one-row feature frame from the HTML form; raises ValidationError on bad fields."""
+  record = {col: form.get(col) or None for col in FEATURE_COLUMNS}
+  return DIAMOND_SCHEMA.validate([record]).raise_for_errors()
+
+
+@timed('parse')
+def parse_json_payload(payload):
+  """Accept one diamond, a list of diamonds or {"diamonds": [...]}.
+
+  Raises TypeError for malformed JSON shapes and ValidationError (a
+  ValueError) listing every bad row and field.
+  """
+  if isinstance(payload, dict):
+    payload = payload.get('diamonds', [payload])
+  if not isinstance(payload, list) or not payload:
+    raise ValueError("Expected a JSON diamond or a non-empty array of diamonds.")
+  return DIAMOND_SCHEMA.validate(payload).raise_for_errors()
+
+
+def form_error_message(error):
+  if isinstance(error, ValidationError):
+    return "Please check these fields: " + "; ".join(f"{e['field']} is {e['error']}" for e in error.errors)
+  return "Please enter valid numeric values for all fields."
+
+
+def json_error_body(error):
+  if isinstance(error, ValidationError):
+    return {'error': 'Invalid diamonds.', 'errors': error.errors}
+  return {'error': str(error)}
+
+
+def format_predictions(preds):
+  return [round(float(p), 2) for p in preds]
+
+
+class PoolOverloaded(Exception):
+  pass
+
+
+@dataclass
+class InferencePoolConfig:
+  max_workers: int = field(default_factory=lambda: _env_int('INFERENCE_WORKERS', os.cpu_count() or 1))
+  # requests allowed to wait for a worker before new ones are rejected
+  max_queue: int = field(default_factory=lambda: _env_int('INFERENCE_MAX_QUEUE', 64))
+  timeout_seconds: float = field(default_factory=lambda: _env_float('INFERENCE_TIMEOUT', 10.0))
+
+
+class InferencePool:
+  """Bounded thread pool for blocking inference called from asyncio code.
+
+  XGBoost and NumPy release the GIL during predict, so threads scale with
+  cores. Work that times out is still counted until its thread finishes,
+  which keeps the backpressure honest.
+  """
+
+  def __init__(self, config=None) -> None:
+    self.config = config or InferencePoolConfig()
+    self._executor = ThreadPoolExecutor(max_workers=self.config.max_workers, thread_name_prefix='inference')
+    self._in_flight = 0
+
+  @property
+  def capacity(self):
+    return self.config.max_workers + self.config.max_queue
+
+  def _release(self, future):
+    self._in_flight -= 1
+    if not future.cancelled():
+      # nobody awaits abandoned work any more; mark its error as seen
+      future.exception()
+
+  async def run(self, fn, *args):
+    if self._in_flight >= self.capacity:
+      raise PoolOverloaded(f"{self._in_flight} inference requests in flight")
+    self._in_flight += 1
+    future = asyncio.wrap_future(self._executor.submit(fn, *args))
+    try:
+      # shielded, so a timeout leaves the future running and still counted
+      return await asyncio.wait_for(asyncio.shield(future), self.config.timeout_seconds)
+    finally:
+      # both branches run on the event loop thread, which owns _in_flight
+      if future.done():
+        self._in_flight -= 1
+      else:
+        future.add_done_callback(self._release)
+
+  def shutdown(self):
+    self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+def record_request(route, status, seconds):
+  REQUESTS.labels(route, status).inc()
+  REQUEST_SECONDS.labels(route).observe(seconds)
+
+
+def create_drift_monitor(pipeline):
+  """DriftMonitor over the served model's reference profile, or None when there is none.
+
+  The pipeline moves it to each newly loaded version's own profile.
+  DRIFT_PROFILE_PATH overrides the profile; DRIFT_MONITORING=0 disables it.
+  """
+  if os.environ.get('DRIFT_MONITORING', '1') == '0':
+    return None
+  path = pipeline.config.drift_profile_override
+  if path is None and pipeline.registry is not None:
+    try:
+      version = pipeline.registry.resolve(pipeline.config.model_version)
+      path = pipeline.registry.paths(version)['reference_profile_path']
+    except LookupError as e:
+      print(e)
+      return None
+  path = path or pipeline.config.reference_profile_path
+  if not os.path.exists(path):
+    print(f"No reference profile at {path}, drift monitoring is off")
+    return None
+  monitor = DriftMonitor.from_path(path, min_rows=_env_int('DRIFT_MIN_ROWS', 500))
+  REGISTRY.set_collector('drift', drift_collector(monitor))
+  return monitor
+
+
+def drift_report(monitor, reset=False):
+  """Body of GET /api/v1/drift; reset=True starts a new comparison window after reporting."""
+  if monitor is None:
+    return {'enabled': False}
+  report = monitor.report()
+  if reset:
+    monitor.reset()
+  return {'enabled': True, **report}
+
+
+def create_prediction_pipeline():
+  cache = create_prediction_cache()
+  if cache is not None:
+    REGISTRY.set_collector('prediction_cache', cache_collector(cache))
+  # web workers answer from the compiled forest while the booster loads
+  config = PredictionPipelineConfig(defer_booster=os.environ.get('DEFER_BOOSTER_LOAD', '1') != '0')
+  pipeline = PredictionPipeline(config, cache=cache)
+  pipeline.drift_monitor = create_drift_monitor(pipeline)
+  shadow_config = ShadowConfig()
+  if shadow_config.shadow_version is None:
+    return pipeline
+  if pipeline.registry is None:
+    raise ValueError("SHADOW_MODEL_VERSION needs MODEL_REGISTRY_DIR")
+  shadow = PredictionPipeline(PredictionPipelineConfig(
+    model_version=shadow_config.shadow_version,
+    stage_prefix='shadow_',
+    defer_booster=config.defer_booster
+  ))
+  shadow.warm(shadow_config.shadow_version)
+  pipeline = ShadowPipeline(pipeline, shadow, shadow_config)
+  atexit.register(pipeline.close)
+  return pipeline
@@ -0,0 +1,311 @@
+import argparse
+import glob
+import json
+import os
+import queue
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from src.utils.monitoring import ERRORS, SHADOW_ABS_DELTA, SHADOW_DROPPED
+
+# one row per scored diamond; latencies are per served batch and repeated on
+# its rows, the background model's share of a merged call is split by rows
+RECORD_DTYPE = np.dtype([
+  ('timestamp', '<f8'),
+  ('primary', '<f4'),
+  ('shadow', '<f4'),
+  ('primary_ms', '<f4'),
+  ('shadow_ms', '<f4'),
+  ('batch_rows', '<u4'),
+  ('batch_start', 'u1'),
+  ('canary', 'u1')
+])
+
+
+@dataclass
+class ShadowConfig:
+  # registry version scored next to the primary one (SHADOW_MODEL_VERSION)
+  shadow_version: Optional[str] = field(default_factory=lambda: os.environ.get('SHADOW_MODEL_VERSION') or None)
+  # share of requests answered by the shadow model instead (CANARY_FRACTION);
+  # the primary model is then the one scored in the background
+  canary_fraction: float = field(default_factory=lambda: float(os.environ.get('CANARY_FRACTION', 0.0)))
+  log_dir: str = field(default_factory=lambda: os.environ.get('SHADOW_LOG_DIR') or os.path.join('artifacts', 'shadow'))
+  # buffered records are written once this many rows are waiting ...
+  flush_rows: int = 4096
+  # ... or this many seconds after the previous write
+  flush_seconds: float = 5.0
+  # the worker collects batches this long before scoring them in one call
+  gather_seconds: float = 0.05
+  # batches waiting for the shadow worker; beyond this they are dropped
+  max_queue: int = 1024
+  seed: Optional[int] = None
+
+
+class ShadowLog:
+  """Append-only binary log of RECORD_DTYPE rows with a JSON header next to it.
+
+  Rows are buffered in memory and written in one call per flush, so the
+  file grows by whole records; a reader ignores a torn trailing record.
+  """
+
+  def __init__(self, log_dir, flush_rows=4096, flush_seconds=5.0) -> None:
+    self.log_dir = log_dir
+    self.flush_rows = flush_rows
+    self.flush_seconds = flush_seconds
+    stamp = time.strftime('%Y%m%d-%H%M%S')
+    self.path = os.path.join(log_dir, f'shadow-{stamp}-{os.getpid()}.bin')
+    self.header = {}
+    self._buffer = []
+    self._buffered_rows = 0
+    self._last_flush = time.monotonic()
+
+  def append(self, records):
+    self._buffer.append(records)
+    self._buffered_rows += len(records)
+    if self._buffered_rows >= self.flush_rows or time.monotonic() - self._last_flush >= self.flush_seconds:
+      self.flush()
+
+  def flush(self):
+    self._last_flush = time.monotonic()
+    if not self._buffer:
+      return
+    records = np.concatenate(self._buffer)
+    self._buffer, self._buffered_rows = [], 0
+    os.makedirs(self.log_dir, exist_ok=True)
+    header_path = os.path.splitext(self.path)[0] + '.json'
+    if not os.path.exists(header_path):
+      with open(header_path, 'w') as f:
+        json.dump({**self.header, 'dtype': RECORD_DTYPE.descr}, f, indent=2)
+    with open(self.path, 'ab') as f:
+      f.write(records.tobytes())
+
+
+def read_log(path):
+  with open(path, 'rb') as f:
+    data = f.read()
+  usable = len(data) - len(data) % RECORD_DTYPE.itemsize
+  return np.frombuffer(data[:usable], dtype=RECORD_DTYPE)
+
+
+class ShadowPipeline:
+  """Serve from one PredictionPipeline and score the same batches with another off the request path.
+
+  predict() returns the served model's answer immediately and queues the
+  batch for a background worker. The worker merges whatever batches are
+  waiting into one call of the other model, which keeps its share of the
+  GIL small, and appends the paired predictions and latencies to a
+  ShadowLog. With
+  canary_fraction > 0 that share of calls is answered by the shadow model
+  (falling back to the primary one if it fails).
+  """
+
+  def __init__(self, primary, shadow, config=None) -> None:
+    self.primary = primary
+    self.shadow = shadow
+    self.config = config or ShadowConfig()
+    self.cache = primary.cache
+    self.drift_monitor = getattr(primary, 'drift_monitor', None)
+    self.log = ShadowLog(self.config.log_dir, self.config.flush_rows, self.config.flush_seconds)
+    self._queue = queue.Queue(maxsize=self.config.max_queue)
+    self._rng = random.Random(self.config.seed)
+    self._worker = None
+    self._start_lock = threading.Lock()
+
+  def _ensure_worker(self):
+    if self._worker is not None:
+      return
+    with self._start_lock:
+      if self._worker is None:
+        self._worker = threading.Thread(target=self._run, name="shadow-scorer", daemon=True)
+        self._worker.start()
+
+  def predict(self, features):
+    canary = self.config.canary_fraction > 0 and self._rng.random() < self.config.canary_fraction
+    served = self.shadow if canary else self.primary
+    start = time.perf_counter()
+    try:
+      preds = served.predict(features)
+    except Exception:
+      if not canary:
+        raise
+      # a failing canary falls back to the primary model
+      ERRORS.labels('shadow').inc()
+      canary = False
+      start = time.perf_counter()
+      preds = self.primary.predict(features)
+    seconds = time.perf_counter() - start
+    if canary and self.drift_monitor is not None:
+      # canary traffic is still live traffic for the primary's drift window
+      self.primary.observe_drift(features)
+    self._ensure_worker()
+    try:
+      self._queue.put_nowait((time.time(), features, preds, seconds, canary))
+    except queue.Full:
+      SHADOW_DROPPED.inc()
+    return preds
+
+  def close(self):
+    """Score what is queued, write the log and stop the worker."""
+    if self._worker is not None:
+      self._queue.put(None)
+      self._worker.join()
+      self._worker = None
+
+  def _drain(self, first):
+    """The first queued batch plus what arrives within gather_seconds, up to flush_rows rows."""
+    items, rows = [first], len(first[1])
+    deadline = time.monotonic() + self.config.gather_seconds
+    while rows < self.config.flush_rows:
+      try:
+        item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+      except queue.Empty:
+        break
+      items.append(item)
+      if item is None:
+        break
+      rows += len(item[1])
+    return items
+
+  def _run(self):
+    while True:
+      try:
+        item = self._queue.get(timeout=self.config.flush_seconds)
+      except queue.Empty:
+        self.log.flush()
+        continue
+      if item is None:
+        break
+      items = self._drain(item)
+      stop = items[-1] is None
+      if stop:
+        items.pop()
+      for canary in (False, True):
+        group = [item for item in items if item[4] == canary]
+        if group:
+          try:
+            self._compare(group, canary)
+          except Exception as e:
+            ERRORS.labels('shadow').inc()
+            print(e)
+      if stop:
+        break
+    self.log.flush()
+
+  def _compare(self, items, canary):
+    """Score queued batches with the other model in one call and log the pairs."""
+    other = self.primary if canary else self.shadow
+    features = [item[1] for item in items]
+    if len(features) > 1:
+      if isinstance(features[0], pd.DataFrame):
+        features = pd.concat(features, ignore_index=True)
+      else:
+        features = np.concatenate(features)
+    else:
+      features = features[0]
+    start = time.perf_counter()
+    # served rows were already counted by the drift monitor
+    other_preds = other.predict(features, monitor_drift=False)
+    other_seconds = time.perf_counter() - start
+
+    records = np.zeros(len(other_preds), dtype=RECORD_DTYPE)
+    offset = 0
+    for timestamp, _, served_preds, served_seconds, _ in items:
+      rows = slice(offset, offset + len(served_preds))
+      # the shared call's time is split over the batches by row count
+      other_ms = other_seconds * 1e3 * len(served_preds) / len(records)
+      records['timestamp'][rows] = timestamp
+      records['batch_rows'][rows] = len(served_preds)
+      records['batch_start'][offset] = 1
+      if canary:
+        records['primary'][rows], records['primary_ms'][rows] = other_preds[rows], other_ms
+        records['shadow'][rows], records['shadow_ms'][rows] = served_preds, served_seconds * 1e3
+      else:
+        records['primary'][rows], records['primary_ms'][rows] = served_preds, served_seconds * 1e3
+        records['shadow'][rows], records['shadow_ms'][rows] = other_preds[rows], other_ms
+      offset += len(served_preds)
+    records['canary'] = canary
+    for delta in np.abs(records['shadow'] - records['primary']):
+      SHADOW_ABS_DELTA.observe(float(delta))
+    if not self.log.header:
+      self.log.header = {
+        'primary_version': getattr(self.primary, 'model_version', None),
+        'shadow_version': getattr(self.shadow, 'model_version', None),
+        'canary_fraction': self.config.canary_fraction
+      }
+    self.log.append(records)
+
+
+def _percentiles(values, prefix):
+  if len(values) == 0:
+    return {}
+  p50, p95, p99 = np.percentile(values, [50, 95, 99])
+  return {f'{prefix}_mean': float(np.mean(values)), f'{prefix}_p50': float(p50),
+          f'{prefix}_p95': float(p95), f'{prefix}_p99': float(p99), f'{prefix}_max': float(np.max(values))}
+
+
+def summarize(paths, tolerance=50.0):
+  """Aggregate shadow logs into delta and latency statistics; tolerance is in price units."""
+  if isinstance(paths, str):
+    paths = sorted(glob.glob(os.path.join(paths, 'shadow-*.bin'))) if os.path.isdir(paths) else [paths]
+  headers = []
+  for path in paths:
+    try:
+      with open(os.path.splitext(path)[0] + '.json') as f:
+        headers.append(json.load(f))
+    except OSError:
+      pass
+  records = np.concatenate([read_log(path) for path in paths]) if paths else np.zeros(0, RECORD_DTYPE)
+
+  primary = records['primary'].astype(np.float64)
+  shadow = records['shadow'].astype(np.float64)
+  delta = shadow - primary
+  batches = records[records['batch_start'] == 1]
+  report = {
+    'files': len(paths),
+    'versions': sorted({(h.get('primary_version'), h.get('shadow_version')) for h in headers}, key=str),
+    'rows': int(len(records)),
+    'batches': int(len(batches)),
+    'canary_rows': int(records['canary'].sum()),
+    'mean_delta': float(delta.mean()) if len(delta) else None,
+    'within_tolerance': float((np.abs(delta) <= tolerance).mean()) if len(delta) else None,
+    'tolerance': tolerance
+  }
+  report.update(_percentiles(np.abs(delta), 'abs_delta'))
+  with np.errstate(divide='ignore', invalid='ignore'):
+    relative = np.abs(delta) / np.abs(primary)
+  report.update(_percentiles(relative[np.isfinite(relative)], 'rel_delta'))
+  report.update(_percentiles(batches['primary_ms'], 'primary_ms'))
+  report.update(_percentiles(batches['shadow_ms'], 'shadow_ms'))
+  if len(records):
+    report['first_timestamp'] = float(records['timestamp'].min())
+    report['last_timestamp'] = float(records['timestamp'].max())
+  return report
+
+
+def main(argv=None):
+  parser = argparse.ArgumentParser(description="Summarize shadow/canary comparison logs.")
+  parser.add_argument('paths', nargs='*',
+                      help="log files or directories (default: SHADOW_LOG_DIR or artifacts/shadow)")
+  parser.add_argument('--tolerance', type=float, default=50.0, help="price difference counted as agreement")
+  parser.add_argument('--output', default=None, help="write the report JSON here")
+  args = parser.parse_args(argv)
+
+  paths = []
+  for path in args.paths or [ShadowConfig().log_dir]:
+    paths += sorted(glob.glob(os.path.join(path, 'shadow-*.bin'))) if os.path.isdir(path) else [path]
+  report = summarize(paths, args.tolerance)
+  print(json.dumps(report, indent=2))
+  if args.output:
+    with open(args.output, 'w') as f:
+      json.dump(report, f, indent=2)
+  return 0
+
+
+if __name__ == "__main__":
+  raise SystemExit(main())
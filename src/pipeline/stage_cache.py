@@ -0,0 +1,128 @@
+import ast
+import hashlib
+import importlib.util
+import inspect
+import json
+import os
+import pickle
+
+import numpy as np
+import pandas as pd
+
+from src.utils.utils import file_digest
+
+
+def _module_source(name):
+  try:
+    spec = importlib.util.find_spec(name)
+  except (ImportError, ValueError):
+    return None
+  return spec.origin if spec is not None and spec.has_location else None
+
+
+def _imported_src_modules(source):
+  """Names of the src.* modules imported anywhere in the `source` file."""
+  with open(source) as f:
+    tree = ast.parse(f.read())
+  names = set()
+  for node in ast.walk(tree):
+    if isinstance(node, ast.Import):
+      names.update(alias.name for alias in node.names)
+    elif isinstance(node, ast.ImportFrom) and node.level == 0 and node.module:
+      names.add(node.module)
+      # `from src.components import data_ingestion` imports a submodule
+      names.update(f"{node.module}.{alias.name}" for alias in node.names)
+  return {name for name in names if name.split('.')[0] == 'src'}
+
+
+def code_fingerprint(*objects):
+  """Hash of the source files of `objects`' modules and every src.* module they import."""
+  pending = [inspect.getmodule(obj).__name__ for obj in objects]
+  sources = {}
+  while pending:
+    name = pending.pop()
+    if name in sources:
+      continue
+    sources[name] = _module_source(name)
+    if sources[name] is not None:
+      pending.extend(_imported_src_modules(sources[name]))
+  digest = hashlib.sha256()
+  for name, source in sorted(sources.items()):
+    if source is not None:
+      digest.update(name.encode())
+      digest.update(file_digest(source).encode())
+  return digest.hexdigest()
+
+
+def frame_fingerprint(frame):
+  digest = hashlib.sha256()
+  digest.update(json.dumps([(str(c), str(t)) for c, t in frame.dtypes.items()]).encode())
+  digest.update(pd.util.hash_pandas_object(frame, index=True).to_numpy().tobytes())
+  return digest.hexdigest()
+
+
+def array_fingerprint(values):
+  """frame_fingerprint of a frame or series; dtype, shape and bytes of anything else array-like."""
+  if isinstance(values, pd.Series):
+    values = values.to_frame()
+  if isinstance(values, pd.DataFrame):
+    return frame_fingerprint(values)
+  values = np.ascontiguousarray(values)
+  digest = hashlib.sha256()
+  digest.update(json.dumps([str(values.dtype), list(values.shape)]).encode())
+  digest.update(values.tobytes())
+  return digest.hexdigest()
+
+
+class StageCache:
+  """Content-addressed store of pipeline stage outputs.
+
+  Entries live in <cache_dir>/<stage>-<key>.pkl where key hashes everything
+  the stage output depends on; only the `keep` newest entries per stage stay.
+  """
+
+  def __init__(self, cache_dir, keep=3) -> None:
+    self.cache_dir = cache_dir
+    self.keep = keep
+
+  @staticmethod
+  def key(*parts):
+    digest = hashlib.sha256()
+    for part in parts:
+      digest.update(json.dumps(part, sort_keys=True, default=str).encode())
+    return digest.hexdigest()[:32]
+
+  def _path(self, stage, key):
+    return os.path.join(self.cache_dir, f"{stage}-{key}.pkl")
+
+  def load(self, stage, key):
+    path = self._path(stage, key)
+    if not os.path.exists(path):
+      return None
+    try:
+      with open(path, "rb") as f:
+        value = pickle.load(f)
+    except Exception as e:
+      print(f"{stage}: ignoring unreadable cache entry ({e})")
+      return None
+    os.utime(path)
+    print(f"{stage}: cache hit {key}")
+    return value
+
+  def save(self, stage, key, value):
+    os.makedirs(self.cache_dir, exist_ok=True)
+    path = self._path(stage, key)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+      pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+    self._evict(stage)
+
+  def _evict(self, stage):
+    entries = [
+      os.path.join(self.cache_dir, name) for name in os.listdir(self.cache_dir)
+      if name.startswith(f"{stage}-") and name.endswith(".pkl")
+    ]
+    entries.sort(key=os.path.getmtime, reverse=True)
+    for path in entries[self.keep:]:
+      os.remove(path)
@@ -1,38 +1,281 @@
+import argparse
+import json
+import os
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Optional
+from src.components import data_ingestion as data_ingestion_module
+from src.components import data_transformation as data_transformation_module
+from src.components import model_trainer as model_trainer_module
 from src.components.data_ingestion import DataIngestion
-from src.components.data_transformation import DataTransform
-from src.components.model_trainer import ModelTrainer
+from src.components.data_transformation import DataTransform, DataTransformConfig
+from src.components.model_export import MANIFEST_NAME, read_manifest, remove_serving_artifacts
+from src.components.model_registry import ModelRegistry, ModelRegistryConfig
+from src.components.model_trainer import ModelTrainer, ModelTrainerConfig
+from src.components.streaming_trainer import StreamingTrainer, StreamingTrainerConfig
+from src.pipeline.stage_cache import StageCache, array_fingerprint, code_fingerprint, frame_fingerprint
+from src.utils.profiling import StageProfiler
+from src.utils.utils import file_digest, load_params
+
+
+@dataclass
+class TrainingPipelineConfig:
+  use_stage_cache: bool = True
+  cache_dir: str = os.path.join('artifacts', 'cache', 'stages')
+  params_path: str = 'params.yaml'
+  # TRAINING_PROFILE=1 records wall/CPU time, peak RSS and shapes per stage
+  profile: bool = field(default_factory=lambda: os.environ.get('TRAINING_PROFILE', '') not in ('', '0'))
+  # also dump a cProfile file per stage here (TRAINING_PROFILE_DIR)
+  profile_dir: Optional[str] = field(default_factory=lambda: os.environ.get('TRAINING_PROFILE_DIR') or None)
+  report_path: str = os.path.join('artifacts', 'run_report.json')
+  # out-of-core training over chunks of data.csv; None follows params.yaml streaming.enabled
+  streaming: Optional[bool] = None
+
 
 class TrainingPipeline:
+  """Ingestion, transform and training, each skipped when its inputs, code and params are unchanged.
+
+  A cache hit restores the stage's files (preprocessor and profile, or
+  model.pkl, metrics.json and the serving export) from the stage cache.
+  Runs with tracking enabled always train, so the tracker sees them.
+  """
+
+  def __init__(self, config=None) -> None:
+    self.config = config or TrainingPipelineConfig()
+    # set when the trainer stage came from the cache, so an older model.pkl still gets published
+    self.model_restored = False
+    self.cache = StageCache(self.config.cache_dir) if self.config.use_stage_cache else None
+    self.profiler = StageProfiler(
+      enabled=self.config.profile or bool(self.config.profile_dir),
+      profile_dir=self.config.profile_dir
+    )
+
+  def _params(self, section):
+    try:
+      return load_params(self.config.params_path).get(section)
+    except OSError:
+      return None
+
   def start_data_ingestion(self):
     try:
-      data_ingestion = DataIngestion()
-      train, test = data_ingestion.initiate_data_ingestion()
-      return train, test
+      with self.profiler.stage('data_ingestion') as stage:
+        data_ingestion = DataIngestion()
+        key = None
+        if self.cache is not None:
+          key = StageCache.key(
+            data_ingestion.data_fingerprint(),
+            code_fingerprint(data_ingestion_module),
+            self._params('data_ingestion')
+          )
+          cached = self.cache.load('data_ingestion', key)
+          if cached is not None:
+            stage.update(cached=True)
+            stage.record_shapes(train=cached[0], test=cached[1])
+            return cached
+
+        train, test = data_ingestion.initiate_data_ingestion()
+        stage.update(cached=False)
+        stage.record_shapes(train=train, test=test)
+        if self.cache is not None:
+          self.cache.save('data_ingestion', key, (train, test))
+        return train, test
     except Exception as e:
       print(e)
 
   def start_data_transform(self, train_data, test_data):
     try:
-      data_transform = DataTransform()
-      return data_transform.initiate_data_transform(train_data, test_data)
+      with self.profiler.stage('data_transform') as stage:
+        stage.record_shapes(train_input=train_data, test_input=test_data)
+        data_transform = DataTransform()
+        preprocessor_path = data_transform.DataConfig.file_path
+        profile_path = data_transform.DataConfig.reference_profile_path
+        key = None
+        if self.cache is not None:
+          key = StageCache.key(
+            frame_fingerprint(train_data),
+            frame_fingerprint(test_data),
+            code_fingerprint(data_transformation_module),
+            self._params('transform')
+          )
+          cached = self.cache.load('data_transform', key)
+          if cached is not None:
+            outputs, preprocessor_bytes, profile_bytes = cached
+            self._restore_file(preprocessor_path, preprocessor_bytes)
+            self._restore_file(profile_path, profile_bytes)
+            stage.update(cached=True)
+            self._record_outputs(stage, outputs)
+            return outputs
+
+        outputs = data_transform.initiate_data_transform(train_data, test_data)
+        stage.update(cached=False)
+        self._record_outputs(stage, outputs)
+        if self.cache is not None and outputs is not None:
+          with open(preprocessor_path, "rb") as f, open(profile_path, "rb") as g:
+            self.cache.save('data_transform', key, (outputs, f.read(), g.read()))
+        return outputs
+    except Exception as e:
+      print(e)
+
+  @staticmethod
+  def _record_outputs(stage, outputs):
+    if outputs is not None:
+      X_train, X_test, y_train, y_test = outputs
+      stage.record_shapes(X_train=X_train, X_test=X_test, y_train=y_train, y_test=y_test)
+
+  @staticmethod
+  def _restore_file(file_path, content):
+    # leave an identical file untouched so serving doesn't see a new mtime
+    if os.path.exists(file_path):
+      with open(file_path, "rb") as f:
+        if f.read() == content:
+          return
+    os.makedirs(os.path.dirname(file_path), exist_ok=True)
+    with open(file_path, "wb") as f:
+      f.write(content)
+
+  def _model_trainer_key(self, config, X_train, X_test, y_train, y_test, train_data):
+    params = load_params(config.params_path)
+    if (params.get('tracking') or {}).get('enabled', False):
+      return None
+    preprocessor = file_digest(config.preprocessor_path) if os.path.exists(config.preprocessor_path) else None
+    return StageCache.key(
+      [array_fingerprint(data) for data in (X_train, X_test, y_train, y_test)],
+      None if train_data is None else frame_fingerprint(train_data),
+      preprocessor,
+      code_fingerprint(model_trainer_module),
+      {section: params.get(section) for section in ('model', 'evaluation', 'search', 'cross_validation')},
+      asdict(config)
+    )
+
+  @staticmethod
+  def _read_serving(serving_dir):
+    if not os.path.exists(os.path.join(serving_dir, MANIFEST_NAME)):
+      return None
+    names = list(read_manifest(serving_dir)['files'].values()) + [MANIFEST_NAME]
+    files = {}
+    for name in names:
+      with open(os.path.join(serving_dir, name), "rb") as f:
+        files[name] = f.read()
+    return files
+
+  def _restore_serving(self, serving_dir, files):
+    if files is None:
+      remove_serving_artifacts(serving_dir)
+      return
+    # payload names carry their hash; the manifest goes last, as in export_serving_artifacts
+    for name, content in files.items():
+      if name != MANIFEST_NAME:
+        self._restore_file(os.path.join(serving_dir, name), content)
+    self._restore_file(os.path.join(serving_dir, MANIFEST_NAME), files[MANIFEST_NAME])
+
+  def start_model_trainer(self, X_train, X_test, y_train, y_test, train_data=None):
+    try:
+      with self.profiler.stage('model_trainer') as stage:
+        stage.record_shapes(X_train=X_train, X_test=X_test, y_train=y_train, y_test=y_test)
+        model_trainer = ModelTrainer()
+        config = model_trainer.config
+        key = None
+        if self.cache is not None:
+          key = self._model_trainer_key(config, X_train, X_test, y_train, y_test, train_data)
+          cached = self.cache.load('model_trainer', key) if key is not None else None
+          if cached is not None:
+            model_bytes, metrics_bytes, serving_files = cached
+            self._restore_file(config.model_path, model_bytes)
+            self._restore_file(config.metrics_path, metrics_bytes)
+            self._restore_serving(config.serving_dir, serving_files)
+            self.model_restored = True
+            stage.update(cached=True)
+            return
+
+        started = time.time()
+        model_trainer.initiate_model_trainer(X_train, X_test, y_train, y_test, train_data=train_data)
+        stage.update(cached=False)
+        # the trainer prints its failures, so only a model.pkl written just now is cached
+        if key is not None and os.path.exists(config.model_path) and os.path.getmtime(config.model_path) >= started:
+          with open(config.model_path, "rb") as f, open(config.metrics_path, "rb") as g:
+            self.cache.save('model_trainer', key, (f.read(), g.read(), self._read_serving(config.serving_dir)))
     except Exception as e:
       print(e)
 
-  def start_model_trainer(self, X_train, X_test, y_train, y_test):
+  def start_streaming_training(self):
     try:
-      model_trainer = ModelTrainer()
-      model_trainer.initiate_model_trainer(X_train, X_test, y_train, y_test)
+      with self.profiler.stage('streaming_training') as stage:
+        config = StreamingTrainerConfig.from_params(
+          load_params(self.config.params_path), params_path=self.config.params_path)
+        metrics = StreamingTrainer(config).initiate_streaming_training()
+        if metrics is not None:
+          stage.update(rows=metrics['rows'])
+        return metrics
     except Exception as e:
       print(e)
 
+  def start_registry_publish(self, started):
+    """Copy this run's artifacts into the model registry as a new version."""
+    try:
+      settings = self._params('registry') or {}
+      if not settings.get('enabled', False):
+        return None
+      artifacts = ModelTrainerConfig()
+      # the trainers report failures by printing, so check that this run wrote a model
+      written = os.path.exists(artifacts.model_path) and os.path.getmtime(artifacts.model_path) >= started
+      if not (written or self.model_restored):
+        print("No model written by this run, nothing published")
+        return None
+      with self.profiler.stage('registry_publish') as stage:
+        with open(artifacts.metrics_path) as f:
+          metrics = json.load(f)
+        registry = ModelRegistry(ModelRegistryConfig(root=settings.get('root', ModelRegistryConfig.root)))
+        version = registry.publish(
+          artifacts.model_path,
+          artifacts.preprocessor_path,
+          artifacts.serving_dir,
+          reference_profile_path=DataTransformConfig().reference_profile_path,
+          metrics=metrics,
+          params=load_params(self.config.params_path),
+          data_md5=DataIngestion().data_fingerprint()
+        )
+        if settings.get('promote', True):
+          registry.promote(version)
+        # pruning is left to `model_registry prune`, which knows the pinned versions
+        stage.update(version=version)
+        print(f"Published model version {version}")
+        return version
+    except Exception as e:
+      print(e)
+
+  def _streaming_enabled(self):
+    if self.config.streaming is not None:
+      return self.config.streaming
+    return bool((self._params('streaming') or {}).get('enabled', False))
+
   def start_training(self):
+    started = time.time()
     try:
-      train, test = self.start_data_ingestion()
-      X_train, X_test, y_train, y_test = self.start_data_transform(train, test)
-      self.start_model_trainer(X_train, X_test, y_train, y_test)
+      if self._streaming_enabled():
+        self.start_streaming_training()
+      else:
+        train, test = self.start_data_ingestion()
+        X_train, X_test, y_train, y_test = self.start_data_transform(train, test)
+        self.start_model_trainer(X_train, X_test, y_train, y_test, train_data=train)
+      self.start_registry_publish(started)
     except Exception as e:
       print(e)
+    finally:
+      report_path = self.profiler.write_report(self.config.report_path)
+      if report_path:
+        print(f"Run report written to {report_path}")
 
 if __name__ == "__main__":
-  obj = TrainingPipeline()
-  obj.start_training()
\ No newline at end of file
+  parser = argparse.ArgumentParser(description="Run ingestion, transform and training.")
+  parser.add_argument('--no-cache', action='store_true', help="recompute every stage")
+  parser.add_argument('--streaming', action='store_true', default=None,
+                      help="train out-of-core from chunks of data.csv")
+  parser.add_argument('--profile', action='store_true', help="write a per-stage run report")
+  parser.add_argument('--profile-dir', default=None, help="also dump a cProfile file per stage here")
+  args = parser.parse_args()
+
+  config = TrainingPipelineConfig(use_stage_cache=not args.no_cache, streaming=args.streaming)
+  config.profile = config.profile or args.profile
+  config.profile_dir = args.profile_dir or config.profile_dir
+  obj = TrainingPipeline(config)
+  obj.start_training()
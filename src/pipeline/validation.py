@@ -0,0 +1,157 @@
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+from src.utils.utils import CAT_COLS, CATEGORIES, FEATURE_COLUMNS, NUM_COLS
+
+
+@dataclass(frozen=True)
+class NumericField:
+  low: float
+  high: float
+  # carat and the x/y/z dimensions must be strictly positive
+  low_inclusive: bool = True
+
+
+# physical limits, well outside anything in the training data
+NUMERIC_FIELDS = {
+  'carat': NumericField(0.0, 10.0, low_inclusive=False),
+  'depth': NumericField(40.0, 80.0),
+  'table': NumericField(40.0, 100.0),
+  'x': NumericField(0.0, 60.0, low_inclusive=False),
+  'y': NumericField(0.0, 60.0, low_inclusive=False),
+  'z': NumericField(0.0, 40.0, low_inclusive=False),
+}
+
+
+class ValidationError(ValueError):
+  """Raised when a request contains invalid rows; `errors` lists them as {row, field, error}."""
+
+  def __init__(self, errors) -> None:
+    self.errors = errors
+    super().__init__('; '.join(f"row {e['row']} {e['field']}: {e['error']}" for e in errors[:10]))
+
+
+@dataclass
+class ValidationResult:
+  # coerced features in FEATURE_COLUMNS order, invalid rows included
+  frame: pd.DataFrame
+  valid: np.ndarray
+  errors: list = field(default_factory=list)
+
+  @property
+  def ok(self):
+    return bool(self.valid.all())
+
+  @property
+  def valid_frame(self):
+    return self.frame if self.ok else self.frame[self.valid]
+
+  def raise_for_errors(self):
+    if self.errors:
+      raise ValidationError(self.errors)
+    return self.frame
+
+
+class DiamondSchema:
+  """Vectorized check and coercion of raw diamond rows.
+
+  Numeric fields are parsed with pd.to_numeric and range-checked with
+  NumPy masks. Categorical fields are stripped and matched against the
+  DataTransform vocabularies. The work is one pass per field and check;
+  Python only loops over the rows that failed, to report them.
+  """
+
+  def __init__(self, numeric_fields=None, categories=None) -> None:
+    self.numeric_fields = numeric_fields or NUMERIC_FIELDS
+    self.categories = categories or dict(zip(CAT_COLS, CATEGORIES))
+
+  @staticmethod
+  def _raw_columns(data):
+    """FEATURE_COLUMNS as NumPy arrays (None when absent) plus the row count and index."""
+    if isinstance(data, pd.DataFrame):
+      columns = {col: data[col].to_numpy() if col in data.columns else None for col in FEATURE_COLUMNS}
+      return columns, len(data), data.index
+    if not all(isinstance(record, dict) for record in data):
+      raise TypeError("each diamond must be a JSON object")
+    columns = {}
+    for col in FEATURE_COLUMNS:
+      if not any(col in record for record in data):
+        columns[col] = None
+        continue
+      # filled one by one: np.array() would turn same-length nested lists into a 2-D array
+      column = np.empty(len(data), dtype=object)
+      for i, record in enumerate(data):
+        column[i] = record.get(col)
+      columns[col] = column
+    return columns, len(data), pd.RangeIndex(len(data))
+
+  @staticmethod
+  def _to_float(raw):
+    try:
+      return np.asarray(raw, dtype=np.float64)
+    except (TypeError, ValueError):
+      # None, bad strings or nested values: parse what can be parsed
+      return pd.to_numeric(pd.Series(raw, dtype=object), errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan)
+
+  def validate(self, data):
+    """Validate a DataFrame or a list of record dicts."""
+    raw_columns, n_rows, index = self._raw_columns(data)
+    failures = []  # (row indices, field, message)
+    columns = {}
+
+    for col in NUM_COLS:
+      raw = raw_columns[col]
+      if raw is None:
+        failures.append((np.arange(n_rows), col, 'missing'))
+        columns[col] = np.full(n_rows, np.nan)
+        continue
+      values = self._to_float(raw)
+      missing = pd.isna(raw)
+      not_numeric = np.isnan(values) & ~missing
+      spec = self.numeric_fields[col]
+      with np.errstate(invalid='ignore'):
+        too_low = values <= spec.low if not spec.low_inclusive else values < spec.low
+        out_of_range = too_low | (values > spec.high)
+      bounds = f"{'[' if spec.low_inclusive else '('}{spec.low}, {spec.high}]"
+      for mask, message in ((missing, 'missing'), (not_numeric, 'not a number'),
+                            (out_of_range, f"outside {bounds}")):
+        if mask.any():
+          failures.append((np.flatnonzero(mask), col, message))
+      columns[col] = values
+
+    for col in CAT_COLS:
+      raw = raw_columns[col]
+      if raw is None:
+        failures.append((np.arange(n_rows), col, 'missing'))
+        columns[col] = np.full(n_rows, None, dtype=object)
+        continue
+      values = np.asarray(raw, dtype=object)
+      vocabulary = self.categories[col]
+      unknown = ~np.isin(values, vocabulary)
+      if unknown.any():
+        # only the rows that missed get the slower clean-up
+        rows = np.flatnonzero(unknown)
+        values = values.copy()
+        values[rows] = [v.strip() if isinstance(v, str) else v for v in values[rows]]
+        unknown[rows] = ~np.isin(values[rows], vocabulary)
+      missing = pd.isna(values)
+      unknown &= ~missing
+      if missing.any():
+        failures.append((np.flatnonzero(missing), col, 'missing'))
+      if unknown.any():
+        failures.append((np.flatnonzero(unknown), col, f"not one of {vocabulary}"))
+      columns[col] = values
+
+    frame = pd.DataFrame({col: columns[col] for col in FEATURE_COLUMNS}, index=index, copy=False)
+    valid = np.ones(n_rows, dtype=bool)
+    errors = []
+    for rows, col, message in failures:
+      valid[rows] = False
+      errors.extend({'row': int(row), 'field': col, 'error': message} for row in rows)
+    errors.sort(key=lambda e: (e['row'], FEATURE_COLUMNS.index(e['field'])))
+    return ValidationResult(frame=frame, valid=valid, errors=errors)
+
+
+DIAMOND_SCHEMA = DiamondSchema()
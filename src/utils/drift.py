@@ -0,0 +1,339 @@
+import argparse
+import json
+import math
+import queue
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.utils.sketches import RunningMoments
+
+PROFILE_FORMAT_VERSION = 1
+# the reference distribution is cut at its percentiles, so live histograms
+# are 100 counters per numeric feature whatever the traffic
+REFERENCE_BUCKETS = 100
+PSI_GROUPS = 10
+PSI_MODERATE = 0.1
+PSI_SIGNIFICANT = 0.25
+# KS critical value factor for alpha = 0.05
+KS_ALPHA_FACTOR = 1.358
+OTHER = '__other__'
+
+
+def build_reference_profile(numeric, categorical, rows):
+  """Reference profile from per-feature training values.
+
+  `numeric` maps a column to (observed values, missing rate), where the
+  values may be a uniform sample of the column; `categorical` maps a column
+  to (vocabulary, {value: count}).
+  """
+  profile = {'format_version': PROFILE_FORMAT_VERSION, 'rows': int(rows), 'numeric': {}, 'categorical': {}}
+  for col, (values, missing_rate) in numeric.items():
+    values = np.asarray(values, dtype=np.float64)
+    values = values[~np.isnan(values)]
+    edges = np.unique(np.quantile(values, np.linspace(0, 1, REFERENCE_BUCKETS + 1)[1:-1])) if len(values) else np.empty(0)
+    counts = np.bincount(np.searchsorted(edges, values, side='right'), minlength=len(edges) + 1)
+    moments = RunningMoments().update(values)
+    profile['numeric'][col] = {
+      'edges': edges.tolist(),
+      'proportions': (counts / max(1, counts.sum())).tolist(),
+      'missing_rate': float(missing_rate),
+      'mean': float(moments.mean),
+      'std': math.sqrt(moments.variance)
+    }
+  for col, (vocabulary, counts) in categorical.items():
+    vocabulary = list(vocabulary)
+    counts = dict(counts)
+    observed = [counts.get(value, 0) for value in vocabulary]
+    observed.append(sum(count for value, count in counts.items() if value not in vocabulary))
+    total = max(1, sum(observed))
+    profile['categorical'][col] = {
+      'categories': vocabulary,
+      'proportions': [count / total for count in observed]
+    }
+  return profile
+
+
+def profile_from_frame(frame, num_cols, cat_cols, categories):
+  numeric = {}
+  for col in num_cols:
+    values = frame[col].to_numpy(dtype=np.float64, na_value=np.nan)
+    numeric[col] = (values, float(np.isnan(values).mean()) if len(values) else 0.0)
+  categorical = {col: (vocabulary, frame[col].value_counts(dropna=True).to_dict())
+                 for col, vocabulary in zip(cat_cols, categories)}
+  return build_reference_profile(numeric, categorical, len(frame))
+
+
+def save_profile(profile, path):
+  with open(path, 'w') as f:
+    json.dump(profile, f)
+
+
+def load_profile(path):
+  with open(path) as f:
+    profile = json.load(f)
+  if profile.get('format_version') != PROFILE_FORMAT_VERSION:
+    raise ValueError(f"unsupported reference profile version {profile.get('format_version')}")
+  return profile
+
+
+def psi(expected, actual, floor=1e-4):
+  """Population stability index between two proportion vectors."""
+  expected = np.maximum(np.asarray(expected, dtype=np.float64), floor)
+  actual = np.maximum(np.asarray(actual, dtype=np.float64), floor)
+  return float(np.sum((actual - expected) * np.log(actual / expected)))
+
+
+def _psi_groups(proportions):
+  # fold the percentile buckets into PSI_GROUPS groups of about equal reference mass
+  start_mass = np.concatenate([[0.0], np.cumsum(proportions)[:-1]])
+  return np.minimum((start_mass * PSI_GROUPS + 1e-9).astype(int), PSI_GROUPS - 1)
+
+
+def _status(value):
+  if value >= PSI_SIGNIFICANT:
+    return 'significant'
+  if value >= PSI_MODERATE:
+    return 'moderate'
+  return 'stable'
+
+
+class DriftMonitor:
+  """Constant-memory summaries of live features, compared to a training reference profile on demand.
+
+  Numeric features are counted into the reference percentile buckets
+  (plus missing counts and running moments); categorical features into the
+  reference vocabulary plus an "other" bucket. No request rows are kept.
+  PSI is computed over deciles of the reference, KS over the bucket
+  boundaries, so its error is at most one bucket's reference mass (~1%).
+
+  Serving calls submit(), which only queues the frame; a background worker
+  merges what arrived within `gather_seconds` and observes it in one pass.
+  """
+
+  def __init__(self, profile, min_rows=500, gather_seconds=0.05, max_queue=1024) -> None:
+    self.min_rows = min_rows
+    self.gather_seconds = gather_seconds
+    self.dropped = 0
+    self._queue = queue.Queue(maxsize=max_queue)
+    self._worker = None
+    self._start_lock = threading.Lock()
+    self._lock = threading.Lock()
+    self.set_profile(profile)
+
+  def set_profile(self, profile):
+    """Compare against another reference profile (e.g. a new model version's) from a fresh window."""
+    num_cols = list(profile['numeric'])
+    edges = [np.asarray(profile['numeric'][col]['edges']) for col in num_cols]
+    vocabularies = {}
+    for col, spec in profile['categorical'].items():
+      order = np.argsort(spec['categories'])
+      vocabularies[col] = (np.asarray(spec['categories'], dtype=object)[order], order)
+    with self._lock:
+      self.profile = profile
+      self._num_cols = num_cols
+      self._edges = edges
+      # each column's buckets get their own slice of one flat counter array
+      self._offsets = np.cumsum([0] + [len(e) + 1 for e in edges])
+      self._vocabularies = vocabularies
+      self._reset()
+
+  def reset(self):
+    with self._lock:
+      self._reset()
+
+  def _reset(self):
+    self.rows = 0
+    self.started_at = time.time()
+    n_cols = len(self._num_cols)
+    self._counts = np.zeros(self._offsets[-1], dtype=np.int64)
+    self._missing = np.zeros(n_cols, dtype=np.int64)
+    # per-column count/mean/M2, merged like RunningMoments but for all columns at once
+    self._moments = np.zeros((3, n_cols))
+    self._category_counts = {col: np.zeros(len(order) + 1, dtype=np.int64)
+                             for col, (_, order) in self._vocabularies.items()}
+
+  @classmethod
+  def from_path(cls, path, **kwargs):
+    return cls(load_profile(path), **kwargs)
+
+  @staticmethod
+  def _codes(values, sorted_vocabulary, order):
+    """Vocabulary positions of values; unknown and missing ones get len(vocabulary), the "other" bucket."""
+    try:
+      position = np.minimum(np.searchsorted(sorted_vocabulary, values), len(order) - 1)
+      return np.where(sorted_vocabulary[position] == values, order[position], len(order))
+    except TypeError:
+      # mixed types (e.g. NaN among strings) cannot be binary-searched
+      codes = pd.Index(sorted_vocabulary[np.argsort(order)]).get_indexer(values)
+      return np.where(codes < 0, len(order), codes)
+
+  def observe(self, frame):
+    """Add a batch of feature rows (a DataFrame with the profile's columns)."""
+    with self._lock:
+      profile, num_cols, all_edges, offsets, vocabularies = (
+        self.profile, self._num_cols, self._edges, self._offsets, self._vocabularies)
+    # column by column: selecting a column list costs more than the whole update for small batches
+    values = np.column_stack([np.asarray(frame[col], dtype=np.float64) for col in num_cols])
+    missing = np.isnan(values)
+    buckets = [np.searchsorted(edges, values[~missing[:, j], j], side='right') + offsets[j]
+               for j, edges in enumerate(all_edges)]
+    counts = np.bincount(np.concatenate(buckets), minlength=offsets[-1]) if buckets else 0
+    n = (~missing).sum(axis=0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+      mean = np.where(n > 0, np.nansum(values, axis=0) / n, 0.0)
+      m2 = np.nansum((values - mean) ** 2, axis=0)
+    categorical = {}
+    for col, (sorted_vocabulary, order) in vocabularies.items():
+      codes = self._codes(np.asarray(frame[col], dtype=object), sorted_vocabulary, order)
+      categorical[col] = np.bincount(codes, minlength=len(order) + 1)
+
+    with self._lock:
+      if self.profile is not profile:
+        # counted against a profile that has since been replaced
+        return
+      self.rows += len(frame)
+      self._counts += counts
+      self._missing += missing.sum(axis=0)
+      count, old_mean, old_m2 = self._moments
+      total = count + n
+      with np.errstate(invalid='ignore', divide='ignore'):
+        delta = mean - old_mean
+        self._moments[1] = np.where(total > 0, old_mean + delta * n / total, 0.0)
+        self._moments[2] = old_m2 + m2 + np.where(total > 0, delta ** 2 * count * n / total, 0.0)
+      self._moments[0] = total
+      for col, counts in categorical.items():
+        self._category_counts[col] += counts
+
+  def submit(self, frame):
+    """Queue a batch for the background worker; dropped (and counted) when the queue is full."""
+    if self._worker is None:
+      with self._start_lock:
+        if self._worker is None:
+          self._worker = threading.Thread(target=self._run, name="drift-monitor", daemon=True)
+          self._worker.start()
+    try:
+      self._queue.put_nowait((self.profile, frame))
+    except queue.Full:
+      self.dropped += 1
+
+  def flush(self):
+    """Wait until every submitted batch has been observed."""
+    self._queue.join()
+
+  def _run(self):
+    while True:
+      items = [self._queue.get()]
+      deadline = time.monotonic() + self.gather_seconds
+      while True:
+        try:
+          items.append(self._queue.get(timeout=max(0.0, deadline - time.monotonic())))
+        except queue.Empty:
+          break
+      try:
+        # batches queued before set_profile() belong to the previous window
+        frames = [frame for profile, frame in items if profile is self.profile]
+        if frames:
+          self.observe(frames[0] if len(frames) == 1 else pd.concat(frames, ignore_index=True))
+      except Exception as e:
+        print(e)
+      finally:
+        for _ in items:
+          self._queue.task_done()
+
+  def report(self):
+    with self._lock:
+      profile, num_cols, offsets = self.profile, self._num_cols, self._offsets
+      rows = self.rows
+      flat_counts = self._counts.copy()
+      missing = self._missing.copy()
+      moments = self._moments.copy()
+      category_counts = {col: value.copy() for col, value in self._category_counts.items()}
+
+    reference_rows = profile['rows']
+    features = {}
+    for j, col in enumerate(num_cols):
+      spec = profile['numeric'][col]
+      counts = flat_counts[offsets[j]:offsets[j + 1]]
+      expected = np.asarray(spec['proportions'])
+      observed = int(counts.sum())
+      actual = counts / observed if observed else np.zeros_like(expected)
+      groups = _psi_groups(expected)
+      ks = float(np.max(np.abs(np.cumsum(actual) - np.cumsum(expected)))) if observed else None
+      value = psi(np.bincount(groups, expected, PSI_GROUPS), np.bincount(groups, actual, PSI_GROUPS)) if observed else None
+      ks_critical = KS_ALPHA_FACTOR * math.sqrt((observed + reference_rows) / (observed * reference_rows)) \
+        if observed else None
+      features[col] = {
+        'psi': value,
+        'ks': ks,
+        'ks_critical': ks_critical,
+        'ks_drift': bool(ks > ks_critical) if observed else None,
+        'missing_rate': float(missing[j] / rows) if rows else None,
+        'reference_missing_rate': spec['missing_rate'],
+        'mean': float(moments[1, j]) if observed else None,
+        'reference_mean': spec['mean'],
+        'std': math.sqrt(moments[2, j] / observed) if observed else None,
+        'reference_std': spec['std']
+      }
+    for col, spec in profile['categorical'].items():
+      observed = int(category_counts[col].sum())
+      actual = category_counts[col] / observed if observed else None
+      features[col] = {
+        'psi': psi(spec['proportions'], actual) if observed else None,
+        'proportions': dict(zip(spec['categories'] + [OTHER], actual.tolist())) if observed else None,
+        'reference_proportions': dict(zip(spec['categories'] + [OTHER], spec['proportions']))
+      }
+
+    for stats in features.values():
+      judged = rows >= self.min_rows and stats['psi'] is not None
+      stats['status'] = _status(stats['psi']) if judged else 'insufficient_data'
+    drifted = sorted(col for col, stats in features.items() if stats['status'] == 'significant')
+    return {
+      'rows': rows,
+      'dropped_batches': self.dropped,
+      'window_started': self.started_at,
+      'reference_rows': reference_rows,
+      'min_rows': self.min_rows,
+      'drifted_features': drifted,
+      'retrain_recommended': bool(drifted),
+      'features': features
+    }
+
+
+def drift_collector(monitor):
+  """Expose per-feature PSI on the metrics page."""
+  def collect():
+    report = monitor.report()
+    lines = ['# TYPE diamond_feature_psi gauge']
+    for col, stats in report['features'].items():
+      if stats['psi'] is not None:
+        lines.append(f'diamond_feature_psi{{feature="{col}"}} {stats["psi"]:.6g}')
+    lines += ['# TYPE diamond_drift_window_rows gauge', f"diamond_drift_window_rows {report['rows']}"]
+    return lines
+  return collect
+
+
+def main(argv=None):
+  parser = argparse.ArgumentParser(description="Compare a CSV/Parquet file with a training reference profile.")
+  parser.add_argument('data', help="input .csv or .parquet file")
+  parser.add_argument('--profile', default='artifacts/reference_profile.json')
+  parser.add_argument('--chunk-size', type=int, default=100_000)
+  parser.add_argument('--output', default=None, help="write the report JSON here")
+  args = parser.parse_args(argv)
+
+  from src.pipeline.batch_scoring import iter_chunks
+  monitor = DriftMonitor.from_path(args.profile)
+  for chunk in iter_chunks(args.data, args.chunk_size):
+    monitor.observe(chunk)
+  report = monitor.report()
+  print(json.dumps(report, indent=2))
+  if args.output:
+    with open(args.output, 'w') as f:
+      json.dump(report, f, indent=2)
+  return 0
+
+
+if __name__ == "__main__":
+  raise SystemExit(main())
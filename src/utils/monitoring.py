@@ -0,0 +1,217 @@
+import bisect
+import math
+import threading
+import time
+from contextlib import contextmanager
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+PRICE_DELTA_BUCKETS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024, 4096, 16384, 65536)
+
+
+def _format_labels(labelnames, labelvalues, extra=()):
+  pairs = list(zip(labelnames, labelvalues)) + list(extra)
+  if not pairs:
+    return ''
+  escaped = (str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, v in pairs)
+  return '{' + ','.join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + '}'
+
+
+def _format_value(value):
+  if value == math.inf:
+    return '+Inf'
+  return repr(float(value))
+
+
+class _Metric:
+  kind = ''
+
+  def __init__(self, name, documentation, labelnames=()) -> None:
+    self.name = name
+    self.documentation = documentation
+    self.labelnames = tuple(labelnames)
+    self._children = {}
+    self._lock = threading.Lock()
+
+  def labels(self, *labelvalues):
+    labelvalues = tuple(str(v) for v in labelvalues)
+    child = self._children.get(labelvalues)
+    if child is None:
+      with self._lock:
+        child = self._children.setdefault(labelvalues, self._new_child())
+    return child
+
+  def remove(self, *labelvalues):
+    with self._lock:
+      self._children.pop(tuple(str(v) for v in labelvalues), None)
+
+  def clear(self):
+    with self._lock:
+      self._children = {}
+
+  def _default(self):
+    return self.labels(*()) if not self.labelnames else None
+
+  def collect(self):
+    lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+    for labelvalues, child in sorted(self._children.items()):
+      lines.extend(child.samples(self.name, self.labelnames, labelvalues))
+    return lines
+
+
+class _CounterChild:
+  def __init__(self) -> None:
+    self.value = 0.0
+    self._lock = threading.Lock()
+
+  def inc(self, amount=1.0):
+    with self._lock:
+      self.value += amount
+
+  def samples(self, name, labelnames, labelvalues):
+    return [f'{name}{_format_labels(labelnames, labelvalues)} {_format_value(self.value)}']
+
+
+class Counter(_Metric):
+  kind = 'counter'
+
+  def _new_child(self):
+    return _CounterChild()
+
+  def inc(self, amount=1.0):
+    self._default().inc(amount)
+
+
+class _GaugeChild(_CounterChild):
+  def set(self, value):
+    with self._lock:
+      self.value = float(value)
+
+
+class Gauge(_Metric):
+  kind = 'gauge'
+
+  def _new_child(self):
+    return _GaugeChild()
+
+  def set(self, value):
+    self._default().set(value)
+
+
+class _HistogramChild:
+  def __init__(self, buckets) -> None:
+    self.buckets = buckets
+    self.counts = [0] * (len(buckets) + 1)
+    self.sum = 0.0
+    self._lock = threading.Lock()
+
+  def observe(self, value):
+    index = bisect.bisect_left(self.buckets, value)
+    with self._lock:
+      self.counts[index] += 1
+      self.sum += value
+
+  def samples(self, name, labelnames, labelvalues):
+    with self._lock:
+      counts, total = list(self.counts), self.sum
+    lines, cumulative = [], 0
+    for bound, count in zip(self.buckets + (math.inf,), counts):
+      cumulative += count
+      labels = _format_labels(labelnames, labelvalues, [('le', _format_value(bound))])
+      lines.append(f'{name}_bucket{labels} {cumulative}')
+    labels = _format_labels(labelnames, labelvalues)
+    lines.append(f'{name}_sum{labels} {_format_value(total)}')
+    lines.append(f'{name}_count{labels} {cumulative}')
+    return lines
+
+
+class Histogram(_Metric):
+  kind = 'histogram'
+
+  def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS) -> None:
+    super().__init__(name, documentation, labelnames)
+    self.buckets = tuple(sorted(buckets))
+
+  def _new_child(self):
+    return _HistogramChild(self.buckets)
+
+  def observe(self, value):
+    self._default().observe(value)
+
+
+class Registry:
+  def __init__(self) -> None:
+    self._metrics = []
+    self._collectors = {}
+
+  def register(self, metric):
+    self._metrics.append(metric)
+    return metric
+
+  def set_collector(self, name, collector):
+    """collector() returns extra exposition lines, e.g. for stats kept elsewhere."""
+    self._collectors[name] = collector
+
+  def render(self):
+    lines = []
+    for metric in self._metrics:
+      lines.extend(metric.collect())
+    for collector in list(self._collectors.values()):
+      lines.extend(collector())
+    return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+REQUESTS = REGISTRY.register(Counter(
+  'diamond_http_requests_total', 'HTTP requests by route and status code.', ['route', 'status']))
+REQUEST_SECONDS = REGISTRY.register(Histogram(
+  'diamond_http_request_seconds', 'End-to-end HTTP request latency.', ['route']))
+STAGE_SECONDS = REGISTRY.register(Histogram(
+  'diamond_stage_seconds', 'Latency of each prediction stage.', ['stage']))
+ERRORS = REGISTRY.register(Counter(
+  'diamond_errors_total', 'Errors by the stage that raised them.', ['stage']))
+BATCH_SIZE = REGISTRY.register(Histogram(
+  'diamond_prediction_batch_rows', 'Rows per PredictionPipeline.predict call.', buckets=BATCH_SIZE_BUCKETS))
+MODEL_LOAD_SECONDS = REGISTRY.register(Histogram(
+  'diamond_model_load_seconds', 'Time to load a model/preprocessor pair.', ['format']))
+MODEL_INFO = REGISTRY.register(Gauge(
+  'diamond_model_loaded_timestamp_seconds', 'Unix time each pipeline role (primary, shadow) loaded its model version.',
+  ['role', 'version']))
+SHADOW_ABS_DELTA = REGISTRY.register(Histogram(
+  'diamond_shadow_abs_delta', 'Absolute price difference between the shadow and primary models per row.',
+  buckets=PRICE_DELTA_BUCKETS))
+SHADOW_DROPPED = REGISTRY.register(Counter(
+  'diamond_shadow_dropped_total', 'Shadow comparisons skipped because the shadow queue was full.'))
+
+
+@contextmanager
+def timed(stage):
+  """Observe the block's latency under `stage` and count it as an error if it raises.
+
+  Works as a decorator too. Nested stages each see the same exception.
+  """
+  start = time.perf_counter()
+  try:
+    yield
+  except Exception:
+    ERRORS.labels(stage).inc()
+    raise
+  finally:
+    STAGE_SECONDS.labels(stage).observe(time.perf_counter() - start)
+
+
+def cache_collector(cache):
+  """Expose PredictionCache.stats() counters on the metrics page."""
+  def collect():
+    stats = cache.stats()
+    lines = []
+    for key in ('hits', 'shared_hits', 'misses', 'evictions', 'expirations'):
+      name = f'diamond_prediction_cache_{key}_total'
+      lines += [f'# TYPE {name} counter', f'{name} {_format_value(stats[key])}']
+    lines += ['# TYPE diamond_prediction_cache_entries gauge',
+              f"diamond_prediction_cache_entries {_format_value(stats['size'])}"]
+    return lines
+  return collect
@@ -0,0 +1,172 @@
+import cProfile
+import json
+import os
+import platform
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+  import resource
+except ImportError:  # Windows
+  resource = None
+
+
+def _peak_rss_mb(who=None):
+  if resource is None:
+    # psutil, when installed, knows the peak working set on Windows
+    try:
+      import psutil
+    except ImportError:
+      return None
+    return psutil.Process().memory_info().peak_wset / 2**20 if who is None else None
+  usage = resource.getrusage(resource.RUSAGE_SELF if who is None else who)
+  # ru_maxrss is in bytes on macOS and kilobytes everywhere else
+  return usage.ru_maxrss / (2**20 if sys.platform == 'darwin' else 2**10)
+
+
+def _current_rss_mb():
+  try:
+    with open('/proc/self/statm') as f:
+      return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2**20
+  except (OSError, ValueError, AttributeError):
+    pass
+  try:
+    import psutil
+  except ImportError:
+    return None
+  return psutil.Process().memory_info().rss / 2**20
+
+
+class RssSampler:
+  """Highest resident set size seen while the block runs, relative to its start.
+
+  A background thread polls the current RSS every `interval` seconds, so
+  unlike ru_maxrss the result does not depend on earlier peaks of the
+  process (or of the parent a worker was forked from). Allocations that
+  come and go between two samples are missed. peak_mb is None where the
+  current RSS can't be read.
+  """
+
+  def __init__(self, interval=0.001) -> None:
+    self.interval = interval
+    self.peak_mb = None
+    self._stop = threading.Event()
+
+  def _run(self):
+    while not self._stop.wait(self.interval):
+      self._max = max(self._max, _current_rss_mb())
+
+  def __enter__(self):
+    self._baseline = _current_rss_mb()
+    if self._baseline is not None:
+      self._max = self._baseline
+      self._thread = threading.Thread(target=self._run, name='rss-sampler', daemon=True)
+      self._thread.start()
+    return self
+
+  def __exit__(self, exc_type, exc, tb):
+    if self._baseline is not None:
+      self._stop.set()
+      self._thread.join()
+      self.peak_mb = max(self._max, _current_rss_mb()) - self._baseline
+    return False
+
+
+def _children_cpu_seconds():
+  if resource is None:
+    return 0.0
+  usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+  return usage.ru_utime + usage.ru_stime
+
+
+def describe(obj):
+  """Shape of a frame/array/sequence for the run report."""
+  shape = getattr(obj, 'shape', None)
+  if shape is not None:
+    return list(shape)
+  if isinstance(obj, (list, tuple, dict)):
+    return [len(obj)]
+  return None
+
+
+class StageRecord:
+  def __init__(self, name) -> None:
+    self.name = name
+    self.info = {'stage': name, 'status': 'ok'}
+
+  def update(self, **info):
+    self.info.update(info)
+
+  def record_shapes(self, **objects):
+    self.info.setdefault('shapes', {}).update({key: describe(obj) for key, obj in objects.items()})
+
+
+class StageProfiler:
+  """Opt-in wall/CPU/RSS timing of training stages, with optional cProfile dumps.
+
+  Disabled profilers cost one no-op context manager per stage.
+  """
+
+  def __init__(self, enabled=False, profile_dir=None) -> None:
+    self.enabled = enabled
+    self.profile_dir = profile_dir
+    self.stages = []
+    self.started_at = time.time()
+
+  @contextmanager
+  def stage(self, name):
+    record = StageRecord(name)
+    if not self.enabled:
+      yield record
+      return
+
+    profiler = None
+    if self.profile_dir:
+      os.makedirs(self.profile_dir, exist_ok=True)
+      profiler = cProfile.Profile()
+    rss_before = _peak_rss_mb()
+    children_before = _children_cpu_seconds()
+    cpu_before = time.process_time()
+    wall_before = time.perf_counter()
+    if profiler is not None:
+      profiler.enable()
+    try:
+      yield record
+    except Exception as e:
+      record.update(status='error', error=str(e))
+      raise
+    finally:
+      if profiler is not None:
+        profiler.disable()
+        profile_path = os.path.join(self.profile_dir, f'{name}.prof')
+        profiler.dump_stats(profile_path)
+        record.update(profile=profile_path)
+      rss_after = _peak_rss_mb()
+      record.update(
+        wall_seconds=time.perf_counter() - wall_before,
+        cpu_seconds=time.process_time() - cpu_before,
+        children_cpu_seconds=_children_cpu_seconds() - children_before,
+        peak_rss_mb=rss_after,
+        peak_rss_growth_mb=None if rss_after is None else rss_after - rss_before
+      )
+      self.stages.append(record.info)
+
+  def report(self):
+    return {
+      'created_at': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(self.started_at)),
+      'python': platform.python_version(),
+      'machine': platform.platform(),
+      'cpu_count': os.cpu_count(),
+      'total_wall_seconds': sum(stage.get('wall_seconds', 0.0) for stage in self.stages),
+      'stages': self.stages
+    }
+
+  def write_report(self, report_path):
+    if not self.enabled:
+      return None
+    os.makedirs(os.path.dirname(report_path) or '.', exist_ok=True)
+    with open(report_path, 'w') as f:
+      json.dump(self.report(), f, indent=2)
+    return report_path
@@ -0,0 +1,98 @@
+import numpy as np
+
+
+class RunningMoments:
+  """Count/mean/variance of a stream, merged chunk by chunk (Chan et al.)."""
+
+  def __init__(self, count=0, mean=0.0, m2=0.0) -> None:
+    self.count = count
+    self.mean = mean
+    self.m2 = m2
+
+  def update(self, values):
+    values = np.asarray(values, dtype=np.float64).ravel()
+    values = values[~np.isnan(values)]
+    if len(values):
+      mean = values.mean()
+      self.merge(RunningMoments(len(values), mean, float(((values - mean) ** 2).sum())))
+    return self
+
+  def merge(self, other):
+    count = self.count + other.count
+    if count == 0:
+      return self
+    delta = other.mean - self.mean
+    self.mean += delta * other.count / count
+    self.m2 += other.m2 + delta ** 2 * self.count * other.count / count
+    self.count = count
+    return self
+
+  def with_constant(self, value, count):
+    """Moments after `count` extra copies of `value`, e.g. imputed missing values."""
+    merged = RunningMoments(self.count, self.mean, self.m2)
+    return merged.merge(RunningMoments(count, float(value), 0.0)) if count else merged
+
+  @property
+  def variance(self):
+    # population variance, like StandardScaler
+    return self.m2 / self.count if self.count else 0.0
+
+
+class QuantileSketch:
+  """Uniform sample of a stream that answers quantile queries.
+
+  Every value gets a random priority and the `capacity` lowest priorities
+  are kept (bottom-k sampling), so sketches of different chunks merge into
+  a uniform sample of their union. While fewer than `capacity` values have
+  been seen the sample is the whole stream and quantiles are exact.
+  """
+
+  def __init__(self, capacity=100_000, seed=0) -> None:
+    self.capacity = capacity
+    self.count = 0
+    self.missing = 0
+    self._rng = np.random.default_rng(seed)
+    self._values = np.empty(0)
+    self._priorities = np.empty(0)
+
+  @property
+  def exact(self):
+    return self.count <= self.capacity
+
+  def _keep(self, values, priorities):
+    if len(values) > self.capacity:
+      keep = np.argpartition(priorities, self.capacity - 1)[:self.capacity]
+      values, priorities = values[keep], priorities[keep]
+    self._values, self._priorities = values, priorities
+
+  def update(self, values):
+    values = np.asarray(values, dtype=np.float64).ravel()
+    missing = np.isnan(values)
+    self.missing += int(missing.sum())
+    values = values[~missing]
+    self.count += len(values)
+    self._keep(
+      np.concatenate([self._values, values]),
+      np.concatenate([self._priorities, self._rng.random(len(values))])
+    )
+    return self
+
+  def merge(self, other):
+    self.count += other.count
+    self.missing += other.missing
+    self._keep(
+      np.concatenate([self._values, other._values]),
+      np.concatenate([self._priorities, other._priorities])
+    )
+    return self
+
+  def quantile(self, q):
+    if not len(self._values):
+      return np.nan
+    return np.quantile(self._values, q)
+
+  def median(self):
+    return self.quantile(0.5)
+
+  def sample(self):
+    return self._values
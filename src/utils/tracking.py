@@ -0,0 +1,319 @@
+import argparse
+import collections
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Optional
+
+TRACKING_BACKENDS = ('file', 'mlflow')
+# MLflow's log_batch limits
+MLFLOW_MAX_METRICS = 1000
+MLFLOW_MAX_PARAMS = 100
+
+
+@dataclass
+class TrackingConfig:
+  enabled: bool = False
+  backend: str = 'file'
+  # run directories for the file backend
+  root: str = os.path.join('artifacts', 'runs')
+  experiment: str = 'DiamondPricePred'
+  # mlflow server; None lets mlflow read MLFLOW_TRACKING_URI
+  tracking_uri: Optional[str] = None
+  flush_seconds: float = 2.0
+  # buffered metrics that trigger an early flush
+  batch_size: int = 1000
+  # metrics beyond this many unflushed ones are dropped, never blocking training
+  max_pending: int = 100_000
+  close_timeout: float = 60.0
+
+  @classmethod
+  def from_params(cls, params, **overrides):
+    settings = params.get('tracking', {}) or {}
+    fields = cls.__dataclass_fields__
+    return cls(**{**{key: value for key, value in settings.items() if key in fields}, **overrides})
+
+
+class FileBackend:
+  """One directory per run: meta.json, params.json, metrics.jsonl and artifacts/."""
+
+  def __init__(self, root) -> None:
+    self.root = root
+
+  def run_dir(self, run_id):
+    return os.path.join(self.root, run_id)
+
+  def _read_meta(self, run):
+    path = os.path.join(self.run_dir(run), 'meta.json')
+    if not os.path.exists(path):
+      return {}
+    with open(path) as f:
+      return json.load(f)
+
+  def _write_meta(self, run, **changes):
+    path = os.path.join(self.run_dir(run), 'meta.json')
+    meta = {**self._read_meta(run), **changes}
+    with open(path + '.tmp', 'w') as f:
+      json.dump(meta, f, indent=2)
+    os.replace(path + '.tmp', path)
+
+  def start_run(self, name, tags):
+    run_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}"
+    os.makedirs(os.path.join(self.run_dir(run_id), 'artifacts'))
+    self._write_meta(run_id, run_id=run_id, name=name, status='RUNNING', start_time=time.time(), tags=tags)
+    return run_id
+
+  def log_batch(self, run_id, params, metrics, tags):
+    if params:
+      path = os.path.join(self.run_dir(run_id), 'params.json')
+      merged = {}
+      if os.path.exists(path):
+        with open(path) as f:
+          merged = json.load(f)
+      merged.update(params)
+      with open(path, 'w') as f:
+        json.dump(merged, f, indent=2, default=str)
+    if tags:
+      self._write_meta(run_id, tags={**(self._read_meta(run_id).get('tags') or {}), **tags})
+    if metrics:
+      lines = ''.join(json.dumps({'key': k, 'value': v, 'step': s, 'timestamp': t}) + '\n' for k, v, s, t in metrics)
+      with open(os.path.join(self.run_dir(run_id), 'metrics.jsonl'), 'a') as f:
+        f.write(lines)
+
+  def log_artifact(self, run_id, path):
+    shutil.copy2(path, os.path.join(self.run_dir(run_id), 'artifacts', os.path.basename(path)))
+
+  def end_run(self, run_id, status):
+    self._write_meta(run_id, status=status, end_time=time.time())
+
+
+class MlflowBackend:
+  """MLflow tracking through MlflowClient; mlflow is imported on the tracker thread."""
+
+  def __init__(self, experiment, tracking_uri=None) -> None:
+    self.experiment = experiment
+    self.tracking_uri = tracking_uri
+    self.client = None
+
+  def start_run(self, name, tags):
+    from mlflow.tracking import MlflowClient
+    self.client = MlflowClient(self.tracking_uri)
+    experiment = self.client.get_experiment_by_name(self.experiment)
+    experiment_id = experiment.experiment_id if experiment else self.client.create_experiment(self.experiment)
+    return self.client.create_run(experiment_id, run_name=name, tags=tags).info.run_id
+
+  def log_batch(self, run_id, params, metrics, tags):
+    from mlflow.entities import Metric, Param, RunTag
+    params = [Param(key, str(value)) for key, value in params.items()]
+    tags = [RunTag(key, str(value)) for key, value in tags.items()]
+    metrics = [Metric(key, value, int(timestamp * 1000), step) for key, value, step, timestamp in metrics]
+    while params or tags or metrics:
+      self.client.log_batch(run_id, metrics=metrics[:MLFLOW_MAX_METRICS],
+                            params=params[:MLFLOW_MAX_PARAMS], tags=tags[:MLFLOW_MAX_PARAMS])
+      params, tags, metrics = params[MLFLOW_MAX_PARAMS:], tags[MLFLOW_MAX_PARAMS:], metrics[MLFLOW_MAX_METRICS:]
+
+  def log_artifact(self, run_id, path):
+    self.client.log_artifact(run_id, path)
+
+  def end_run(self, run_id, status):
+    self.client.set_terminated(run_id, status)
+
+
+class Tracker:
+  """Buffers params, metrics, tags and artifacts and writes them from a background thread.
+
+  Logging calls only append to in-memory buffers; the thread starts the
+  run, then flushes every `flush_seconds` or once `batch_size` metrics are
+  waiting. Backend errors are printed and never reach the training code.
+  close() flushes what is left and ends the run.
+  """
+
+  def __init__(self, backend, run_name=None, tags=None, config=None) -> None:
+    self.backend = backend
+    self.config = config or TrackingConfig()
+    self.run_name = run_name
+    self.run_id = None
+    self.dropped = 0
+    self.errors = 0
+    self._tags = dict(tags or {})
+    self._params = {}
+    self._metrics = collections.deque()
+    self._artifacts = collections.deque()
+    self._lock = threading.Lock()
+    self._wake = threading.Event()
+    self._closing = False
+    self._status = 'FINISHED'
+    self._thread = threading.Thread(target=self._run, name='tracking', daemon=True)
+    self._thread.start()
+
+  def log_params(self, params):
+    with self._lock:
+      self._params.update(params)
+
+  def log_param(self, key, value):
+    self.log_params({key: value})
+
+  def set_tags(self, tags):
+    with self._lock:
+      self._tags.update(tags)
+
+  def log_metric(self, key, value, step=0):
+    if len(self._metrics) >= self.config.max_pending:
+      self.dropped += 1
+      return
+    self._metrics.append((key, float(value), int(step), time.time()))
+    if len(self._metrics) >= self.config.batch_size:
+      self._wake.set()
+
+  def log_metrics(self, metrics, step=0):
+    for key, value in metrics.items():
+      self.log_metric(key, value, step)
+
+  def log_artifact(self, path):
+    # copied or uploaded on the tracker thread; the file must stay in place until then
+    self._artifacts.append(path)
+
+  def _flush(self):
+    metrics = [self._metrics.popleft() for _ in range(len(self._metrics))]
+    with self._lock:
+      params, self._params = self._params, {}
+      tags, self._tags = self._tags, {}
+    try:
+      if params or metrics or tags:
+        self.backend.log_batch(self.run_id, params, metrics, tags)
+      while self._artifacts:
+        path = self._artifacts.popleft()
+        self.backend.log_artifact(self.run_id, path)
+    except Exception as e:
+      self.errors += 1
+      print(f"tracking flush failed: {e}")
+
+  def _run(self):
+    try:
+      with self._lock:
+        tags, self._tags = self._tags, {}
+      self.run_id = self.backend.start_run(self.run_name, tags)
+    except Exception as e:
+      self.errors += 1
+      print(f"tracking disabled, could not start a run: {e}")
+      return
+    while not self._closing:
+      self._wake.wait(self.config.flush_seconds)
+      self._wake.clear()
+      self._flush()
+    self._flush()
+    try:
+      self.backend.end_run(self.run_id, self._status)
+    except Exception as e:
+      self.errors += 1
+      print(f"tracking could not end the run: {e}")
+
+  def close(self, status='FINISHED'):
+    """Flush the buffers and end the run; waits at most close_timeout seconds."""
+    if self._closing:
+      return
+    self._status = status
+    self._closing = True
+    self._wake.set()
+    self._thread.join(self.config.close_timeout)
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, exc_type, exc, tb):
+    self.close('FAILED' if exc_type is not None else 'FINISHED')
+    return False
+
+
+def create_tracker(params, run_name=None, tags=None):
+  """Tracker for the params.yaml `tracking:` block, or None when tracking is off."""
+  config = TrackingConfig.from_params(params)
+  if not config.enabled:
+    return None
+  if config.backend == 'file':
+    backend = FileBackend(config.root)
+  elif config.backend == 'mlflow':
+    backend = MlflowBackend(config.experiment, config.tracking_uri)
+  else:
+    raise ValueError(f"tracking.backend must be one of {TRACKING_BACKENDS}, got {config.backend!r}")
+  return Tracker(backend, run_name=run_name, tags=tags, config=config)
+
+
+def flatten_params(params, prefix=''):
+  """{'model': {'max_depth': 4}} -> {'model.max_depth': 4}"""
+  flat = {}
+  for key, value in params.items():
+    if isinstance(value, dict):
+      flat.update(flatten_params(value, f"{prefix}{key}."))
+    else:
+      flat[f"{prefix}{key}"] = value
+  return flat
+
+
+def log_eval_history(tracker, evals_result, prefix=''):
+  """Log an XGBoost evals_result() dict after the fact, one step per boosting round."""
+  for data_name, metrics in evals_result.items():
+    for metric, values in metrics.items():
+      key = f"{prefix}{data_name}-{metric}"
+      for step, value in enumerate(values):
+        tracker.log_metric(key, value, step)
+
+
+def xgboost_callback(tracker, prefix='', every=1):
+  """XGBoost TrainingCallback that logs each round's eval metrics to `tracker`."""
+  from xgboost.callback import TrainingCallback
+
+  class TrackingCallback(TrainingCallback):
+    def after_iteration(self, model, epoch, evals_log):
+      if epoch % every == 0:
+        for data_name, metrics in evals_log.items():
+          for metric, values in metrics.items():
+            tracker.log_metric(f"{prefix}{data_name}-{metric}", values[-1], epoch)
+      return False
+
+  return TrackingCallback()
+
+
+def read_run(run_dir):
+  """meta, params and metrics ({key: [(step, value), ...]}) of a file-backend run."""
+  with open(os.path.join(run_dir, 'meta.json')) as f:
+    meta = json.load(f)
+  params, metrics = {}, {}
+  if os.path.exists(os.path.join(run_dir, 'params.json')):
+    with open(os.path.join(run_dir, 'params.json')) as f:
+      params = json.load(f)
+  if os.path.exists(os.path.join(run_dir, 'metrics.jsonl')):
+    with open(os.path.join(run_dir, 'metrics.jsonl')) as f:
+      for line in f:
+        record = json.loads(line)
+        metrics.setdefault(record['key'], []).append((record['step'], record['value']))
+  return {'meta': meta, 'params': params, 'metrics': metrics}
+
+
+def main(argv=None):
+  parser = argparse.ArgumentParser(description="Inspect runs recorded by the file tracking backend.")
+  parser.add_argument('--root', default=TrackingConfig.root)
+  commands = parser.add_subparsers(dest='command', required=True)
+  commands.add_parser('list', help="list runs with their status and final r2_score")
+  show = commands.add_parser('show', help="print a run's params and last metric values")
+  show.add_argument('run_id')
+  args = parser.parse_args(argv)
+
+  if args.command == 'list':
+    for run_id in sorted(os.listdir(args.root)) if os.path.isdir(args.root) else []:
+      run = read_run(os.path.join(args.root, run_id))
+      r2 = run['metrics'].get('r2_score', [(None, None)])[-1][1]
+      print(f"{run_id}  {run['meta'].get('status')}  {run['meta'].get('name')}  r2={r2}")
+  else:
+    run = read_run(os.path.join(args.root, args.run_id))
+    last = {key: values[-1][1] for key, values in run['metrics'].items()}
+    print(json.dumps({'meta': run['meta'], 'params': run['params'], 'metrics': last}, indent=2, default=str))
+  return 0
+
+
+if __name__ == "__main__":
+  raise SystemExit(main())
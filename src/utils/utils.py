@@ -1,8 +1,27 @@
 import os
+import hashlib
+import multiprocessing
 import pickle
-from sklearn.metrics import r2_score, mean_squared_error
+import threading
+import time
+from contextlib import nullcontext
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from multiprocessing.connection import wait
 import numpy as np
 import pandas as pd
+from src.utils.profiling import RssSampler
+
+# sklearn, threadpoolctl and yaml are imported where they are used: serving
+# imports this module and should not pay for the training-only packages
+
+FEATURE_COLUMNS = ['carat', 'depth', 'table', 'x', 'y', 'z', 'cut', 'color', 'clarity']
+NUM_COLS = FEATURE_COLUMNS[:6]
+CAT_COLS = FEATURE_COLUMNS[6:]
+CATEGORIES = [
+  ['Fair', 'Good', 'Very Good', 'Premium', 'Ideal'],  # cut
+  ['D', 'E', 'F', 'G', 'H', 'I', 'J'],               # color
+  ['I1','SI2','SI1','VS2','VS1','VVS2','VVS1','IF']  # clarity
+]
 
 def save_object(file_path, obj):
   try:
@@ -16,25 +35,185 @@ def save_object(file_path, obj):
     print(e)
 
 
-def evaluate_models(X_train, X_test, y_train, y_test,models):
+def file_digest(file_path):
+  digest = hashlib.sha256()
+  with open(file_path, "rb") as file_obj:
+    for block in iter(lambda: file_obj.read(1 << 20), b""):
+      digest.update(block)
+  return digest.hexdigest()
+
+
+def load_params(params_path="params.yaml"):
+  import yaml
+  with open(params_path) as f:
+    return yaml.safe_load(f) or {}
+
+
+def _fit_and_score(model, X_train, X_test, y_train, y_test, cpu_budget=None, track_memory=True, fit_params=None):
+  from sklearn.metrics import mean_squared_error, r2_score
+  from threadpoolctl import threadpool_limits
+  if cpu_budget and 'n_jobs' in model.get_params():
+    model.set_params(n_jobs=cpu_budget)
+  sampler = RssSampler() if track_memory else nullcontext()
+  with threadpool_limits(limits=cpu_budget), sampler:
+    start = time.perf_counter()
+    model.fit(X_train, y_train, **(fit_params or {}))
+    fit_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    y_pred = model.predict(X_test)
+    predict_seconds = time.perf_counter() - start
+  # how far RSS rose above its level when the fit started
+  peak = sampler.peak_mb if track_memory else None
+
+  return {
+    'status': 'ok',
+    'r2': float(r2_score(y_test, y_pred)),
+    'rmse': float(np.sqrt(mean_squared_error(y_test, y_pred))),
+    'fit_seconds': fit_seconds,
+    'predict_seconds': predict_seconds,
+    'peak_memory_mb': peak
+  }
+
+
+def _fit_and_score_child(conn, model, X_train, X_test, y_train, y_test, cpu_budget, fit_params):
+  try:
+    result = _fit_and_score(model, X_train, X_test, y_train, y_test, cpu_budget, fit_params=fit_params)
+    conn.send((result, model))
+  except Exception as e:
+    conn.send(({'status': 'error', 'error': repr(e)}, None))
+  finally:
+    conn.close()
+
+
+def _evaluate_in_processes(X_train, X_test, y_train, y_test, models, workers, cpu_budget, timeout, fit_params):
+  ctx = multiprocessing.get_context()
+  pending = list(models.items())
+  running = {}
+  report = {}
+  while pending or running:
+    while pending and len(running) < workers:
+      name, model = pending.pop(0)
+      parent_conn, child_conn = ctx.Pipe(duplex=False)
+      proc = ctx.Process(
+        target=_fit_and_score_child,
+        args=(child_conn, model, X_train, X_test, y_train, y_test, cpu_budget, fit_params.get(name)),
+        daemon=True
+      )
+      proc.start()
+      child_conn.close()
+      running[name] = (proc, parent_conn, time.perf_counter())
+      print(f"started {name}")
+
+    wait([conn for _, conn, _ in running.values()], timeout=0.05)
+    now = time.perf_counter()
+    for name, (proc, conn, started) in list(running.items()):
+      if conn.poll():
+        try:
+          result, fitted = conn.recv()
+        except EOFError:
+          result, fitted = {'status': 'error', 'error': 'worker exited without a result'}, None
+        proc.join()
+        if fitted is not None:
+          # hand the fitted estimator back to the caller like the serial path does
+          models[name] = fitted
+      elif timeout is not None and now - started > timeout:
+        proc.terminate()
+        proc.join()
+        result = {'status': 'timeout', 'error': f'exceeded {timeout}s'}
+      elif not proc.is_alive():
+        proc.join()
+        result = {'status': 'error', 'error': f'worker exited with code {proc.exitcode}'}
+      else:
+        continue
+      conn.close()
+      result['wall_seconds'] = now - started
+      report[name] = result
+      print(f"{name} Ended with status {result['status']}")
+      del running[name]
+  return report
+
+
+def _evaluate_in_threads(X_train, X_test, y_train, y_test, models, workers, cpu_budget, timeout, fit_params):
+  starts = {}
+  started = {name: threading.Event() for name in models}
+
+  def run(name, model):
+    starts[name] = time.perf_counter()
+    started[name].set()
+    # peak RSS and threadpoolctl are process-wide, so only n_jobs is budgeted here
+    if cpu_budget and 'n_jobs' in model.get_params():
+      model.set_params(n_jobs=cpu_budget)
+    return _fit_and_score(model, X_train, X_test, y_train, y_test, track_memory=False, fit_params=fit_params.get(name))
+
+  report = {}
+  executor = ThreadPoolExecutor(max_workers=workers)
+  futures = {name: executor.submit(run, name, model) for name, model in models.items()}
+  for name, future in futures.items():
+    try:
+      if timeout is None:
+        result = future.result()
+      else:
+        started[name].wait()
+        remaining = timeout - (time.perf_counter() - starts[name])
+        result = future.result(timeout=max(remaining, 0))
+    except FutureTimeoutError:
+      result = {'status': 'timeout', 'error': f'exceeded {timeout}s'}
+    except Exception as e:
+      result = {'status': 'error', 'error': repr(e)}
+    result['wall_seconds'] = time.perf_counter() - starts.get(name, time.perf_counter())
+    report[name] = result
+    print(f"{name} Ended with status {result['status']}")
+  # threads can't be killed; don't wait for timed-out fits
+  executor.shutdown(wait=False, cancel_futures=True)
+  return report
+
+
+def evaluate_models_report(X_train, X_test, y_train, y_test, models,
+                           n_jobs=1, executor='process', cpu_budget=None, timeout=None, fit_params=None):
+  """Fit and score every model, returning per-model accuracy, timings and peak memory.
+
+  With n_jobs > 1 the models run concurrently, in separate processes
+  (executor='process') or threads (executor='thread'). cpu_budget caps the
+  threads each model may use and defaults to an even share of the cores.
+  timeout (seconds per model) only applies to concurrent runs. fit_params
+  maps a model name to extra keyword arguments for its fit().
+  """
+  fit_params = fit_params or {}
+  if n_jobs is None or n_jobs < 1:
+    n_jobs = os.cpu_count() or 1
+  workers = max(1, min(n_jobs, len(models)))
+  if cpu_budget is None and workers > 1:
+    cpu_budget = max(1, (os.cpu_count() or 1) // workers)
+
+  if workers > 1 and executor == 'process':
+    return _evaluate_in_processes(X_train, X_test, y_train, y_test, models, workers, cpu_budget, timeout, fit_params)
+  if workers > 1 and executor == 'thread':
+    return _evaluate_in_threads(X_train, X_test, y_train, y_test, models, workers, cpu_budget, timeout, fit_params)
+
+  report = {}
+  for model_name, model in models.items():
+    print(f"started {model_name}")
+    start = time.perf_counter()
+    try:
+      result = _fit_and_score(model, X_train, X_test, y_train, y_test, cpu_budget, fit_params=fit_params.get(model_name))
+    except Exception as e:
+      result = {'status': 'error', 'error': repr(e)}
+    result['wall_seconds'] = time.perf_counter() - start
+    report[model_name] = result
+    print(f"{model_name} Ended with status {result['status']}")
+  return report
+
+
+def evaluate_models(X_train, X_test, y_train, y_test, models, **kwargs):
   try:
-    report = {}
-
-    for model_name, model in models.items():
-      print(f"started {model_name}")
-      model.fit(X_train, y_train)
-      y_pred = model.predict(X_test)
-      # print(f"predict for {model_name}: {y_pred[0:5]}")
-      r2 = r2_score(y_test, y_pred)
-      report[model_name] = r2
-      print(f"{model_name} Ended Successfully")
-
-    return report
+    report = evaluate_models_report(X_train, X_test, y_train, y_test, models, **kwargs)
+    return {name: result['r2'] for name, result in report.items() if result['status'] == 'ok'}
   except Exception as e:
     print(e)
 
 
 def evaluate_metrics(actual, predicted):
+  from sklearn.metrics import mean_squared_error, r2_score
   try:
     r2 = r2_score(actual, predicted)
     mse = mean_squared_error(actual, predicted)
@@ -67,4 +246,15 @@ def get_data_as_dataframe(carat, depth, table, x, y, z, cut, color, clarity):
     }
     return pd.DataFrame(custom_data_input_dict)
   except Exception as e:
-    print(e)
\ No newline at end of file
+    print(e)
+
+
+def get_records_as_dataframe(records):
+  if not all(isinstance(record, dict) for record in records):
+    raise TypeError("each diamond must be a JSON object")
+  missing = {col for record in records for col in FEATURE_COLUMNS if col not in record}
+  if missing:
+    raise ValueError(f"missing fields: {sorted(missing)}")
+  df = pd.DataFrame.from_records(records, columns=FEATURE_COLUMNS)
+  df[NUM_COLS] = df[NUM_COLS].astype(float)
+  return df
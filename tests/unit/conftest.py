@@ -1,7 +1,92 @@
+import os
+
+import numpy as np
 import pytest
+from sklearn.linear_model import LinearRegression
+from sklearn.preprocessing import StandardScaler
 from src.components.data_ingestion import DataIngestion
 from src.components.data_transformation import DataTransform
 from src.components.model_trainer import ModelTrainer
+from src.pipeline.asgi_app import DiamondASGIApp
+from src.pipeline.serving import InferencePool, InferencePoolConfig
+from src.utils.utils import save_object
+
+DIAMOND = {'carat': 0.5, 'depth': 61.5, 'table': 57.0, 'x': 5.15, 'y': 5.18, 'z': 3.17,
+           'cut': 'Ideal', 'color': 'E', 'clarity': 'VS1'}
+
+
+class FakePipeline:
+    """Prices every row at 1234.567, after waiting on `release` or raising `error` if given."""
+    cache = None
+
+    def __init__(self, release=None, error=None):
+        self.release = release
+        self.error = error
+
+    def predict(self, features):
+        if self.release is not None:
+            self.release.wait(5)
+        if self.error is not None:
+            raise self.error
+        return np.full(len(features), 1234.567)
+
+
+async def _asgi_request(app, method, path, body=b'', content_type='application/json'):
+    messages = [{'type': 'http.request', 'body': body, 'more_body': False}]
+    sent = []
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {'type': 'http', 'method': method, 'path': path,
+             'headers': [(b'content-type', content_type.encode())]}
+    await app(scope, receive, send)
+    return sent[0]['status'], sent[1]['body']
+
+
+def _write_artifacts(directory, slope, X=None):
+    X = np.arange(10, dtype=float).reshape(-1, 1) if X is None else X
+    preprocessor = StandardScaler().fit(X)
+    model = LinearRegression().fit(preprocessor.transform(X), np.asarray(X)[:, 0] * slope)
+    model_path = os.path.join(directory, "model.pkl")
+    preprocessor_path = os.path.join(directory, "preprocessor.pkl")
+    save_object(model_path, model)
+    save_object(preprocessor_path, preprocessor)
+    return model_path, preprocessor_path
+
+
+def _asgi_app(pipeline, **pool_kwargs):
+    pool = InferencePool(InferencePoolConfig(**{'max_workers': 2, 'max_queue': 0, 'timeout_seconds': 5, **pool_kwargs}))
+    return DiamondASGIApp(pipeline=pipeline, pool=pool)
+
+
+@pytest.fixture
+def diamond():
+    """One valid diamond record as the JSON API receives it."""
+    return dict(DIAMOND)
+
+@pytest.fixture
+def fake_pipeline():
+    """The FakePipeline class, called with optional `release` event and `error`."""
+    return FakePipeline
+
+@pytest.fixture
+def asgi_app():
+    """Factory building a DiamondASGIApp with a small InferencePool: asgi_app(pipeline, **pool_kwargs)."""
+    return _asgi_app
+
+@pytest.fixture
+def asgi_request():
+    """Coroutine sending one request to an ASGI app and returning (status, body)."""
+    return _asgi_request
+
+@pytest.fixture
+def write_artifacts():
+    """Factory saving a StandardScaler + LinearRegression(y = slope * x) pair: write_artifacts(directory, slope, X=None) -> (model_path, preprocessor_path)."""
+    return _write_artifacts
 
 @pytest.fixture(scope="module")
 def sample_data():
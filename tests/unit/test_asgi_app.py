@@ -0,0 +1,86 @@
+import asyncio
+import json
+import threading
+from urllib.parse import urlencode
+from src.pipeline.serving import InferencePool, InferencePoolConfig
+
+
+def test_json_and_form_routes(diamond, fake_pipeline, asgi_app, asgi_request):
+    """JSON and HTML prediction routes answer like the Flask app"""
+    app = asgi_app(fake_pipeline())
+
+    status, body = asyncio.run(asgi_request(app, 'POST', '/api/v1/predict', json.dumps([diamond, diamond]).encode()))
+    assert status == 200
+    assert json.loads(body) == {'predictions': [1234.57, 1234.57]}
+
+    status, body = asyncio.run(asgi_request(app, 'POST', '/predict', urlencode(diamond).encode(),
+                                             'application/x-www-form-urlencoded'))
+    assert status == 200
+    assert b'1234.57' in body
+
+    status, body = asyncio.run(asgi_request(app, 'POST', '/api/v1/predict', b'{"carat": 1}'))
+    assert status == 400
+    assert {e['field'] for e in json.loads(body)['errors']} == {'depth', 'table', 'x', 'y', 'z', 'cut', 'color', 'clarity'}
+
+
+def test_full_pool_returns_503(diamond, fake_pipeline, asgi_app, asgi_request):
+    """Requests beyond the worker and queue capacity are rejected with 503"""
+    release = threading.Event()
+    app = asgi_app(fake_pipeline(release), max_workers=1)
+    payload = json.dumps(diamond).encode()
+
+    async def scenario():
+        first = asyncio.ensure_future(asgi_request(app, 'POST', '/api/v1/predict', payload))
+        await asyncio.sleep(0.05)
+        rejected = await asgi_request(app, 'POST', '/api/v1/predict', payload)
+        release.set()
+        return rejected, await first
+
+    (rejected_status, _), (first_status, _) = asyncio.run(scenario())
+    assert rejected_status == 503
+    assert first_status == 200
+
+
+def test_slow_inference_times_out(diamond, fake_pipeline, asgi_app, asgi_request):
+    """Inference that exceeds the per-request timeout returns 504"""
+    release = threading.Event()
+    app = asgi_app(fake_pipeline(release), timeout_seconds=0.05)
+
+    status, _ = asyncio.run(asgi_request(app, 'POST', '/api/v1/predict', json.dumps(diamond).encode()))
+    release.set()
+
+    assert status == 504
+
+
+def test_prediction_error_reaches_the_response(diamond, fake_pipeline, asgi_app, asgi_request):
+    """An exception raised by the pipeline is reported in the 500 body"""
+    app = asgi_app(fake_pipeline(error=RuntimeError("booster file is corrupt")))
+
+    status, body = asyncio.run(asgi_request(app, 'POST', '/api/v1/predict', json.dumps(diamond).encode()))
+
+    assert status == 500
+    assert 'booster file is corrupt' in json.loads(body)['error']
+
+
+def test_pool_counts_timed_out_work_until_it_finishes():
+    """Capacity is returned on completion, and only once abandoned work ends"""
+    pool = InferencePool(InferencePoolConfig(max_workers=1, max_queue=0, timeout_seconds=0.05))
+    release = threading.Event()
+
+    async def scenario():
+        assert await pool.run(lambda: 1) == 1
+        assert pool._in_flight == 0
+        try:
+            await pool.run(release.wait, 5)
+        except asyncio.TimeoutError:
+            pass
+        in_flight_after_timeout = pool._in_flight
+        release.set()
+        for _ in range(100):
+            if pool._in_flight == 0:
+                break
+            await asyncio.sleep(0.01)
+        return in_flight_after_timeout, pool._in_flight
+
+    assert asyncio.run(scenario()) == (1, 0)
+    pool.shutdown()
@@ -0,0 +1,102 @@
+import os
+import tempfile
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.linear_model import LinearRegression
+from src.components.data_transformation import DataTransform
+from src.pipeline.batch_scoring import BatchScoring, BatchScoringConfig, main
+from src.utils.utils import save_object
+
+
+@pytest.fixture(scope="module")
+def scoring_setup(sample_data):
+    """Small model/preprocessor pair plus an input file to score"""
+    train, test = sample_data
+    preprocessor = DataTransform().get_column_transformer()
+    X_train = preprocessor.fit_transform(train.drop(columns=['price']))
+    model = LinearRegression().fit(X_train, train['price'])
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        model_path = os.path.join(tmpdir, 'model.pkl')
+        preprocessor_path = os.path.join(tmpdir, 'preprocessor.pkl')
+        save_object(model_path, model)
+        save_object(preprocessor_path, preprocessor)
+
+        input_path = os.path.join(tmpdir, 'input.csv')
+        test.drop(columns=['price']).head(1000).to_csv(input_path, index=False)
+        features = pd.read_csv(input_path)
+        expected = model.predict(preprocessor.transform(features))
+        yield tmpdir, model_path, preprocessor_path, input_path, expected
+
+
+def test_score_csv_in_chunks(scoring_setup):
+    """Chunked scoring writes every row with the same predictions as one big call"""
+    tmpdir, model_path, preprocessor_path, input_path, expected = scoring_setup
+    output_path = os.path.join(tmpdir, 'scored.csv')
+    config = BatchScoringConfig(chunk_size=128, model_path=model_path,
+                                preprocessor_path=preprocessor_path, serving_dir=None)
+
+    summary = BatchScoring(config).score(input_path, output_path)
+    scored = pd.read_csv(output_path)
+
+    assert summary['rows'] == len(expected)
+    assert summary['chunks'] == 8
+    assert np.allclose(scored['predicted_price'], expected)
+    assert 'carat' in scored.columns
+
+
+def test_score_parquet_with_workers(scoring_setup):
+    """Multi-process scoring keeps chunk order and writes Parquet"""
+    pytest.importorskip('pyarrow')
+    tmpdir, model_path, preprocessor_path, input_path, expected = scoring_setup
+    output_path = os.path.join(tmpdir, 'scored.parquet')
+
+    main(['score', input_path, output_path, '--chunk-size', '100', '--workers', '2',
+          '--keep-columns', 'carat', '--model-path', model_path,
+          '--preprocessor-path', preprocessor_path, '--no-serving-format'])
+    scored = pd.read_parquet(output_path)
+
+    assert list(scored.columns) == ['carat', 'predicted_price']
+    assert np.allclose(scored['predicted_price'], expected)
+
+
+def test_invalid_rows_are_not_scored(scoring_setup):
+    """Rows outside the schema get a NaN prediction and are counted"""
+    tmpdir, model_path, preprocessor_path, input_path, expected = scoring_setup
+    bad_input = os.path.join(tmpdir, 'bad.csv')
+    frame = pd.read_csv(input_path).head(10)
+    frame.loc[[2, 5], 'carat'] = -1.0
+    frame.to_csv(bad_input, index=False)
+    output_path = os.path.join(tmpdir, 'bad_scored.csv')
+    config = BatchScoringConfig(chunk_size=4, model_path=model_path,
+                                preprocessor_path=preprocessor_path, serving_dir=None)
+
+    summary = BatchScoring(config).score(bad_input, output_path)
+    scored = pd.read_csv(output_path)
+
+    assert summary['invalid_rows'] == 2
+    assert scored['predicted_price'].isna().tolist() == [i in (2, 5) for i in range(10)]
+    assert np.allclose(scored['predicted_price'].drop([2, 5]), np.delete(expected[:10], [2, 5]))
+
+
+def test_parquet_output_survives_later_missing_values(scoring_setup):
+    """A chunk whose columns infer different types than the first one is still written"""
+    pytest.importorskip('pyarrow')
+    tmpdir, model_path, preprocessor_path, input_path, expected = scoring_setup
+    mixed_input = os.path.join(tmpdir, 'mixed.csv')
+    frame = pd.read_csv(input_path).head(12)
+    # integral in the first chunk, missing in the second; no cut at all in the third
+    frame['table'] = frame['table'].round().astype('Int64')
+    frame.loc[5, 'table'] = pd.NA
+    frame.loc[8:, 'cut'] = None
+    frame.to_csv(mixed_input, index=False)
+    output_path = os.path.join(tmpdir, 'mixed_scored.parquet')
+    config = BatchScoringConfig(chunk_size=4, model_path=model_path,
+                                preprocessor_path=preprocessor_path, serving_dir=None)
+
+    summary = BatchScoring(config).score(mixed_input, output_path)
+    scored = pd.read_parquet(output_path)
+
+    assert summary['rows'] == len(scored) == 12
+    assert scored['predicted_price'].isna().tolist() == [i == 5 or i >= 8 for i in range(12)]
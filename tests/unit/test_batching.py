@@ -0,0 +1,73 @@
+import threading
+import numpy as np
+import pandas as pd
+import pytest
+from src.pipeline.batching import MicroBatcher, MicroBatcherConfig
+
+
+def test_concurrent_requests_are_merged():
+    """Requests arriving within the wait window share one predict call"""
+    calls = []
+
+    def predict_fn(frame):
+        calls.append(len(frame))
+        return frame['carat'].to_numpy() * 10
+
+    batcher = MicroBatcher(predict_fn, MicroBatcherConfig(max_batch_size=1000, max_wait_ms=200))
+    results = {}
+
+    def worker(i):
+        results[i] = batcher.predict(pd.DataFrame({'carat': [float(i)]}), timeout=5)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    batcher.close()
+
+    assert sum(calls) == 8
+    assert len(calls) < 8
+    for i in range(8):
+        assert np.allclose(results[i], [i * 10.0])
+
+
+def test_batch_requests_keep_their_rows():
+    """A multi-row request gets back exactly its own predictions"""
+    batcher = MicroBatcher(lambda frame: frame['carat'].to_numpy() + 1)
+    preds = batcher.predict(pd.DataFrame({'carat': [1.0, 2.0, 3.0]}), timeout=5)
+    batcher.close()
+
+    assert list(preds) == [2.0, 3.0, 4.0]
+
+
+def test_failed_prediction_is_raised_to_caller():
+    """An exception raised by predict_fn reaches the caller unchanged"""
+    def fail(frame):
+        raise RuntimeError("model not loaded")
+
+    batcher = MicroBatcher(fail)
+    with pytest.raises(RuntimeError, match="model not loaded"):
+        batcher.predict(pd.DataFrame({'carat': [1.0]}), timeout=5)
+    batcher.close()
+
+
+def test_failing_request_does_not_fail_its_batch():
+    """After a failed merged call each request is retried alone, so only the bad one fails"""
+    calls = []
+
+    def predict_fn(frame):
+        calls.append(len(frame))
+        if (frame['carat'] < 0).any():
+            raise ValueError("negative carat")
+        return frame['carat'].to_numpy() * 10
+
+    batcher = MicroBatcher(predict_fn, MicroBatcherConfig(max_batch_size=1000, max_wait_ms=200))
+    good = batcher.submit(pd.DataFrame({'carat': [1.0, 2.0]}))
+    bad = batcher.submit(pd.DataFrame({'carat': [-1.0]}))
+
+    assert np.allclose(good.result(timeout=5), [10.0, 20.0])
+    with pytest.raises(ValueError, match="negative carat"):
+        bad.result(timeout=5)
+    batcher.close()
+    assert calls == [3, 2, 1]
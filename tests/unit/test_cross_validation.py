@@ -0,0 +1,50 @@
+import os
+import tempfile
+from unittest import mock
+
+import numpy as np
+from sklearn.linear_model import LinearRegression
+from src.components.cross_validation import CrossValidationConfig, CrossValidator
+from src.utils.utils import load_params
+from xgboost import XGBRegressor
+
+
+def test_folds_are_preprocessed_without_leakage(sample_data):
+    """Each fold's preprocessor only sees that fold's training rows"""
+    train = sample_data[0].head(3000)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        validator = CrossValidator(CrossValidationConfig(n_splits=3))
+        X_path, y_path, n_train, feature_types = validator.write_folds(train, 'scaled', tmpdir)
+        X, y = np.load(X_path, mmap_mode='r'), np.load(y_path, mmap_mode='r')
+
+        assert X.shape == (3, 3000, 9) and feature_types is None
+        assert sum(3000 - cut for cut in n_train) == 3000
+        for fold, cut in enumerate(n_train):
+            # the scaler is centred on the training rows, not on the held-out ones
+            assert np.allclose(X[fold, :cut, :6].mean(axis=0), 0.0, atol=1e-3)
+            assert not np.allclose(X[fold, cut:, :6].mean(axis=0), 0.0, atol=1e-3)
+            assert sorted(y[fold]) == sorted(train['price'])
+
+
+def test_parallel_cross_validation_report(sample_data):
+    """Folds run in worker processes and the report has per-model mean/std and a speedup"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        config = CrossValidationConfig(n_splits=3, benchmark_serial=True, scratch_dir=tmpdir)
+        models = {'LinearRegression': LinearRegression(), 'XGBRegressor': XGBRegressor(n_estimators=30)}
+        with mock.patch('os.cpu_count', return_value=2):
+            report = CrossValidator(config).run(sample_data[0].head(2000), models)
+
+        assert report['workers'] == 2 and report['estimated_speedup'] > 0
+        assert report['serial_seconds'] > 0 and report['speedup'] > 0
+        assert report['best_model'] == 'XGBRegressor'
+        for result in report['models'].values():
+            assert [f['fold'] for f in result['folds']] == [0, 1, 2]
+            assert np.isclose(result['r2_mean'], np.mean([f['r2'] for f in result['folds']]))
+            assert result['r2_std'] >= 0
+        assert os.listdir(tmpdir) == []
+
+
+def test_cross_validation_config_from_params_yaml():
+    """The cross_validation block of params.yaml builds a config"""
+    config = CrossValidationConfig.from_params(load_params('params.yaml'))
+    assert config.n_splits >= 2 and not config.enabled
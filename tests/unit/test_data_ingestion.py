@@ -1,3 +1,8 @@
+import pandas as pd
+import pytest
+from src.components.data_ingestion import DataIngestion, DataIngestionConfig
+
+
 def test_data_ingestion(sample_data):
     train, test = sample_data
 
@@ -7,3 +12,35 @@ def test_data_ingestion(sample_data):
         assert col in test.columns
 
     assert train.shape[1] == test.shape[1]
+
+
+def test_data_ingestion_compact_dtypes(sample_data):
+    train, _ = sample_data
+
+    assert 'id' not in train.columns
+    assert str(train['carat'].dtype) == 'float32'
+    assert str(train['cut'].dtype) == 'category'
+
+
+def test_data_ingestion_reuses_cache(tmp_path):
+    pytest.importorskip('pyarrow')
+    data_path = tmp_path / "data.csv"
+    pd.DataFrame({
+        'id': [0, 1], 'carat': [0.5, 1.0], 'cut': ['Ideal', 'Good'], 'color': ['E', 'H'],
+        'clarity': ['VS1', 'SI2'], 'depth': [61.5, 62.0], 'table': [57.0, 58.0],
+        'x': [5.1, 6.4], 'y': [5.1, 6.4], 'z': [3.2, 4.0], 'price': [1500, 5200]
+    }).to_csv(data_path, index=False)
+
+    ingestion = DataIngestion()
+    ingestion.data_config = DataIngestionConfig(
+        data_path=str(data_path),
+        dvc_path=str(tmp_path / "data.csv.dvc"),
+        cache_dir=str(tmp_path / "cache")
+    )
+    first = ingestion.load_data()
+    cached = list((tmp_path / "cache").iterdir())
+    second = ingestion.load_data()
+
+    assert len(cached) == 1
+    assert cached[0].name == f"data-{ingestion.data_fingerprint()}.feather"
+    pd.testing.assert_frame_equal(first, second)
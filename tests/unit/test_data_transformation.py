@@ -1,3 +1,7 @@
+import numpy as np
+from src.components.data_transformation import DataTransform
+
+
 def test_data_transformation(data_transform):
     X_train, X_test, y_train, y_test = data_transform
     
@@ -5,4 +9,14 @@ def test_data_transformation(data_transform):
     assert X_test.shape[0] == y_test.shape[0]
 
     assert not X_train.isnull().any().any()
-    assert not X_test.isnull().any().any()
\ No newline at end of file
+    assert not X_test.isnull().any().any()
+
+def test_data_transformation_is_float32_and_leaves_inputs(sample_data):
+    """Outputs are float32 and the caller's frames keep their target column"""
+    train, test = sample_data
+    columns = list(train.columns)
+    X_train, X_test, y_train, _ = DataTransform().initiate_data_transform(train, test, test=True)
+
+    assert list(train.columns) == columns and 'price' in test.columns
+    assert (X_train.dtypes == np.float32).all() and (X_test.dtypes == np.float32).all()
+    assert X_train.index.equals(y_train.index)
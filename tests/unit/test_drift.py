@@ -0,0 +1,131 @@
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+from src.components.data_transformation import CAT_COLS, CATEGORIES, NUM_COLS
+from src.components.model_registry import ModelRegistry, ModelRegistryConfig
+from src.pipeline.prediction_pipeline import PredictionPipeline, PredictionPipelineConfig
+from src.pipeline.shadow import ShadowConfig, ShadowPipeline
+from src.utils.drift import DriftMonitor, load_profile, profile_from_frame, psi, save_profile
+
+
+def _frames(sample_data):
+    train, test = sample_data
+    return train, test
+
+
+def test_same_distribution_is_stable(sample_data):
+    """Held-out rows from the training distribution report no drift"""
+    train, test = _frames(sample_data)
+    profile = profile_from_frame(train, NUM_COLS, CAT_COLS, CATEGORIES)
+    json.dumps(profile)
+    monitor = DriftMonitor(profile, min_rows=100)
+    monitor.observe(test)
+
+    report = monitor.report()
+    assert report['rows'] == len(test)
+    assert not report['retrain_recommended']
+    for col in NUM_COLS + CAT_COLS:
+        assert report['features'][col]['psi'] < 0.1
+    assert report['features']['carat']['ks'] < report['features']['carat']['ks_critical']
+
+
+def test_shifted_traffic_is_flagged_in_constant_memory(sample_data):
+    """Scaled numerics and unseen categories raise PSI, and state does not grow with rows"""
+    train, test = _frames(sample_data)
+    monitor = DriftMonitor(profile_from_frame(train, NUM_COLS, CAT_COLS, CATEGORIES), min_rows=100)
+    state_size = monitor._counts.size
+    shifted = test.assign(carat=test['carat'] * 1.6, cut=np.where(test['cut'] == 'Ideal', 'Unknown', test['cut']))
+    for start in range(0, len(shifted), 500):
+        monitor.observe(shifted.iloc[start:start + 500])
+
+    report = monitor.report()
+    assert monitor._counts.size == state_size
+    assert report['features']['carat']['status'] == 'significant'
+    assert report['features']['cut']['proportions']['__other__'] > 0.1
+    assert set(report['drifted_features']) >= {'carat', 'cut'}
+    assert report['features']['depth']['status'] == 'stable'
+
+
+def test_submit_is_observed_in_background(sample_data):
+    """Submitted batches are merged and observed by the worker thread"""
+    train, test = _frames(sample_data)
+    monitor = DriftMonitor(profile_from_frame(train, NUM_COLS, CAT_COLS, CATEGORIES), gather_seconds=0.01)
+    batch = test.head(10).assign(color=[None] + ['E'] * 9)
+    for _ in range(5):
+        monitor.submit(batch)
+    monitor.flush()
+
+    report = monitor.report()
+    assert report['rows'] == 50
+    assert np.isclose(report['features']['color']['proportions']['__other__'], 0.1)
+    monitor.reset()
+    assert monitor.report()['rows'] == 0
+
+
+def test_psi_of_identical_distributions_is_zero():
+    """PSI is zero for equal proportions and grows with the shift"""
+    assert psi([0.5, 0.5], [0.5, 0.5]) == 0.0
+    assert psi([0.5, 0.5], [0.6, 0.4]) < psi([0.5, 0.5], [0.9, 0.1])
+
+
+def _publish_with_profile(write_artifacts, registry, workdir, slope, carat):
+    frame = pd.DataFrame({'carat': carat})
+    model_path, preprocessor_path = write_artifacts(workdir, slope, frame)
+    profile_path = os.path.join(workdir, 'reference_profile.json')
+    save_profile(profile_from_frame(frame, ['carat'], [], []), profile_path)
+    return registry.publish(model_path, preprocessor_path, reference_profile_path=profile_path, metrics={},
+                            params={}, data_md5='0' * 32)
+
+
+def test_monitor_follows_the_served_version(tmp_path, write_artifacts):
+    """A promoted version's traffic is compared with that version's own profile"""
+    registry = ModelRegistry(ModelRegistryConfig(root=str(tmp_path / 'registry')))
+    old = _publish_with_profile(write_artifacts, registry, tmp_path, 2.0, np.linspace(0, 1, 200))
+    new = _publish_with_profile(write_artifacts, registry, tmp_path, 3.0, np.linspace(10, 11, 200))
+    registry.promote(old)
+    monitor = DriftMonitor(load_profile(registry.paths(old)['reference_profile_path']), min_rows=1,
+                           gather_seconds=0)
+    pipeline = PredictionPipeline(PredictionPipelineConfig(registry_dir=registry.config.root,
+                                                           reload_check_interval=0.0), drift_monitor=monitor)
+    traffic = pd.DataFrame({'carat': np.linspace(10, 11, 20)})
+
+    pipeline.predict(traffic)
+    monitor.flush()
+    assert monitor.report()['features']['carat']['status'] == 'significant'
+
+    registry.promote(new)
+    deadline = time.monotonic() + 10
+    while pipeline.model_version != new and time.monotonic() < deadline:
+        pipeline.predict(traffic.head(1))
+    pipeline.predict(traffic)
+    monitor.flush()
+
+    report = monitor.report()
+    # the window restarted with the switch; the row that triggered it was scored by the new version
+    assert report['rows'] == len(traffic) + 1
+    assert report['features']['carat']['status'] == 'stable'
+
+
+def test_canary_requests_reach_the_primary_monitor(tmp_path, write_artifacts):
+    """Rows answered by the canary model still count towards the drift window"""
+    registry = ModelRegistry(ModelRegistryConfig(root=str(tmp_path / 'registry')))
+    primary_version = _publish_with_profile(write_artifacts, registry, tmp_path, 2.0, np.linspace(0, 1, 200))
+    canary_version = _publish_with_profile(write_artifacts, registry, tmp_path, 3.0, np.linspace(0, 1, 200))
+    registry.promote(primary_version)
+    monitor = DriftMonitor(load_profile(registry.paths(primary_version)['reference_profile_path']),
+                           gather_seconds=0)
+    primary = PredictionPipeline(PredictionPipelineConfig(registry_dir=registry.config.root), drift_monitor=monitor)
+    canary = PredictionPipeline(PredictionPipelineConfig(registry_dir=registry.config.root,
+                                                         model_version=canary_version))
+    pipeline = ShadowPipeline(primary, canary, ShadowConfig(shadow_version=None, canary_fraction=1.0,
+                                                            log_dir=str(tmp_path / 'shadow')))
+
+    preds = pipeline.predict(pd.DataFrame({'carat': [0.5, 0.6]}))
+    pipeline.close()
+    monitor.flush()
+
+    assert np.allclose(preds, [1.5, 1.8])
+    assert monitor.report()['rows'] == 2
@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+import pytest
+from src.components.data_transformation import DataTransform
+from src.components.fast_preprocessor import FastPreprocessor
+
+
+@pytest.fixture(scope="module")
+def fitted_preprocessor(sample_data):
+    train, _ = sample_data
+    return DataTransform().get_column_transformer().fit(train.drop(columns=['price']))
+
+
+def test_fast_preprocessor_matches_column_transformer(fitted_preprocessor, sample_data):
+    """Compiled preprocessor reproduces the ColumnTransformer output exactly"""
+    _, test = sample_data
+    features = test.drop(columns=['price']).head(500).copy()
+    features.iloc[0, features.columns.get_loc('carat')] = np.nan
+    features.iloc[1, features.columns.get_loc('cut')] = np.nan
+    features['color'] = features['color'].astype(object)
+    features.iloc[2, features.columns.get_loc('color')] = 'Unknown'
+
+    fast = FastPreprocessor.from_column_transformer(fitted_preprocessor)
+    expected = fitted_preprocessor.transform(features)
+    actual = fast.transform(features)
+
+    assert actual.dtype == expected.dtype
+    assert np.array_equal(actual, expected)
+
+
+def test_fast_preprocessor_accepts_dicts_and_arrays(fitted_preprocessor):
+    """A single dict, a list of dicts and a 2-D array all give the same rows"""
+    record = {'carat': 0.5, 'depth': 61.5, 'table': 57.0, 'x': 5.15, 'y': 5.18, 'z': 3.17,
+              'cut': 'Ideal', 'color': 'E', 'clarity': 'VS1'}
+    fast = FastPreprocessor.from_column_transformer(fitted_preprocessor)
+    expected = fitted_preprocessor.transform(pd.DataFrame([record]))
+
+    assert np.array_equal(fast.transform(record), expected)
+    assert np.array_equal(fast.transform([record, record]), np.vstack([expected, expected]))
+    row = [[record[col] for col in fast.input_columns]]
+    assert np.array_equal(fast.transform(row), expected)
+
+
+def test_fast_preprocessor_native_mode_matches_categorical_model(sample_data):
+    """Category codes from the compiled native transformer predict like the pandas categoricals"""
+    from xgboost import XGBRegressor
+    from src.components.model_trainer import NATIVE_CATEGORICAL_PARAMS
+
+    train, test = sample_data
+    native = DataTransform().get_preprocessor('native').fit(train.drop(columns=['price']))
+    X_train = native.transform(train)
+    assert isinstance(X_train['cut'].dtype, pd.CategoricalDtype)
+    model = XGBRegressor(n_estimators=20, max_depth=3, **NATIVE_CATEGORICAL_PARAMS).fit(X_train, train['price'])
+
+    features = test.drop(columns=['price']).head(200).copy()
+    features['cut'] = features['cut'].astype(object)
+    features.iloc[0, features.columns.get_loc('cut')] = 'Unknown'
+    features.iloc[1, features.columns.get_loc('carat')] = np.nan
+    fast = FastPreprocessor.from_column_transformer(native)
+
+    np.testing.assert_array_equal(model.predict(fast.transform(features)), model.predict(native.transform(features)))
@@ -0,0 +1,83 @@
+import numpy as np
+import pytest
+from xgboost import XGBRegressor
+from src.components.data_transformation import DataTransform
+from src.components.fast_preprocessor import FastPreprocessor
+from src.components.forest_compiler import CompiledForest
+from src.components.model_export import export_serving_artifacts
+from src.components.model_trainer import NATIVE_CATEGORICAL_PARAMS
+from src.pipeline.prediction_pipeline import PredictionPipeline, PredictionPipelineConfig
+
+
+@pytest.fixture(scope="module")
+def scaled_model(sample_data):
+    train, test = sample_data
+    preprocessor = DataTransform().get_column_transformer()
+    X_train = preprocessor.fit_transform(train.drop(columns=['price']))
+    model = XGBRegressor(n_estimators=40, max_depth=5).fit(X_train, train['price'])
+    return model, preprocessor, test.drop(columns=['price']).head(300)
+
+
+def test_compiled_forest_matches_booster(scaled_model, tmp_path):
+    """Flattened trees reproduce the booster, missing values included, after a save/load"""
+    model, preprocessor, features = scaled_model
+    X = preprocessor.transform(features).astype(np.float32)
+    X[::7, 0] = np.nan
+    X[::11, 5] = np.nan
+
+    forest = CompiledForest.from_booster(model.get_booster())
+    forest.save(str(tmp_path / 'forest.npz'))
+    loaded = CompiledForest.load(str(tmp_path / 'forest.npz'))
+
+    expected = model.get_booster().inplace_predict(X)
+    np.testing.assert_allclose(loaded.predict(X), expected, rtol=1e-5, atol=1e-3)
+    np.testing.assert_allclose(loaded.predict(X[:1]), expected[:1], rtol=1e-5, atol=1e-3)
+    assert forest.verify(model.get_booster(), forest.probe())
+
+
+def test_compiled_forest_routes_infinite_values(scaled_model):
+    """+inf and -inf features follow the booster through real and padded splits"""
+    model, preprocessor, features = scaled_model
+    X = preprocessor.transform(features).astype(np.float32)
+    # padded splits read feature 0, so +inf there used to take the wrong branch
+    X[::2, 0] = np.inf
+    X[1::4, 0] = -np.inf
+    X[::3, 5] = np.inf
+
+    forest = CompiledForest.from_booster(model.get_booster())
+
+    expected = model.get_booster().inplace_predict(X)
+    np.testing.assert_allclose(forest.predict(X), expected, rtol=1e-5, atol=1e-3)
+
+
+def test_compiled_forest_handles_categorical_splits(sample_data):
+    """Category bitmasks route codes like XGBoost, unknown categories included"""
+    train, test = sample_data
+    native = DataTransform().get_preprocessor('native').fit(train)
+    model = XGBRegressor(n_estimators=30, max_depth=4, **NATIVE_CATEGORICAL_PARAMS).fit(native.transform(train), train['price'])
+    features = test.drop(columns=['price']).head(300).copy()
+    features['clarity'] = features['clarity'].astype(object)
+    features.iloc[0, features.columns.get_loc('clarity')] = 'Unknown'
+    X = FastPreprocessor.from_column_transformer(native).transform(features)
+
+    forest = CompiledForest.from_booster(model.get_booster())
+    assert forest.has_categorical
+    np.testing.assert_allclose(forest.predict(X), model.predict(native.transform(features)), rtol=1e-5, atol=1e-3)
+
+
+def test_pipeline_serves_small_batches_from_forest(scaled_model, tmp_path):
+    """The exported forest answers small batches and agrees with the booster path"""
+    model, preprocessor, features = scaled_model
+    manifest = export_serving_artifacts(model, preprocessor, str(tmp_path / 'serving'))
+    assert 'forest' in manifest['files']
+
+    config = PredictionPipelineConfig(
+        model_path=str(tmp_path / 'missing.pkl'),
+        preprocessor_path=str(tmp_path / 'missing.pkl'),
+        serving_dir=str(tmp_path / 'serving')
+    )
+    pipeline = PredictionPipeline(config)
+    assert pipeline.store.get().forest is not None
+    expected = model.predict(preprocessor.transform(features))
+    np.testing.assert_allclose(pipeline.predict(features.head(1)), expected[:1], rtol=1e-5, atol=1e-3)
+    np.testing.assert_allclose(pipeline.predict(features), expected, rtol=1e-5, atol=1e-3)
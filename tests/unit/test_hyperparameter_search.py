@@ -0,0 +1,36 @@
+from src.components.hyperparameter_search import HyperparameterSearch, HyperparameterSearchConfig
+from src.utils.utils import load_params
+
+
+def test_search_config_from_params_yaml():
+    """The search block and model block of params.yaml build a valid config"""
+    config = HyperparameterSearchConfig.from_params(load_params('params.yaml'))
+
+    assert config.max_estimators == load_params('params.yaml')['model']['n_estimators']
+    assert 'n_estimators' not in config.base_params
+    assert config.space
+
+
+def test_successive_halving_budgets():
+    """Rung budgets grow by eta and always end at max_estimators"""
+    config = HyperparameterSearchConfig(space={'max_depth': list(range(27))},
+                                        min_estimators=10, max_estimators=300, eta=3)
+    assert HyperparameterSearch(config).rungs(27) == [10, 30, 90, 300]
+    assert HyperparameterSearch(config).rungs(1) == [300]
+
+
+def test_parallel_search_prunes_candidates(data_transform):
+    """Bad candidates are dropped after the first rung and the best one is returned"""
+    X_train, _, y_train, _ = data_transform
+    config = HyperparameterSearchConfig(
+        space={'max_depth': [1, 4], 'learning_rate': [0.01, 0.2]},
+        min_estimators=10, max_estimators=30, eta=2, n_jobs=2,
+        early_stopping_rounds=5
+    )
+
+    best_params, leaderboard = HyperparameterSearch(config).run(X_train.head(2000), y_train.head(2000))
+
+    assert len([r for r in leaderboard if r['rung'] == 0]) == 4
+    assert len([r for r in leaderboard if r['rung'] == 1]) == 2
+    assert 1 <= best_params['n_estimators'] <= 30
+    assert best_params['max_depth'] in (1, 4)
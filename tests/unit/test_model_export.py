@@ -0,0 +1,77 @@
+import json
+import os
+import numpy as np
+import pytest
+from xgboost import XGBRegressor
+from src.components.data_transformation import DataTransform
+from src.components.model_export import (
+    MANIFEST_NAME,
+    export_serving_artifacts,
+    load_serving_artifacts
+)
+from src.pipeline.prediction_pipeline import PredictionPipeline, PredictionPipelineConfig
+
+
+@pytest.fixture(scope="module")
+def trained_pair(sample_data):
+    train, test = sample_data
+    preprocessor = DataTransform().get_column_transformer()
+    X_train = preprocessor.fit_transform(train.drop(columns=['price']))
+    model = XGBRegressor(n_estimators=20, max_depth=3).fit(X_train, train['price'])
+    return model, preprocessor, test.drop(columns=['price']).head(200)
+
+
+def test_serving_artifacts_roundtrip(trained_pair, tmp_path):
+    """Native booster + sidecar reproduce the pickled model's predictions"""
+    model, preprocessor, features = trained_pair
+    manifest = export_serving_artifacts(model, preprocessor, str(tmp_path))
+
+    loaded_model, loaded_preprocessor = load_serving_artifacts(str(tmp_path))
+    expected = model.predict(preprocessor.transform(features))
+    actual = loaded_model.predict(loaded_preprocessor.transform(features))
+
+    assert manifest['feature_order'] == ['carat', 'depth', 'table', 'x', 'y', 'z', 'cut', 'color', 'clarity']
+    assert set(manifest['files']) == set(manifest['sha256'])
+    assert np.array_equal(actual, expected)
+
+
+def test_serving_artifacts_detect_corruption(trained_pair, tmp_path):
+    """A payload file that no longer matches its manifest hash is rejected"""
+    model, preprocessor, _ = trained_pair
+    manifest = export_serving_artifacts(model, preprocessor, str(tmp_path))
+    with open(tmp_path / manifest['files']['preprocessor_spec'], 'a') as f:
+        f.write(' ')
+
+    with pytest.raises(ValueError):
+        load_serving_artifacts(str(tmp_path))
+
+
+def test_prediction_pipeline_prefers_serving_format(trained_pair, tmp_path):
+    """PredictionPipeline serves from the manifest even without pickles"""
+    model, preprocessor, features = trained_pair
+    serving_dir = tmp_path / "serving"
+    export_serving_artifacts(model, preprocessor, str(serving_dir))
+    config = PredictionPipelineConfig(
+        model_path=str(tmp_path / "missing_model.pkl"),
+        preprocessor_path=str(tmp_path / "missing_preprocessor.pkl"),
+        serving_dir=str(serving_dir)
+    )
+
+    preds = PredictionPipeline(config).predict(features)
+
+    assert os.path.exists(serving_dir / MANIFEST_NAME)
+    assert np.array_equal(preds, model.predict(preprocessor.transform(features)))
+
+
+def test_deferred_booster_serves_from_forest_until_loaded(trained_pair, tmp_path):
+    """With defer_booster the forest answers at once and the booster takes over once read"""
+    model, preprocessor, features = trained_pair
+    export_serving_artifacts(model, preprocessor, str(tmp_path))
+
+    loaded_model, loaded_preprocessor = load_serving_artifacts(str(tmp_path), defer_booster=True)
+    X = loaded_preprocessor.transform(features)
+    expected = model.predict(preprocessor.transform(features))
+    np.testing.assert_allclose(loaded_model.predict(X), expected, rtol=1e-5, atol=1e-3)
+
+    assert loaded_model.booster.num_features() == X.shape[1]
+    assert np.array_equal(loaded_model.predict(X), expected)
@@ -0,0 +1,141 @@
+import os
+import stat
+import tempfile
+import time
+
+import numpy as np
+import pytest
+from xgboost import XGBRegressor
+from src.components.data_transformation import DataTransform
+from src.components.model_export import export_serving_artifacts
+from src.components.model_registry import ModelRegistry, ModelRegistryConfig
+from src.pipeline.prediction_pipeline import PredictionPipeline, PredictionPipelineConfig
+from src.utils.utils import save_object
+
+
+def _publish(write_artifacts, registry, workdir, slope):
+    model_path, preprocessor_path = write_artifacts(workdir, slope)
+    return registry.publish(model_path, preprocessor_path, metrics={"r2_score": slope},
+                            params={"model": {"slope": slope}}, data_md5="0" * 32)
+
+
+def test_publish_creates_immutable_versions(write_artifacts):
+    """Each publish gets its own read-only directory with metadata"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        registry = ModelRegistry(ModelRegistryConfig(root=os.path.join(tmpdir, "registry")))
+        first = _publish(write_artifacts, registry, tmpdir, slope=2.0)
+        second = _publish(write_artifacts, registry, tmpdir, slope=3.0)
+
+        assert registry.versions() == [first, second]
+        assert first.startswith("0001-") and second.startswith("0002-")
+        metadata = registry.metadata(second)
+        assert metadata["metrics"] == {"r2_score": 3.0}
+        assert metadata["data_md5"] == "0" * 32
+        assert set(metadata["files"]) == {"model.pkl", "preprocessor.pkl"}
+        assert not os.stat(registry.paths(first)["model_path"]).st_mode & stat.S_IWUSR
+        assert not any(name.startswith(".staging") for name in os.listdir(registry.versions_dir))
+
+
+def test_publish_reuses_identical_version(write_artifacts):
+    """Publishing byte-identical artifacts again returns the existing version"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        registry = ModelRegistry(ModelRegistryConfig(root=os.path.join(tmpdir, "registry")))
+        first = _publish(write_artifacts, registry, tmpdir, slope=2.0)
+        again = _publish(write_artifacts, registry, tmpdir, slope=2.0)
+        other = _publish(write_artifacts, registry, tmpdir, slope=3.0)
+
+        assert again == first
+        assert registry.versions() == [first, other]
+        assert not any(name.startswith(".staging") for name in os.listdir(registry.versions_dir))
+
+
+def test_retrain_with_identical_artifacts_reuses_version(sample_data, tmp_path, monkeypatch):
+    """Two exports of the same model publish one version though their manifests differ in created_at"""
+    train, _ = sample_data
+    preprocessor = DataTransform().get_column_transformer()
+    X_train = preprocessor.fit_transform(train.drop(columns=['price']).head(500))
+    model = XGBRegressor(n_estimators=5, max_depth=2).fit(X_train, train['price'].head(500))
+    stamps = iter(['2026-01-01T00:00:00', '2026-01-01T00:00:01', '2026-01-01T00:00:02', '2026-01-01T00:00:03'])
+    monkeypatch.setattr(time, 'strftime', lambda *args: next(stamps))
+    registry = ModelRegistry(ModelRegistryConfig(root=str(tmp_path / 'registry')))
+
+    versions = []
+    for run in ('first', 'second'):
+        workdir = tmp_path / run
+        export_serving_artifacts(model, preprocessor, str(workdir / 'serving'))
+        save_object(str(workdir / 'model.pkl'), model)
+        save_object(str(workdir / 'preprocessor.pkl'), preprocessor)
+        versions.append(registry.publish(str(workdir / 'model.pkl'), str(workdir / 'preprocessor.pkl'),
+                                         serving_dir=str(workdir / 'serving'), data_md5='0' * 32))
+
+    assert (tmp_path / 'first' / 'serving' / 'manifest.json').read_text() != \
+        (tmp_path / 'second' / 'serving' / 'manifest.json').read_text()
+    assert versions[0] == versions[1]
+    assert registry.versions() == versions[:1]
+
+
+def test_promote_resolve_and_prune(write_artifacts):
+    """CURRENT moves only on promote, and prune keeps the current and pinned versions"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        registry = ModelRegistry(ModelRegistryConfig(root=os.path.join(tmpdir, "registry"), keep=1))
+        with pytest.raises(LookupError):
+            registry.resolve("current")
+        versions = [_publish(write_artifacts, registry, tmpdir, slope=s) for s in (1.0, 2.0, 3.0)]
+        registry.promote(versions[0])
+
+        assert registry.resolve("current") == versions[0]
+        assert registry.resolve("latest") == versions[2]
+        registry.pin(versions[1])
+        assert registry.pinned() == [versions[1]]
+        assert registry.prune() == []
+        registry.unpin(versions[1])
+        assert registry.prune() == [versions[1]]
+        assert registry.versions() == [versions[0], versions[2]]
+        with pytest.raises(LookupError):
+            registry.promote("9999-deadbeef")
+
+
+def test_pipeline_serves_pinned_and_current_versions(write_artifacts):
+    """Pinned pipelines stay put while a 'current' pipeline follows promotions"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = os.path.join(tmpdir, "registry")
+        registry = ModelRegistry(ModelRegistryConfig(root=root))
+        old = _publish(write_artifacts, registry, tmpdir, slope=2.0)
+        new = _publish(write_artifacts, registry, tmpdir, slope=5.0)
+        registry.promote(old)
+
+        current = PredictionPipeline(PredictionPipelineConfig(registry_dir=root, reload_check_interval=0.0))
+        canary = PredictionPipeline(PredictionPipelineConfig(registry_dir=root, model_version=new))
+        assert np.allclose(current.predict(np.array([[1.0]])), [2.0])
+        assert np.allclose(canary.predict(np.array([[1.0]])), [5.0])
+
+        registry.promote(new)
+        deadline = time.monotonic() + 10
+        while current.model_version != new and time.monotonic() < deadline:
+            current.predict(np.array([[1.0]]))
+        assert current.model_version == new
+        assert current.store is canary.store
+        assert np.allclose(current.predict(np.array([[1.0]])), [5.0])
+
+
+def test_pinned_store_survives_a_promotion(write_artifacts):
+    """A version another pipeline pins stays shared after a 'current' pipeline moves off it"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = os.path.join(tmpdir, "registry")
+        registry = ModelRegistry(ModelRegistryConfig(root=root))
+        old = _publish(write_artifacts, registry, tmpdir, slope=2.0)
+        new = _publish(write_artifacts, registry, tmpdir, slope=5.0)
+        registry.promote(old)
+
+        current = PredictionPipeline(PredictionPipelineConfig(registry_dir=root, reload_check_interval=0.0))
+        pinned = PredictionPipeline(PredictionPipelineConfig(registry_dir=root, model_version=old))
+        current.predict(np.array([[1.0]]))
+        pinned.predict(np.array([[1.0]]))
+        current.warm(new)
+        registry.promote(new)
+        current.predict(np.array([[1.0]]))
+        assert current.model_version == new
+
+        later = PredictionPipeline(PredictionPipelineConfig(registry_dir=root, model_version=old))
+        assert np.allclose(later.predict(np.array([[1.0]])), [2.0])
+        assert later.store is pinned.store
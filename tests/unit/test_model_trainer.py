@@ -1,4 +1,6 @@
 import os
+import subprocess
+import sys
 import pytest
 from src.components.model_trainer import ModelTrainer
 from src.utils.utils import load_object
@@ -44,4 +46,12 @@ def test_model_output_shape(data_transform):
     model = load_object(trainer.config.model_path)
     predictions = model.predict(X_test)
     
-    assert predictions.shape[0] == X_test.shape[0]
\ No newline at end of file
+    assert predictions.shape[0] == X_test.shape[0]
+
+
+def test_model_trainer_import_defers_training_packages():
+    """Importing the trainer module does not load xgboost or sklearn until training starts"""
+    code = ("import sys, src.components.model_trainer; "
+            "print([p for p in ('sklearn', 'xgboost') if p in sys.modules])")
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == "[]"
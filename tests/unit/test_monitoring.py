@@ -0,0 +1,47 @@
+import asyncio
+import json
+import pytest
+from src.utils.monitoring import Counter, Histogram, Registry, STAGE_SECONDS, ERRORS, timed
+
+
+def test_registry_renders_prometheus_text():
+    """Counters and histograms render in the Prometheus text format with cumulative buckets"""
+    registry = Registry()
+    requests = registry.register(Counter('requests_total', 'Requests.', ['route']))
+    latency = registry.register(Histogram('latency_seconds', 'Latency.', buckets=(0.1, 1.0)))
+    requests.labels('predict').inc()
+    requests.labels('predict').inc(2)
+    for value in (0.05, 0.5, 5.0):
+        latency.observe(value)
+
+    text = registry.render()
+    assert '# TYPE requests_total counter' in text
+    assert 'requests_total{route="predict"} 3.0' in text
+    assert 'latency_seconds_bucket{le="0.1"} 1' in text
+    assert 'latency_seconds_bucket{le="1.0"} 2' in text
+    assert 'latency_seconds_bucket{le="+Inf"} 3' in text
+    assert 'latency_seconds_count 3' in text
+    assert 'latency_seconds_sum 5.55' in text
+
+
+def test_timed_counts_errors_per_stage():
+    """A stage that raises is still timed and counted as an error"""
+    calls = STAGE_SECONDS.labels('test_stage')
+    before = sum(calls.counts)
+    with pytest.raises(ValueError):
+        with timed('test_stage'):
+            raise ValueError("bad input")
+    assert sum(calls.counts) == before + 1
+    assert ERRORS.labels('test_stage').value >= 1
+
+
+def test_metrics_route_reports_requests(diamond, fake_pipeline, asgi_app, asgi_request):
+    """The ASGI app exposes request counts and stage latencies on /metrics"""
+    app = asgi_app(fake_pipeline())
+    asyncio.run(asgi_request(app, 'POST', '/api/v1/predict', json.dumps([diamond]).encode()))
+
+    status, body = asyncio.run(asgi_request(app, 'GET', '/metrics'))
+    text = body.decode()
+    assert status == 200
+    assert 'diamond_http_requests_total{route="predict_batch",status="200"}' in text
+    assert 'diamond_stage_seconds_count{stage="parse"}' in text
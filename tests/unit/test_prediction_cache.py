@@ -0,0 +1,108 @@
+import time
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.linear_model import LinearRegression
+from src.components.data_transformation import DataTransform
+from src.pipeline.prediction_cache import (
+    CacheBackend,
+    InMemorySharedBackend,
+    PredictionCache,
+    PredictionCacheConfig
+)
+from src.pipeline.prediction_pipeline import PredictionPipeline, PredictionPipelineConfig
+from src.utils.utils import get_data_as_dataframe, save_object
+
+
+def _diamond(carat):
+    return get_data_as_dataframe(carat=carat, depth=61.5, table=57.0, x=5.15, y=5.18, z=3.17,
+                                 cut='Ideal', color='E', clarity='VS1')
+
+
+def test_lru_eviction_and_counters():
+    """Least recently used entries are evicted once the cache is full"""
+    cache = PredictionCache(PredictionCacheConfig(max_entries=2, ttl_seconds=None))
+    keys = [cache.keys_for(_diamond(c), 'v1')[0] for c in (0.5, 0.6, 0.7)]
+
+    cache.set_many([(keys[0], 1.0), (keys[1], 2.0)], 'v1')
+    assert cache.get_many([keys[0]], 'v1') == [1.0]
+    cache.set_many([(keys[2], 3.0)], 'v1')
+
+    assert cache.get_many(keys, 'v1') == [1.0, None, 3.0]
+    stats = cache.stats()
+    assert stats['evictions'] == 1
+    assert stats['hits'] == 3
+    assert stats['misses'] == 1
+
+
+def test_ttl_expiry_and_version_invalidation():
+    """Entries expire after the TTL and vanish when the model version changes"""
+    cache = PredictionCache(PredictionCacheConfig(ttl_seconds=0.05))
+    key = cache.keys_for(_diamond(0.5), 'v1')[0]
+    cache.set_many([(key, 1.0)], 'v1')
+    time.sleep(0.1)
+    assert cache.get_many([key], 'v1') == [None]
+
+    cache.set_many([(key, 1.0)], 'v1')
+    new_key = cache.keys_for(_diamond(0.5), 'v2')[0]
+    assert cache.get_many([new_key], 'v2') == [None]
+    assert cache.stats()['size'] == 0
+
+
+def test_shared_backend_fills_local_tier():
+    """A second cache sharing the backend reuses the first one's results"""
+    backend = InMemorySharedBackend()
+    first = PredictionCache(backend=backend)
+    second = PredictionCache(backend=backend)
+    key = first.keys_for(_diamond(0.5), 'v1')[0]
+
+    first.set_many([(key, 42.0)], 'v1')
+
+    assert second.get_many([key], 'v1') == [42.0]
+    assert second.stats()['shared_hits'] == 1
+    assert second.stats()['size'] == 1
+
+
+def test_rows_with_missing_values_hit():
+    """NaN and None features key the same way every time, so such rows are cached too"""
+    cache = PredictionCache(PredictionCacheConfig(decimals=2))
+    row = _diamond(0.5).assign(depth=np.nan, color=None)
+    key = cache.keys_for(row, 'v1')[0]
+    cache.set_many([(key, 7.0)], 'v1')
+
+    again = _diamond(0.5).assign(depth=float('nan'), color=np.nan)
+    assert cache.keys_for(again, 'v1')[0] == key
+    assert cache.get_many(cache.keys_for(again, 'v1'), 'v1') == [7.0]
+
+
+def test_backend_interface_is_abstract():
+    """A backend that misses one of the interface methods cannot be created"""
+    class Partial(CacheBackend):
+        def get_many(self, keys):
+            return [None] * len(keys)
+
+    with pytest.raises(TypeError):
+        Partial()
+
+
+def test_pipeline_serves_repeated_rows_from_cache(sample_data, tmp_path):
+    """Only unseen diamonds reach the model, and results match uncached predictions"""
+    train, _ = sample_data
+    preprocessor = DataTransform().get_column_transformer()
+    model = LinearRegression().fit(preprocessor.fit_transform(train.drop(columns=['price'])), train['price'])
+    save_object(str(tmp_path / 'model.pkl'), model)
+    save_object(str(tmp_path / 'preprocessor.pkl'), preprocessor)
+    config = PredictionPipelineConfig(model_path=str(tmp_path / 'model.pkl'),
+                                      preprocessor_path=str(tmp_path / 'preprocessor.pkl'),
+                                      serving_dir=None)
+    cache = PredictionCache()
+    pipeline = PredictionPipeline(config, cache=cache)
+
+    features = pd.concat([_diamond(0.5), _diamond(0.9)], ignore_index=True)
+    first = pipeline.predict(_diamond(0.5))
+    batch = pipeline.predict(features)
+
+    assert batch[0] == first[0]
+    assert np.allclose(batch, PredictionPipeline(config).predict(features))
+    assert cache.stats()['hits'] == 1
+    assert cache.stats()['misses'] == 2
@@ -0,0 +1,68 @@
+import os
+import subprocess
+import sys
+import tempfile
+import numpy as np
+import pytest
+from src.pipeline.prediction_pipeline import (
+    ArtifactStore,
+    PredictionPipeline,
+    PredictionPipelineConfig
+)
+from src.utils.monitoring import ERRORS
+
+
+def test_artifacts_loaded_once_per_process(write_artifacts):
+    """Pipelines pointing at the same files share one loaded pair"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        model_path, preprocessor_path = write_artifacts(tmpdir, slope=2.0)
+        config = PredictionPipelineConfig(model_path=model_path, preprocessor_path=preprocessor_path,
+                                          serving_dir=None)
+
+        first = PredictionPipeline(config)
+        second = PredictionPipeline(config)
+
+        assert first.store is second.store
+        assert first.store.get() is second.store.get()
+        assert np.allclose(first.predict(np.array([[3.0]])), [6.0])
+
+
+def test_artifacts_hot_reload_on_change(write_artifacts):
+    """A new artifact pair on disk is picked up without restarting"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        model_path, preprocessor_path = write_artifacts(tmpdir, slope=2.0)
+        store = ArtifactStore(model_path, preprocessor_path, reload_check_interval=0.0)
+
+        old = store.get()
+        write_artifacts(tmpdir, slope=5.0)
+        # make sure the mtime moves even on coarse-grained filesystems
+        stat = os.stat(model_path)
+        os.utime(model_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        new = store.get()
+
+        assert new is not old
+        assert new.version != old.version
+        # the old pair is still usable by requests that already hold it
+        assert np.allclose(old.model.predict(old.preprocessor.transform([[1.0]])), [2.0])
+        assert np.allclose(new.model.predict(new.preprocessor.transform([[1.0]])), [5.0])
+
+
+def test_prediction_errors_are_raised(write_artifacts):
+    """A failing prediction raises and is counted instead of returning None"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        model_path, preprocessor_path = write_artifacts(tmpdir, slope=2.0)
+        pipeline = PredictionPipeline(PredictionPipelineConfig(
+            model_path=model_path, preprocessor_path=preprocessor_path, serving_dir=None))
+        before = ERRORS.labels('predict').value
+
+        with pytest.raises(ValueError):
+            pipeline.predict(np.array([[1.0, 2.0]]))
+        assert ERRORS.labels('predict').value == before + 1
+
+
+def test_serving_import_skips_training_packages():
+    """Importing the serving modules does not load sklearn, xgboost or mlflow"""
+    code = ("import sys, src.pipeline.serving, src.pipeline.batch_scoring; "
+            "print([p for p in ('sklearn', 'xgboost', 'mlflow') if p in sys.modules])")
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == "[]"
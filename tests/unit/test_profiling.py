@@ -0,0 +1,51 @@
+import json
+import os
+import numpy as np
+import pytest
+from src.pipeline.training_pipeline import TrainingPipeline, TrainingPipelineConfig
+from src.utils.profiling import StageProfiler
+
+
+def test_stage_profiler_records_timings_and_dumps(tmp_path):
+    """Each stage gets wall/CPU time, RSS, shapes and a loadable cProfile dump"""
+    profiler = StageProfiler(enabled=True, profile_dir=str(tmp_path / 'prof'))
+    with profiler.stage('square') as stage:
+        data = np.arange(10_000.0).reshape(100, 100)
+        stage.record_shapes(data=data, rows=list(range(3)))
+    with pytest.raises(ValueError):
+        with profiler.stage('broken'):
+            raise ValueError("boom")
+
+    square, broken = profiler.stages
+    assert square['status'] == 'ok' and broken['status'] == 'error'
+    assert square['shapes'] == {'data': [100, 100], 'rows': [3]}
+    assert square['wall_seconds'] >= 0 and square['cpu_seconds'] >= 0
+    assert os.path.exists(square['profile'])
+
+    report_path = profiler.write_report(str(tmp_path / 'run_report.json'))
+    with open(report_path) as f:
+        assert [stage['stage'] for stage in json.load(f)['stages']] == ['square', 'broken']
+
+
+def test_disabled_profiler_writes_nothing(tmp_path):
+    """Profiling is opt-in"""
+    profiler = StageProfiler()
+    with profiler.stage('noop') as stage:
+        stage.record_shapes(rows=[1])
+    assert profiler.stages == []
+    assert profiler.write_report(str(tmp_path / 'run_report.json')) is None
+
+
+def test_pipeline_profiles_stages(monkeypatch):
+    """With profiling on, ingestion and transform report their output shapes"""
+    monkeypatch.delenv('TRAINING_PROFILE_DIR', raising=False)
+    pipeline = TrainingPipeline(TrainingPipelineConfig(use_stage_cache=False, profile=True))
+    train, test = pipeline.start_data_ingestion()
+    train_shape = list(train.shape)
+    X_train, X_test, y_train, y_test = pipeline.start_data_transform(train, test)
+
+    ingestion, transform = pipeline.profiler.stages
+    assert ingestion['shapes']['train'] == train_shape
+    assert transform['shapes']['X_train'] == list(X_train.shape)
+    assert transform['shapes']['y_test'] == [len(y_test)]
+    assert ingestion['cached'] is False
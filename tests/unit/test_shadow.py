@@ -0,0 +1,85 @@
+import os
+import tempfile
+
+import numpy as np
+from src.pipeline.prediction_pipeline import PredictionPipeline, PredictionPipelineConfig
+from src.pipeline.shadow import RECORD_DTYPE, ShadowConfig, ShadowPipeline, read_log, summarize
+from src.utils.monitoring import MODEL_INFO
+
+
+def _pipeline(write_artifacts, tmpdir, slope, stage_prefix=''):
+    directory = os.path.join(tmpdir, f"slope-{slope}")
+    os.makedirs(directory)
+    model_path, preprocessor_path = write_artifacts(directory, slope)
+    return PredictionPipeline(PredictionPipelineConfig(
+        model_path=model_path, preprocessor_path=preprocessor_path, serving_dir=None, registry_dir=None,
+        stage_prefix=stage_prefix))
+
+
+class _Failing:
+    cache = None
+
+    def predict(self, features, monitor_drift=True):
+        raise RuntimeError("shadow model unavailable")
+
+
+def test_shadow_scores_in_background_and_logs_pairs(write_artifacts):
+    """Responses come from the primary model and the log pairs both predictions"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        log_dir = os.path.join(tmpdir, "shadow")
+        pipeline = ShadowPipeline(_pipeline(write_artifacts, tmpdir, 2.0), _pipeline(write_artifacts, tmpdir, 5.0),
+                                  ShadowConfig(shadow_version=None, canary_fraction=0.0, log_dir=log_dir))
+        for start in range(0, 9, 3):
+            preds = pipeline.predict(np.arange(start, start + 3, dtype=float).reshape(-1, 1))
+            assert np.allclose(preds, 2.0 * np.arange(start, start + 3))
+        pipeline.close()
+
+        records = read_log(pipeline.log.path)
+        assert len(records) == 9
+        assert np.allclose(records["shadow"] - records["primary"], 3.0 * np.arange(9), atol=1e-3)
+        report = summarize(log_dir)
+        assert report["rows"] == 9 and report["batches"] == 3 and report["canary_rows"] == 0
+        assert np.isclose(report["abs_delta_max"], 24.0, atol=1e-3)
+
+
+def test_canary_serves_candidate_and_falls_back(write_artifacts):
+    """Canary traffic is answered by the candidate unless it fails"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        primary = _pipeline(write_artifacts, tmpdir, 2.0)
+        canary = ShadowPipeline(primary, _pipeline(write_artifacts, tmpdir, 5.0), ShadowConfig(
+            shadow_version=None, canary_fraction=1.0, log_dir=os.path.join(tmpdir, "canary")))
+        assert np.allclose(canary.predict(np.array([[1.0]])), [5.0])
+        canary.close()
+        assert read_log(canary.log.path)["canary"].tolist() == [1]
+
+        broken = ShadowPipeline(primary, _Failing(), ShadowConfig(
+            shadow_version=None, canary_fraction=1.0, log_dir=os.path.join(tmpdir, "broken")))
+        assert np.allclose(broken.predict(np.array([[1.0]])), [2.0])
+        broken.close()
+        assert not os.path.exists(broken.log.path)
+
+
+def test_model_info_keeps_primary_and_shadow_versions(write_artifacts):
+    """The model info gauge shows the version of each role, not only the last one loaded"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        primary = _pipeline(write_artifacts, tmpdir, 2.0)
+        shadow = _pipeline(write_artifacts, tmpdir, 5.0, stage_prefix="shadow_")
+        pipeline = ShadowPipeline(primary, shadow, ShadowConfig(
+            shadow_version=None, canary_fraction=0.0, log_dir=os.path.join(tmpdir, "shadow")))
+        pipeline.predict(np.array([[1.0]]))
+        pipeline.close()
+
+        series = "\n".join(MODEL_INFO.collect())
+        assert f'role="primary",version="{primary.store.get().version}"' in series
+        assert f'role="shadow",version="{shadow.store.get().version}"' in series
+
+
+def test_read_log_ignores_torn_record():
+    """A partially written trailing record is skipped"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, "shadow-test.bin")
+        records = np.zeros(2, dtype=RECORD_DTYPE)
+        records["primary"] = [1.0, 2.0]
+        with open(path, "wb") as f:
+            f.write(records.tobytes() + b"\x00" * 5)
+        assert read_log(path)["primary"].tolist() == [1.0, 2.0]
@@ -0,0 +1,34 @@
+import numpy as np
+from src.utils.sketches import QuantileSketch, RunningMoments
+
+
+def test_running_moments_merge_matches_numpy():
+    """Chunked moments equal the moments of the whole array, NaNs ignored"""
+    values = np.random.default_rng(0).normal(3.0, 2.0, 10_001)
+    values[::97] = np.nan
+    moments = RunningMoments()
+    for chunk in np.array_split(values, 7):
+        moments.update(chunk)
+
+    observed = values[~np.isnan(values)]
+    assert moments.count == len(observed)
+    assert np.isclose(moments.mean, observed.mean())
+    assert np.isclose(moments.variance, observed.var())
+
+    filled = np.where(np.isnan(values), 5.0, values)
+    with_fill = moments.with_constant(5.0, int(np.isnan(values).sum()))
+    assert np.isclose(with_fill.mean, filled.mean()) and np.isclose(with_fill.variance, filled.var())
+
+
+def test_quantile_sketch_exact_then_sampled():
+    """Medians are exact below capacity and close above it"""
+    values = np.random.default_rng(1).lognormal(size=50_000)
+    exact = QuantileSketch(capacity=100_000)
+    sampled = QuantileSketch(capacity=5_000)
+    for chunk in np.array_split(values, 10):
+        exact.update(chunk)
+        sampled.merge(QuantileSketch(capacity=5_000, seed=len(chunk)).update(chunk))
+
+    assert exact.exact and exact.median() == np.median(values)
+    assert not sampled.exact and len(sampled.sample()) == 5_000
+    assert abs(np.mean(values <= sampled.median()) - 0.5) < 0.03
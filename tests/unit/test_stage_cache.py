@@ -0,0 +1,104 @@
+import functools
+import os
+import numpy as np
+import pandas as pd
+from src.components import data_transformation, model_trainer
+from src.components.data_ingestion import DataIngestion
+from src.pipeline import stage_cache
+from src.pipeline.stage_cache import StageCache, code_fingerprint, frame_fingerprint
+from src.pipeline.training_pipeline import TrainingPipeline, TrainingPipelineConfig
+
+
+def test_stage_cache_roundtrip_and_eviction(tmp_path):
+    """Entries are addressed by key and only the newest ones are kept"""
+    cache = StageCache(str(tmp_path), keep=2)
+    keys = [StageCache.key('data', i) for i in range(3)]
+
+    for i, key in enumerate(keys):
+        cache.save('stage', key, {'value': i})
+        os.utime(tmp_path / f"stage-{key}.pkl", (i, i))
+
+    assert StageCache.key('data', 1) == keys[1]
+    assert cache.load('stage', keys[0]) is None
+    assert cache.load('stage', keys[2]) == {'value': 2}
+    assert len(os.listdir(tmp_path)) == 2
+
+
+def test_frame_fingerprint_tracks_content():
+    """Identical frames share a fingerprint, any changed cell changes it"""
+    frame = pd.DataFrame({'carat': [0.5, 1.0], 'cut': ['Ideal', 'Good']})
+    changed = frame.copy()
+    changed.loc[1, 'carat'] = 1.01
+
+    assert frame_fingerprint(frame) == frame_fingerprint(frame.copy())
+    assert frame_fingerprint(frame) != frame_fingerprint(changed)
+
+
+def test_code_fingerprint_covers_imported_modules(monkeypatch):
+    """The fingerprint hashes the src modules a stage imports, not just its own file"""
+    hashed = []
+    monkeypatch.setattr(stage_cache, 'file_digest', lambda path: hashed.append(path) or path)
+
+    code_fingerprint(data_transformation)
+
+    hashed = [path.replace(os.sep, '/') for path in hashed]
+    assert any(path.endswith('src/components/data_transformation.py') for path in hashed)
+    assert any(path.endswith('src/utils/utils.py') for path in hashed)
+
+
+def test_pipeline_skips_unchanged_stages(tmp_path, monkeypatch):
+    """A second run loads ingestion and transform outputs from the cache"""
+    monkeypatch.setattr(data_transformation, 'DataTransformConfig', functools.partial(
+        data_transformation.DataTransformConfig,
+        file_path=str(tmp_path / 'artifacts' / 'preprocessor.pkl'),
+        reference_profile_path=str(tmp_path / 'artifacts' / 'reference_profile.json')))
+    cache_dir = tmp_path / 'cache'
+    pipeline = TrainingPipeline(TrainingPipelineConfig(cache_dir=str(cache_dir)))
+    train, test = pipeline.start_data_ingestion()
+    first = pipeline.start_data_transform(train, test)
+
+    def fail(*args, **kwargs):
+        raise AssertionError("stage should have been skipped")
+
+    monkeypatch.setattr(DataIngestion, 'initiate_data_ingestion', fail)
+    train_again, test_again = pipeline.start_data_ingestion()
+    second = pipeline.start_data_transform(train_again, test_again)
+
+    pd.testing.assert_frame_equal(first[0], second[0])
+    pd.testing.assert_series_equal(first[3], second[3])
+    assert len(os.listdir(cache_dir)) == 2
+    assert (tmp_path / 'artifacts' / 'preprocessor.pkl').exists()
+
+
+def test_pipeline_skips_unchanged_training(tmp_path, monkeypatch):
+    """A second training run with the same inputs and params restores model.pkl and metrics.json"""
+    params_path = tmp_path / 'params.yaml'
+    params_path.write_text("model:\n  n_estimators: 10\nevaluation:\n  models: [XGBRegressor]\n")
+    artifacts = tmp_path / 'artifacts'
+    monkeypatch.setattr(model_trainer, 'ModelTrainerConfig', functools.partial(
+        model_trainer.ModelTrainerConfig, model_path=str(artifacts / 'model.pkl'),
+        metrics_path=str(artifacts / 'metrics.json'), params_path=str(params_path),
+        preprocessor_path=str(artifacts / 'preprocessor.pkl'), serving_dir=str(artifacts / 'serving')))
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(rng.random((200, 3)), columns=['a', 'b', 'c'])
+    y = pd.Series(X.sum(axis=1), name='price')
+    pipeline = TrainingPipeline(TrainingPipelineConfig(cache_dir=str(tmp_path / 'cache'),
+                                                       params_path=str(params_path)))
+    pipeline.start_model_trainer(X, X, y, y)
+    model_bytes = (artifacts / 'model.pkl').read_bytes()
+    (artifacts / 'model.pkl').unlink()
+
+    def fail(*args, **kwargs):
+        raise AssertionError("training should have been skipped")
+
+    monkeypatch.setattr(model_trainer.ModelTrainer, 'initiate_model_trainer', fail)
+    pipeline.start_model_trainer(X, X, y, y)
+
+    assert pipeline.model_restored
+    assert (artifacts / 'model.pkl').read_bytes() == model_bytes
+    assert (artifacts / 'metrics.json').exists()
+
+    config = model_trainer.ModelTrainerConfig()
+    key = pipeline._model_trainer_key(config, X, X, y, y, None)
+    params_path.write_text("model:\n  n_estimators: 20\nevaluation:\n  models: [XGBRegressor]\n")
+    assert pipeline._model_trainer_key(config, X, X, y, y, None) != key
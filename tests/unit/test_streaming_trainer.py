@@ -0,0 +1,68 @@
+import os
+import numpy as np
+import pandas as pd
+import yaml
+from src.components.data_ingestion import DataIngestion
+from src.components.data_transformation import DataTransform
+from src.components.streaming_trainer import StreamingTrainer, StreamingTrainerConfig, hash_split
+from src.utils.utils import FEATURE_COLUMNS, load_object
+
+
+def _trainer(tmp_path, **overrides):
+    data = DataIngestion().read_csv().head(4000).copy()
+    data.loc[data.index[::50], 'carat'] = np.nan
+    data['cut'] = data['cut'].astype(object)
+    data.loc[data.index[::70], 'cut'] = np.nan
+    data.to_csv(tmp_path / 'data.csv', index=False)
+    with open(tmp_path / 'params.yaml', 'w') as f:
+        yaml.safe_dump({'model': {'n_estimators': 20, 'learning_rate': 0.3, 'max_depth': 3}}, f)
+
+    ingestion = DataIngestion()
+    ingestion.data_config.data_path = str(tmp_path / 'data.csv')
+    config = StreamingTrainerConfig(
+        chunk_size=700,
+        params_path=str(tmp_path / 'params.yaml'),
+        model_path=str(tmp_path / 'model.pkl'),
+        preprocessor_path=str(tmp_path / 'preprocessor.pkl'),
+        metrics_path=str(tmp_path / 'metrics.json'),
+        serving_dir=str(tmp_path / 'serving'),
+        cache_dir=str(tmp_path / 'xgb-cache'),
+        **overrides
+    )
+    return StreamingTrainer(config, ingestion), ingestion
+
+
+def test_hash_split_ignores_chunking():
+    """A row's side of the split depends only on its content"""
+    data = DataIngestion().read_csv().head(2000)
+    whole = hash_split(data, 0.25)
+    chunked = np.concatenate([hash_split(data.iloc[i:i + 300], 0.25) for i in range(0, len(data), 300)])
+    assert np.array_equal(whole, chunked)
+    assert 0.2 < whole.mean() < 0.3
+
+
+def test_streamed_preprocessor_matches_in_memory_fit(tmp_path):
+    """One-pass statistics reproduce DataTransform's fit on the same training rows"""
+    trainer, ingestion = _trainer(tmp_path)
+    streamed, _ = trainer.fit_preprocessor()
+
+    data = ingestion.read_csv()
+    train = data[~hash_split(data, 0.25)][FEATURE_COLUMNS]
+    fitted = DataTransform().get_column_transformer().fit(train)
+
+    probe = data[FEATURE_COLUMNS].head(500)
+    np.testing.assert_allclose(streamed.transform(probe), fitted.transform(probe), rtol=1e-5, atol=1e-5)
+
+
+def test_streaming_training_writes_servable_artifacts(tmp_path):
+    """The streamed model is saved like ModelTrainer's and scores the held-out rows"""
+    trainer, ingestion = _trainer(tmp_path, external_memory=True)
+    metrics = trainer.initiate_streaming_training()
+
+    assert metrics['mode'] == 'streaming' and metrics['r2_score'] > 0.8
+    assert metrics['rows']['train'] + metrics['rows']['test'] == 4000
+    model = load_object(str(tmp_path / 'model.pkl'))
+    preprocessor = load_object(str(tmp_path / 'preprocessor.pkl'))
+    features = ingestion.read_csv()[FEATURE_COLUMNS].head(5)
+    assert model.predict(preprocessor.transform(features)).shape == (5,)
+    assert os.path.exists(tmp_path / 'serving' / 'manifest.json')
@@ -0,0 +1,112 @@
+import os
+import threading
+import time
+
+import numpy as np
+import pytest
+import yaml
+from src.components.model_trainer import ModelTrainer
+from src.utils.tracking import FileBackend, MlflowBackend, Tracker, TrackingConfig, read_run, xgboost_callback
+from xgboost import XGBRegressor
+
+
+class _SlowBackend(FileBackend):
+    def __init__(self, root) -> None:
+        super().__init__(root)
+        self.batches = 0
+
+    def log_batch(self, run_id, params, metrics, tags):
+        self.batches += 1
+        time.sleep(0.2)
+        super().log_batch(run_id, params, metrics, tags)
+
+
+def test_file_backend_records_run(tmp_path):
+    """Params, metrics, tags and artifacts end up in the run directory"""
+    artifact = tmp_path / "metrics.json"
+    artifact.write_text("{}")
+    with Tracker(FileBackend(str(tmp_path / "runs")), run_name="unit", tags={"a": "1"}) as tracker:
+        tracker.log_params({"model.max_depth": 4})
+        tracker.log_metrics({"r2": 0.5}, step=0)
+        tracker.log_metric("r2", 0.9, step=1)
+        tracker.set_tags({"best_model": "XGBRegressor"})
+        tracker.log_artifact(str(artifact))
+
+    run_dir = str(tmp_path / "runs" / tracker.run_id)
+    run = read_run(run_dir)
+    assert run["meta"]["status"] == "FINISHED"
+    assert run["meta"]["tags"] == {"a": "1", "best_model": "XGBRegressor"}
+    assert run["params"] == {"model.max_depth": 4}
+    assert run["metrics"]["r2"] == [(0, 0.5), (1, 0.9)]
+    assert os.path.exists(os.path.join(run_dir, "artifacts", "metrics.json"))
+
+
+def test_logging_does_not_wait_for_a_slow_backend(tmp_path):
+    """Metrics are buffered and written in a few batches off the caller's thread"""
+    backend = _SlowBackend(str(tmp_path))
+    tracker = Tracker(backend, config=TrackingConfig(flush_seconds=0.05, batch_size=5000))
+    start = time.perf_counter()
+    for step in range(20_000):
+        tracker.log_metric("loss", 1.0 / (step + 1), step)
+    assert time.perf_counter() - start < 0.2
+    tracker.close()
+
+    assert len(read_run(backend.run_dir(tracker.run_id))["metrics"]["loss"]) == 20_000
+    assert backend.batches < 20 and tracker.dropped == 0
+    assert not any(t.name == "tracking" and t.is_alive() for t in threading.enumerate())
+
+
+def test_xgboost_callback_logs_every_round(tmp_path):
+    """Each boosting round's eval metric is logged with its round as the step"""
+    rng = np.random.default_rng(0)
+    X, y = rng.normal(size=(300, 4)), rng.normal(size=300)
+    with Tracker(FileBackend(str(tmp_path))) as tracker:
+        model = XGBRegressor(n_estimators=12, callbacks=[xgboost_callback(tracker, prefix="xgb/")])
+        model.fit(X, y, eval_set=[(X, y)], verbose=False)
+
+    logged = read_run(str(tmp_path / tracker.run_id))["metrics"]["xgb/validation_0-rmse"]
+    assert [step for step, _ in logged] == list(range(12))
+    assert np.allclose([value for _, value in logged], model.evals_result()["validation_0"]["rmse"])
+
+
+def test_model_trainer_tracks_run(data_transform, tmp_path):
+    """An enabled tracking block records the trainer's params, curves and artifacts"""
+    X_train, X_test, y_train, y_test = data_transform
+    params = yaml.safe_load(open("params.yaml"))
+    params["model"] = {"n_estimators": 15, "max_depth": 3}
+    params["tracking"] = {"enabled": True, "backend": "file", "root": str(tmp_path / "runs")}
+    with open(tmp_path / "params.yaml", "w") as f:
+        yaml.safe_dump(params, f)
+
+    trainer = ModelTrainer()
+    trainer.config.params_path = str(tmp_path / "params.yaml")
+    trainer.config.metrics_path = str(tmp_path / "metrics.json")
+    trainer.config.model_path = str(tmp_path / "model.pkl")
+    trainer.config.serving_dir = str(tmp_path / "serving")
+    trainer.initiate_model_trainer(X_train, X_test, y_train, y_test)
+
+    run_id, = os.listdir(tmp_path / "runs")
+    run = read_run(str(tmp_path / "runs" / run_id))
+    assert run["meta"]["status"] == "FINISHED"
+    assert run["params"]["model.n_estimators"] == 15
+    assert len(run["metrics"]["XGBRegressor/validation_0-rmse"]) == 15
+    assert "r2_score" in run["metrics"]
+    assert sorted(os.listdir(tmp_path / "runs" / run_id / "artifacts")) == ["metrics.json", "model.pkl"]
+
+
+def test_mlflow_backend_logs_batches(tmp_path, monkeypatch):
+    """The mlflow backend writes a batched run to a local tracking store"""
+    pytest.importorskip("mlflow")
+    # mlflow puts the default artifact root under the working directory
+    monkeypatch.chdir(tmp_path)
+    backend = MlflowBackend("unit", tracking_uri=f"sqlite:///{tmp_path / 'mlflow.db'}")
+    with Tracker(backend, run_name="unit") as tracker:
+        tracker.log_params({"max_depth": 4})
+        for step in range(1500):
+            tracker.log_metric("loss", 1.0 / (step + 1), step)
+    assert tracker.errors == 0
+
+    run = backend.client.get_run(tracker.run_id)
+    assert run.info.status == "FINISHED"
+    assert run.data.params == {"max_depth": "4"}
+    assert len(backend.client.get_metric_history(tracker.run_id, "loss")) == 1500
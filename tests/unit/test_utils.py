@@ -1,16 +1,21 @@
+import mmap
 import os
 import tempfile
+import time
 import pickle
 import pytest
 import pandas as pd
 import numpy as np
 from sklearn.linear_model import LinearRegression
+from sklearn.tree import DecisionTreeRegressor
 from src.utils.utils import (
     save_object, 
     load_object, 
     evaluate_models, 
+    evaluate_models_report,
     evaluate_metrics,
-    get_data_as_dataframe
+    get_data_as_dataframe,
+    get_records_as_dataframe
 )
 
 
@@ -123,4 +128,78 @@ def test_evaluate_models_basic():
     assert isinstance(report, dict)
     assert 'LinearRegression' in report
     assert isinstance(report['LinearRegression'], float)
-    assert report['LinearRegression'] <= 1  
\ No newline at end of file
+    assert report['LinearRegression'] <= 1  
+
+def test_get_records_as_dataframe():
+    """Test converting a list of JSON diamonds to a DataFrame"""
+    records = [
+        {'carat': 0.5, 'depth': 61.5, 'table': 57.0, 'x': 5.15, 'y': 5.18, 'z': 3.17,
+         'cut': 'Ideal', 'color': 'E', 'clarity': 'VS1'},
+        {'carat': '1.2', 'depth': 62.0, 'table': 58.0, 'x': 6.8, 'y': 6.8, 'z': 4.2,
+         'cut': 'Good', 'color': 'H', 'clarity': 'SI2', 'extra': 'ignored'},
+    ]
+
+    df = get_records_as_dataframe(records)
+
+    assert list(df.columns) == ['carat', 'depth', 'table', 'x', 'y', 'z', 'cut', 'color', 'clarity']
+    assert len(df) == 2
+    assert df['carat'].iloc[1] == 1.2
+
+    with pytest.raises(ValueError):
+        get_records_as_dataframe([{'carat': 0.5}])
+
+
+class _SlowRegressor(LinearRegression):
+    def fit(self, X, y, sample_weight=None):
+        time.sleep(5)
+        return super().fit(X, y, sample_weight)
+
+
+@pytest.mark.parametrize("executor", ["process", "thread"])
+def test_evaluate_models_report_parallel(executor):
+    """Concurrent evaluation reports timings per model and honours timeouts"""
+    np.random.seed(0)
+    X_train, X_test = np.random.rand(200, 3), np.random.rand(50, 3)
+    y_train, y_test = X_train @ [1.0, 2.0, 3.0], X_test @ [1.0, 2.0, 3.0]
+    models = {
+        'LinearRegression': LinearRegression(),
+        'DecisionTreeRegressor': DecisionTreeRegressor(max_depth=3),
+        'Slow': _SlowRegressor()
+    }
+
+    report = evaluate_models_report(X_train, X_test, y_train, y_test, models,
+                                    n_jobs=3, executor=executor, timeout=1.0)
+
+    assert report['Slow']['status'] == 'timeout'
+    for name in ('LinearRegression', 'DecisionTreeRegressor'):
+        assert report[name]['status'] == 'ok'
+        assert report[name]['fit_seconds'] >= 0
+        assert report[name]['predict_seconds'] >= 0
+        assert report[name]['wall_seconds'] >= report[name]['fit_seconds']
+        assert report[name]['rmse'] >= 0
+    assert report['LinearRegression']['r2'] > 0.99
+    # fitted estimators are handed back to the caller
+    assert models['LinearRegression'].predict(X_test[:2]).shape == (2,)
+    if executor == 'process':
+        assert report['LinearRegression']['peak_memory_mb'] > 0
+
+
+class _NativeAllocatingRegressor(LinearRegression):
+    def fit(self, X, y, sample_weight=None):
+        # an anonymous mapping is invisible to tracemalloc, like XGBoost's own buffers
+        size = 64 * 2**20
+        buffer = mmap.mmap(-1, size)
+        for offset in range(0, size, mmap.PAGESIZE):
+            buffer[offset] = 1
+        buffer.close()
+        return super().fit(X, y, sample_weight)
+
+
+def test_peak_memory_includes_native_allocations():
+    """peak_memory_mb counts memory allocated outside the Python heap"""
+    X, y = np.random.rand(50, 2), np.random.rand(50)
+    models = {'Native': _NativeAllocatingRegressor(), 'Plain': LinearRegression()}
+
+    report = evaluate_models_report(X, X, y, y, models, n_jobs=2, executor='process')
+
+    assert report['Native']['peak_memory_mb'] >= 60
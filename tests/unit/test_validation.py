@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+import pytest
+from src.pipeline.serving import parse_form, parse_json_payload
+from src.pipeline.validation import DIAMOND_SCHEMA, ValidationError
+
+DIAMOND = {'carat': 0.5, 'depth': 61.5, 'table': 57.0, 'x': 5.15, 'y': 5.18, 'z': 3.17,
+           'cut': 'Ideal', 'color': 'E', 'clarity': 'VS1'}
+
+
+def test_valid_rows_are_coerced():
+    """Numeric strings become floats and category whitespace is stripped"""
+    record = {**DIAMOND, 'carat': '0.5', 'cut': ' Ideal '}
+    result = DIAMOND_SCHEMA.validate([record, DIAMOND])
+
+    assert result.ok and result.errors == []
+    assert result.frame['carat'].dtype == np.float64
+    assert result.frame['cut'].tolist() == ['Ideal', 'Ideal']
+
+
+def test_per_row_errors():
+    """Bad types, bounds, vocabularies and missing fields are reported per row"""
+    rows = [
+        DIAMOND,
+        {**DIAMOND, 'carat': 0, 'depth': 'deep'},
+        {**DIAMOND, 'cut': 'Superb', 'z': float('inf')},
+        {key: value for key, value in DIAMOND.items() if key != 'clarity'},
+    ]
+    result = DIAMOND_SCHEMA.validate(rows)
+
+    assert result.valid.tolist() == [True, False, False, False]
+    assert [(e['row'], e['field']) for e in result.errors] == [
+        (1, 'carat'), (1, 'depth'), (2, 'z'), (2, 'cut'), (3, 'clarity')]
+    assert result.errors[1]['error'] == 'not a number'
+    assert len(result.valid_frame) == 1
+    with pytest.raises(ValidationError) as excinfo:
+        result.raise_for_errors()
+    assert len(excinfo.value.errors) == 5
+
+
+def test_nested_values_are_rejected_per_row():
+    """Same-length nested lists stay one value per row and fail like any other bad value"""
+    rows = [{**DIAMOND, 'carat': [1.0, 2.0], 'cut': ['Ideal', 'Good']},
+            {**DIAMOND, 'carat': [3.0, 4.0], 'cut': ['Ideal', 'Good']}]
+    result = DIAMOND_SCHEMA.validate(rows)
+
+    assert result.valid.tolist() == [False, False]
+    assert [(e['row'], e['field']) for e in result.errors] == [(0, 'carat'), (0, 'cut'), (1, 'carat'), (1, 'cut')]
+    assert result.errors[0]['error'] == 'not a number'
+
+
+def test_dataframe_input_and_missing_column():
+    """DataFrames keep their index, and a missing column fails every row"""
+    frame = pd.DataFrame([DIAMOND, DIAMOND], index=[10, 11]).drop(columns=['table'])
+    result = DIAMOND_SCHEMA.validate(frame)
+
+    assert list(result.frame.index) == [10, 11]
+    assert not result.valid.any()
+    assert {e['field'] for e in result.errors} == {'table'}
+
+
+def test_request_parsers_use_the_schema():
+    """Form and JSON parsing reject out-of-range values instead of passing them to the model"""
+    form = {key: str(value) for key, value in DIAMOND.items()}
+    assert parse_form(form)['carat'].tolist() == [0.5]
+    with pytest.raises(ValidationError):
+        parse_form({**form, 'x': '-3'})
+    with pytest.raises(ValidationError) as excinfo:
+        parse_json_payload({'diamonds': [DIAMOND, {**DIAMOND, 'color': 'Z'}]})
+    assert excinfo.value.errors[0]['row'] == 1
+    with pytest.raises(TypeError):
+        parse_json_payload([DIAMOND, 'not a diamond'])